@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""In-process caches."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe, bounded, in-process cache with a time-to-live.
+
+    Entries expire ``ttl`` seconds after being set (never if ``ttl`` is
+    ``None``), and the least recently used entries are evicted once the cache
+    holds more than ``maxsize`` entries.
+
+    The cache is meant to be shared, e.g. between the requests served by a
+    worker. It is therefore never copied: ``copy.deepcopy`` of an object
+    holding a cache (such as the facets of a search config) shares the cache.
+
+    .. code-block:: python
+
+        cache = TTLCache(maxsize=1000, ttl=300)
+        cache.set_many({"a": 1, "b": 2})
+        hits, misses = cache.get_many(["a", "c"])  # ({"a": 1}, ["c"])
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """Constructor."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        """Share the cache instead of copying it."""
+        return self
+
+    def __len__(self):
+        """Number of entries, including the expired ones not evicted yet."""
+        return len(self._data)
+
+    def _expires_at(self):
+        return None if self.ttl is None else time.monotonic() + self.ttl
+
+    def get(self, key, default=None):
+        """Get a value from the cache."""
+        hits, _ = self.get_many([key])
+        return hits.get(key, default)
+
+    def get_many(self, keys):
+        """Get many values from the cache.
+
+        :returns: a tuple of a dict with the found values and the list of
+            missing keys.
+        """
+        hits, misses = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    misses.append(key)
+                    continue
+                value, expires_at = entry
+                if expires_at is not None and expires_at < now:
+                    del self._data[key]
+                    misses.append(key)
+                    continue
+                self._data.move_to_end(key)
+                hits[key] = value
+        return hits, misses
+
+    def set(self, key, value):
+        """Set a value in the cache."""
+        self.set_many({key: value})
+
+    def set_many(self, mapping):
+        """Set many values in the cache."""
+        expires_at = self._expires_at()
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (value, expires_at)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a value from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all values from the cache."""
+        with self._lock:
+            self._data.clear()
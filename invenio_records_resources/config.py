@@ -58,3 +58,93 @@ RECORDS_RESOURCES_ZIP_MAX_ENTRIES = 10000
 
 RECORDS_RESOURCES_ARCHIVE_DOWNLOAD_MAX_SIZE = None
 """Max total file size (bytes) for archive download. ``None`` disables the cap."""
+
+RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WINDOW = None
+"""Seconds during which the change notifications are coalesced.
+
+When set, the change notifications are queued and sent after the window,
+merged by record type, keeping the latest revision of each record. Otherwise
+the notifications of each unit of work are sent right away.
+"""
+
+RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_QUEUE = "change-notifications"
+"""Name of the queue of the coalesced change notifications."""
+
+RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WORKERS = 4
+"""Maximum number of change notification handlers run in parallel."""
+
+RECORDS_RESOURCES_BULK_INDEX_SYNC = False
+"""Index the records of bulk operations and reindexes directly.
+
+By default, the ids of the records are sent to the indexer queue, to be
+indexed by its consumers. When enabled, the records are instead indexed
+synchronously with parallel bulk requests, e.g. for migrations, batch jobs or
+tests where no consumer runs.
+"""
+
+RECORDS_RESOURCES_BULK_INDEX_WORKERS = 4
+"""Number of threads sending the synchronous bulk requests."""
+
+RECORDS_RESOURCES_BULK_INDEX_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # 10 MB
+"""Max size of a synchronous bulk request."""
+
+RECORDS_RESOURCES_BULK_INDEX_BATCH_SIZE = 500
+"""Number of records loaded at once from the database for synchronous indexing."""
+
+RECORDS_RESOURCES_BULK_INDEX_MAX_RETRIES = 5
+"""Number of retries of the documents rejected by an overloaded cluster."""
+
+RECORDS_RESOURCES_BULK_INDEX_BACKOFF = 1
+"""Seconds before the first retry of rejected documents, doubled on each retry."""
+
+RECORDS_RESOURCES_BULK_INDEX_DEAD_LETTER_QUEUE = "indexer-dead-letter"
+"""Name of the queue of the records which failed to be bulk indexed.
+
+The records are indexed again by the ``replay_dead_letter_index`` task, which
+can be scheduled periodically, e.g.:
+
+.. code-block:: python
+
+    CELERY_BEAT_SCHEDULE = {
+        "indexer-dead-letter": {
+            "task": "invenio_records_resources.tasks.replay_dead_letter_index",
+            "schedule": timedelta(minutes=30),
+        },
+    }
+"""
+
+RECORDS_RESOURCES_INDEX_REFRESH_POLICY = "operation"
+"""Index refresh policy of the units of work of the services.
+
+One of ``"operation"`` (refresh as requested by each operation, e.g. after a
+record deletion), ``"none"``, ``"wait_for"`` or ``"end"`` (see
+:class:`invenio_records_resources.services.uow.UnitOfWork`).
+"""
+
+RECORDS_RESOURCES_INDEXER_BULK_MAX_CONSUMERS = 1
+"""Max number of consumers shared by the bulk indexer queues of the services.
+
+Reindexing and relations propagation are sent to the bulk queue of a service
+if its ``indexer_bulk_queue_name`` is set. The bulk queues are consumed after
+the other indexer queues, with at most this number of consumers.
+"""
+
+RECORDS_RESOURCES_INDEXER_ITEMS_PER_CONSUMER = 10000
+"""Number of queued records consumed by an indexer, until its drain rate is known."""
+
+RECORDS_RESOURCES_INDEXER_TARGET_DRAIN_TIME = 300
+"""Seconds in which the backlog of an indexer queue should be consumed.
+
+Used with the observed drain rate to derive the number of consumers, up to
+``INDEXER_MAX_BULK_CONSUMERS``.
+"""
+
+RECORDS_RESOURCES_INDEXER_MAX_LATENCY = 2
+"""Seconds of the search cluster stats response above which no indexer is spawned."""
+
+RECORDS_RESOURCES_INDEXER_CONSUMER_TTL = 300
+"""Seconds after which a running indexer consumer is no longer counted.
+
+The consumers renew their registration while consuming, so that a killed
+worker is only counted until its registration expires.
+"""
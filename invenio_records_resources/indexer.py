@@ -0,0 +1,1067 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Synchronous bulk indexing of records."""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from math import ceil
+from uuid import uuid4
+
+from celery import current_app as current_celery_app
+from flask import current_app
+from invenio_cache import current_cache
+from invenio_indexer.api import RecordIndexer as BaseRecordIndexer
+from invenio_search import current_search
+from invenio_search.engine import search
+from invenio_search.utils import build_alias_name, timestamp_suffix
+from kombu import Exchange, Producer, Queue
+from kombu.compat import Consumer
+from werkzeug.local import LocalProxy
+
+from .cache import TTLCache
+from .records.dumpers import ContentHashDumperExt
+from .signals import index_written
+
+
+class RecordIndexer(BaseRecordIndexer):
+    """Record indexer with an optional custom routing of the documents.
+
+    The documents are routed to the shards by their id, unless
+    ``record_to_routing`` returns a routing value for the record. Searches
+    restricted to this value then only hit the matching shards.
+
+    The writes to an index being migrated (see :class:`IndexMigration`) are
+    also copied to its new index.
+    """
+
+    _migration_actions = None
+    _batch_records = {}
+    _consumer = None
+
+    def __init__(self, *args, record_to_routing=None, **kwargs):
+        """Constructor.
+
+        :param record_to_routing: function returning the routing value of a
+            record, or ``None`` to route it by id.
+        """
+        super().__init__(*args, **kwargs)
+        self._record_to_routing = record_to_routing
+
+    def record_to_routing(self, record):
+        """Get the routing value of a record."""
+        if self._record_to_routing is None:
+            return None
+        return self._record_to_routing(record)
+
+    def migration_index(self, index):
+        """Get the new index receiving the writes to an index, if migrated."""
+        return get_migration_index(self.client, index)
+
+    def _copy(self, write, **kwargs):
+        """Copy a write to the new index of a migration.
+
+        The documents not copied yet, or copied in a newer version, are
+        ignored.
+        """
+        try:
+            write(**kwargs)
+        except (search.exceptions.NotFoundError, search.exceptions.ConflictError):
+            pass
+
+    def index(self, record, arguments=None, **kwargs):
+        """Index a record."""
+        index = self.record_to_index(record)
+        arguments = arguments or {}
+        body = self._prepare_record(record, index, arguments, **kwargs)
+        index = self._prepare_index(index)
+        params = dict(
+            id=str(record.id),
+            version=record.revision_id,
+            version_type=self._version_type,
+            body=body,
+            **arguments,
+        )
+
+        response = self.client.index(index=index, **params)
+        notify_writes(self, [index])
+        migration_index = self.migration_index(index)
+        if migration_index:
+            self._copy(self.client.index, index=migration_index, **params)
+
+        action = {"_op_type": "index", "_index": index, "_id": str(record.id)}
+        for delete in self.stale_copies([{**action, **arguments}]):
+            kwargs = {"routing": delete["_routing"]} if "_routing" in delete else {}
+            try:
+                self.client.delete(index=delete["_index"], id=delete["_id"], **kwargs)
+            except search.exceptions.NotFoundError:
+                pass
+        return response
+
+    def delete(self, record, **kwargs):
+        """Delete a record."""
+        routing = self.record_to_routing(record)
+        if routing is not None:
+            kwargs.setdefault("routing", routing)
+        response = super().delete(record, **kwargs)
+        index = self._prepare_index(self.record_to_index(record))
+        notify_writes(self, [index])
+
+        migration_index = self.migration_index(index)
+        if migration_index:
+            if "version" in kwargs and kwargs["version"] is None:
+                kwargs.pop("version")
+                kwargs.pop("version_type", None)
+            else:
+                kwargs.setdefault("version", record.revision_id)
+                kwargs.setdefault("version_type", self._version_type)
+            self._copy(
+                self.client.delete, id=str(record.id), index=migration_index, **kwargs
+            )
+        return response
+
+    def index_action(self, record, arguments=None, **kwargs):
+        """Get the bulk action indexing a record.
+
+        The action is built like the request of :meth:`index`, e.g. with the
+        arguments set by the ``before_record_index`` signal receivers.
+        """
+        index = self.record_to_index(record)
+        arguments = dict(arguments or {})
+        body = self._prepare_record(record, index, arguments, **kwargs)
+        arguments.pop("refresh", None)
+        routing = arguments.pop("routing", None)
+        action = {
+            "_op_type": "index",
+            "_index": self._prepare_index(index),
+            "_id": str(record.id),
+            "_version": record.revision_id,
+            "_version_type": self._version_type,
+            "_source": body,
+            **arguments,
+        }
+        if routing is not None:
+            action["_routing"] = routing
+        return action
+
+    def delete_action(self, record):
+        """Get the bulk action deleting a record, like :meth:`delete`."""
+        action = {
+            "_op_type": "delete",
+            "_index": self._prepare_index(self.record_to_index(record)),
+            "_id": str(record.id),
+            "_version": record.revision_id,
+            "_version_type": self._version_type,
+        }
+        routing = self.record_to_routing(record)
+        if routing is not None:
+            action["_routing"] = routing
+        return action
+
+    def process_bulk_queue(self, search_bulk_kwargs=None, bulk_index_max_items=None):
+        """Process bulk indexing queue.
+
+        The running consumers of the queue are registered in the cache (see
+        :func:`running_consumers`).
+        """
+        self._consumer = QueueConsumer(self.mq_queue.name)
+        self._consumer.register()
+        try:
+            return self._consume_bulk_queue(search_bulk_kwargs, bulk_index_max_items)
+        finally:
+            self._consumer.unregister()
+            self._consumer = None
+
+    def _consume_bulk_queue(self, search_bulk_kwargs, bulk_index_max_items):
+        """Consume the bulk indexing queue.
+
+        The documents identical to their indexed version are skipped, if the
+        dumper has a content hash extension (see :func:`filter_unchanged`).
+        Documents rejected by an overloaded cluster are retried with an
+        exponential backoff. The ids of the records which still fail to be
+        indexed are sent to the dead-letter queue.
+
+        :returns: a tuple of the number of written and failed documents.
+        """
+        self._migration_actions = []
+        try:
+            with current_celery_app.pool.acquire(block=True) as conn:
+                consumer = Consumer(
+                    connection=conn,
+                    queue=self.mq_queue.name,
+                    exchange=self.mq_exchange.name,
+                    routing_key=self.mq_routing_key,
+                )
+                messages = consumer.iterqueue(
+                    limit=bulk_index_max_items or self._bulk_index_max_items
+                )
+                actions = self._changed_actions(self._actionsiter(messages))
+                indexed, failed = self._bulk_with_retries(
+                    actions, **(search_bulk_kwargs or {})
+                )
+                consumer.close()
+        finally:
+            actions, self._migration_actions = self._migration_actions, None
+        bulk_copy(self.client, actions)
+
+        failed_ids = [id_ for op_type, id_ in failed if op_type == "index"]
+        if failed_ids:
+            dead_letter(self, failed_ids)
+        return indexed, len(failed)
+
+    def _changed_actions(self, actions, batch_size=500):
+        """Skip the index actions of the documents which did not change.
+
+        The copies of the documents with another routing are deleted (see
+        :meth:`stale_copies`).
+        """
+        if get_content_hash_extension(self) is None and self._record_to_routing is None:
+            yield from actions
+            return
+        for batch in _batched(actions, batch_size):
+            documents = [
+                (a["_index"], a["_id"], a["_source"], a.get("routing"))
+                for a in batch
+                if a["_op_type"] == "index"
+            ]
+            changed = {
+                (index, id_) for index, id_, _, _ in filter_unchanged(self, documents)
+            }
+            batch = [
+                action
+                for action in batch
+                if action["_op_type"] != "index"
+                or (action["_index"], action["_id"]) in changed
+            ]
+            yield from batch
+            yield from self.stale_copies(batch)
+
+    def stale_copies(self, actions):
+        """Get the delete actions of the copies of documents with another routing.
+
+        The document of a record whose routing value changed, e.g. moved to
+        another community, is written to another shard: its copy with the
+        previous routing must be deleted. The copies are searched by id in all
+        the shards, and are thus only found once the index is refreshed.
+
+        :param actions: the bulk index actions of the documents.
+        """
+        if self._record_to_routing is None:
+            return []
+
+        routings = {}
+        for action in actions:
+            if action["_op_type"] == "index":
+                routing = action.get("_routing", action.get("routing"))
+                routings.setdefault(action["_index"], {})[action["_id"]] = routing
+
+        deletes = []
+        for index, index_routings in routings.items():
+            try:
+                response = self.client.search(
+                    index=index,
+                    body={
+                        "query": {"ids": {"values": list(index_routings)}},
+                        "_source": False,
+                        "size": 2 * len(index_routings),
+                    },
+                )
+            except search.exceptions.NotFoundError:
+                continue
+            for hit in response["hits"]["hits"]:
+                routing = hit.get("_routing")
+                if routing != index_routings.get(hit["_id"]):
+                    delete = {
+                        "_op_type": "delete",
+                        "_index": hit["_index"],
+                        "_id": hit["_id"],
+                    }
+                    if routing is not None:
+                        delete["_routing"] = routing
+                    deletes.append(delete)
+        return deletes
+
+    def _bulk_with_retries(self, actions, **kwargs):
+        """Send bulk actions, retrying the rejected ones with a backoff.
+
+        :returns: the number of written documents, and the operation type and
+            id of the failed ones.
+        """
+        config = current_app.config
+        max_retries = config["RECORDS_RESOURCES_BULK_INDEX_MAX_RETRIES"]
+        backoff = config["RECORDS_RESOURCES_BULK_INDEX_BACKOFF"]
+        kwargs.pop("stats_only", None)
+        kwargs.setdefault("request_timeout", config["INDEXER_BULK_REQUEST_TIMEOUT"])
+
+        written, failed, rejected = [], [], []
+        for attempt in range(max_retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+                actions, rejected = rejected, []
+            sent = deque()
+
+            def _actions(actions):
+                for action in actions:
+                    sent.append(action)
+                    yield action
+
+            results = search.helpers.streaming_bulk(
+                self.client,
+                _actions(actions),
+                raise_on_error=False,
+                raise_on_exception=False,
+                **kwargs,
+            )
+            for ok, item in results:
+                action = sent.popleft()
+                op_type, result = next(iter(item.items()))
+                status = result.get("status", 500)
+                # a conflict means that a newer revision is already indexed
+                if ok or status == 409 or (op_type == "delete" and status == 404):
+                    written.append(action["_index"])
+                elif _is_rejected(result):
+                    rejected.append(action)
+                else:
+                    current_app.logger.error(
+                        "Failed to index record %s: %s",
+                        action["_id"],
+                        result.get("error"),
+                    )
+                    failed.append((op_type, action["_id"]))
+            if not rejected:
+                break
+        else:
+            failed.extend((a["_op_type"], a["_id"]) for a in rejected)
+        notify_writes(self, written)
+        return len(written), failed
+
+    def _actionsiter(self, message_iterator, batch_size=500):
+        """Iterate bulk actions, and collect their copies for migrated indices.
+
+        The records of each batch of messages are loaded at once, and their
+        relations are dereferenced with one query per related PID field.
+        """
+        # imported here to prevent circular imports
+        from .records.systemfields import relations_cache
+
+        for messages in _batched(message_iterator, batch_size):
+            if self._consumer is not None:
+                self._consumer.register()
+            with relations_cache():
+                self._batch_records = self._load_records(messages)
+                try:
+                    actions = list(super()._actionsiter(messages))
+                finally:
+                    self._batch_records = {}
+            for action in actions:
+                if self._migration_actions is not None:
+                    self._migration_actions.extend(migration_actions(self, [action]))
+                yield action
+
+    def _load_records(self, messages):
+        """Load the records to index of a batch of messages, by id.
+
+        The records which cannot be loaded at once are loaded one by one.
+        """
+        # imported here to prevent circular imports
+        from .records.systemfields import dereference_relations
+
+        ids = []
+        try:
+            for message in messages:
+                payload = message.decode()
+                if payload["op"] != "delete":
+                    ids.append(payload["id"])
+            records = self.record_cls.get_records(ids) if ids else []
+            dereference_relations(records)
+        except Exception:
+            current_app.logger.warning("Failed to load a batch of records to index.")
+            return {}
+        return {str(record.id): record for record in records}
+
+    def _index_action(self, payload):
+        """Bulk index action, of the record loaded with its batch if any."""
+        record = self._batch_records.get(payload["id"])
+        if record is None:
+            return super()._index_action(payload)
+        index = self.record_to_index(record)
+        arguments = {}
+        body = self._prepare_record(record, index, arguments)
+        return {
+            "_op_type": "index",
+            "_index": self._prepare_index(index),
+            "_id": str(record.id),
+            "_version": record.revision_id,
+            "_version_type": self._version_type,
+            "_source": body,
+            **arguments,
+        }
+
+    def _delete_action(self, payload):
+        """Bulk delete action."""
+        action = super()._delete_action(payload)
+        if self._record_to_routing is not None:
+            record = self.record_cls.get_record(payload["id"], with_deleted=True)
+            routing = self.record_to_routing(record)
+            if routing is not None:
+                action["_routing"] = routing
+        return action
+
+    def _prepare_record(self, record, index, arguments=None, **kwargs):
+        """Prepare record data for indexing, and its routing in the arguments."""
+        routing = self.record_to_routing(record)
+        if routing is not None and arguments is not None:
+            arguments["routing"] = routing
+        return super()._prepare_record(record, index, arguments, **kwargs)
+
+
+_migration_indices = TTLCache(maxsize=1024, ttl=10)
+
+
+def migration_alias(index):
+    """Name of the alias of the new index of a migrated index."""
+    return f"{index}-migration"
+
+
+def get_migration_index(client, index):
+    """Get the new index of an index being migrated, if any.
+
+    The lookups are cached for a few seconds in each process: a migration
+    waits for this time before copying the records, so that all the writers
+    copy their writes to the new index by then.
+
+    :param index: name of the (write alias of the) index.
+    """
+    hits, _ = _migration_indices.get_many([index])
+    if index in hits:
+        return hits[index]
+    try:
+        response = client.indices.get_alias(name=migration_alias(index))
+        new_index = next(iter(response), None)
+    except search.exceptions.NotFoundError:
+        new_index = None
+    _migration_indices.set(index, new_index)
+    return new_index
+
+
+def migration_actions(indexer, actions):
+    """Copies of bulk actions for the new indices of migrated indices."""
+    migration_index = getattr(indexer, "migration_index", None)
+    if migration_index is None:
+        return []
+    copies = []
+    for action in actions:
+        new_index = migration_index(action["_index"])
+        if new_index:
+            copies.append({**action, "_index": new_index})
+    return copies
+
+
+def bulk_copy(client, actions):
+    """Send the copies of bulk actions to the new indices of migrations.
+
+    The documents not copied yet, or copied in a newer version, are ignored.
+    """
+    if actions:
+        search.helpers.bulk(client, actions, raise_on_error=False, stats_only=True)
+
+
+def notify_writes(indexer, indices):
+    """Send the ``index_written`` signal for the documents written by an indexer.
+
+    :param indices: the index of each written document.
+    """
+    for index, count in Counter(index for index in indices if index).items():
+        index_written.send(indexer, index=index, count=count)
+
+
+def get_routing(indexer, record):
+    """Get the routing value of a record, if the indexer routes the records."""
+    record_to_routing = getattr(indexer, "record_to_routing", None)
+    return record_to_routing(record) if record_to_routing else None
+
+
+class IndexWritesCounter:
+    """Thread-safe counter of index writes."""
+
+    def __init__(self):
+        """Constructor."""
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, count=1):
+        """Increment the counter."""
+        with self._lock:
+            self.value += count
+
+
+suppressed_writes = IndexWritesCounter()
+"""Number of index writes skipped because the document did not change."""
+
+
+def get_content_hash_extension(indexer):
+    """Get the content hash extension of the dumper of an indexer, if any."""
+    dumper = indexer.record_dumper or getattr(indexer.record_cls, "dumper", None)
+    for extension in getattr(dumper, "_extensions", []):
+        if isinstance(extension, ContentHashDumperExt):
+            return extension
+    return None
+
+
+def filter_unchanged(indexer, documents):
+    """Filter out the documents identical to their indexed version.
+
+    Only applies if the dumper of the indexer has a content hash extension.
+    The hashes of the indexed documents are fetched in a single request.
+
+    :param documents: list of tuples of the index, id, source and routing
+        (or ``None``) of documents.
+    :returns: the documents which changed.
+    """
+    extension = get_content_hash_extension(indexer)
+    if extension is None or not documents:
+        return documents
+
+    docs = []
+    for index, id_, source, routing in documents:
+        # the source can have been modified after the dump
+        extension.update(source)
+        doc = {"_index": index, "_id": id_, "_source": [extension.key]}
+        if routing is not None:
+            doc["routing"] = routing
+        docs.append(doc)
+    try:
+        response = indexer.client.mget(body={"docs": docs})
+    except search.exceptions.NotFoundError:
+        return documents
+
+    changed = [
+        document
+        for document, indexed in zip(documents, response["docs"])
+        if not indexed.get("found")
+        or indexed["_source"].get(extension.key) != document[2][extension.key]
+    ]
+    if len(changed) < len(documents):
+        suppressed_writes.increment(len(documents) - len(changed))
+    return changed
+
+
+def _batched(iterable, size):
+    """Split an iterable in lists of ``size`` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _serialize_records(indexer, record_ids, batch_size, serializer, index=None):
+    """Load the records in database batches and serialize their index actions.
+
+    The relations of the records of a batch are dereferenced with one query
+    per related PID field. The records whose document did not change are
+    skipped. The writes to an index being migrated are copied to its new
+    index, without a record id.
+    """
+    # imported here to prevent circular imports
+    from .records.systemfields import dereference_relations, relations_cache
+
+    # the writes to another index are not copied
+    migration_index = None if index else getattr(indexer, "migration_index", None)
+    for ids in _batched(record_ids, batch_size):
+        documents, versions = [], {}
+        with relations_cache():
+            records = indexer.record_cls.get_records(ids)
+            dereference_relations(records)
+            for record in records:
+                record_index = indexer.record_to_index(record)
+                body = indexer._prepare_record(record, record_index, {})
+                routing = get_routing(indexer, record)
+                documents.append(
+                    (
+                        index or indexer._prepare_index(record_index),
+                        str(record.id),
+                        body,
+                        routing,
+                    )
+                )
+                versions[str(record.id)] = record.revision_id
+
+        for index, id_, body, routing in filter_unchanged(indexer, documents):
+            action = {
+                "index": {
+                    "_index": index,
+                    "_id": id_,
+                    "version": versions[id_],
+                    "version_type": indexer._version_type,
+                }
+            }
+            if routing is not None:
+                action["index"]["routing"] = routing
+            source = serializer.dumps(body)
+            yield id_, f"{serializer.dumps(action)}\n{source}\n"
+
+            new_index = migration_index(index) if migration_index else None
+            if new_index:
+                action["index"]["_index"] = new_index
+                yield None, f"{serializer.dumps(action)}\n{source}\n"
+
+
+class ChunkSize:
+    """Size of the bulk requests, adapted to the rejections of the cluster.
+
+    The size is halved on each rejection, and grows back additively with the
+    accepted requests up to its maximum.
+    """
+
+    def __init__(self, max_bytes):
+        """Constructor."""
+        self.max_bytes = max_bytes
+        self.value = max_bytes
+        self._lock = threading.Lock()
+
+    def shrink(self):
+        """Shrink the size after a rejection."""
+        with self._lock:
+            self.value = max(self.value // 2, 1)
+
+    def grow(self):
+        """Grow the size after an accepted request."""
+        with self._lock:
+            self.value = min(self.value + self.max_bytes // 8, self.max_bytes)
+
+
+def _chunks(documents, chunk_size):
+    """Group the serialized documents in chunks of at most the chunk size."""
+    chunk, size = [], 0
+    for id_, document in documents:
+        document_size = len(document.encode("utf-8"))
+        if chunk and size + document_size > chunk_size.value:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append((id_, document))
+        size += document_size
+    if chunk:
+        yield chunk
+
+
+def _is_rejected(error):
+    """Check if an error is a rejection of an overloaded cluster."""
+    if error.get("status") == 429:
+        return True
+    error = error.get("error")
+    return isinstance(error, dict) and error.get("type") in (
+        "es_rejected_execution_exception",
+        "rejected_execution_exception",
+    )
+
+
+def _send(client, chunk):
+    """Send a chunk of documents in a bulk request.
+
+    :returns: the index of each indexed document, the rejected documents and
+        the failed ids with their errors.
+    """
+    try:
+        response = client.bulk(body="".join(document for _, document in chunk))
+    except search.exceptions.TransportError as e:
+        if e.status_code != 429:
+            raise
+        return [], chunk, []
+
+    written, rejected, failed = [], [], []
+    for (id_, document), item in zip(chunk, response["items"]):
+        result = next(iter(item.values()))
+        status = result.get("status", 500)
+        if _is_rejected(result):
+            rejected.append((id_, document))
+        # the copies to the new indices of migrations have no id, and are not
+        # counted
+        elif id_ is None:
+            continue
+        # a conflict means that a newer revision is already indexed
+        elif 200 <= status < 300 or status == 409:
+            written.append(result.get("_index"))
+        else:
+            failed.append((id_, result.get("error")))
+    return written, rejected, failed
+
+
+def _send_with_retries(client, chunk, chunk_size, max_retries, backoff):
+    """Send a chunk of documents, retrying the rejected ones with a backoff.
+
+    :returns: the index of each indexed document and the failed ids with their
+        errors.
+    """
+    written, failed = [], []
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        indices, rejected, errors = _send(client, chunk)
+        written.extend(indices)
+        failed.extend(errors)
+        if not rejected:
+            chunk_size.grow()
+            break
+        chunk_size.shrink()
+        chunk = rejected
+    else:
+        failed.extend((id_, "rejected") for id_, _ in rejected if id_ is not None)
+    return written, failed
+
+
+def dead_letter_queue():
+    """Get the queue of the records which failed to be indexed."""
+    name = current_app.config["RECORDS_RESOURCES_BULK_INDEX_DEAD_LETTER_QUEUE"]
+    return Queue(name, exchange=Exchange(name, type="direct"), routing_key=name)
+
+
+def dead_letter(indexer, record_ids):
+    """Park the ids of records which failed to be indexed.
+
+    The records are indexed again by the ``replay_dead_letter_index`` task.
+    """
+    queue = dead_letter_queue()
+    with current_celery_app.pool.acquire(block=True) as conn:
+        producer = Producer(
+            conn,
+            exchange=queue.exchange,
+            routing_key=queue.routing_key,
+            auto_declare=True,
+        )
+        producer.publish(
+            {"indexer": indexer.mq_routing_key, "ids": list(record_ids)},
+            declare=[queue],
+            serializer="json",
+        )
+
+
+def parallel_bulk_index(
+    indexer, record_ids, workers=None, max_chunk_bytes=None, batch_size=None, index=None
+):
+    """Index records directly, without going through the indexer queue.
+
+    The records are loaded from the database in batches, dumped, and sent in
+    bulk requests of at most ``max_chunk_bytes`` by ``workers`` threads. Meant
+    for offline workloads (migrations, batch jobs, tests) where no queue
+    consumer runs.
+
+    Documents rejected by an overloaded cluster are retried with an
+    exponential backoff, and the size of the requests is reduced meanwhile.
+    The ids of the records which still fail are sent to the dead-letter queue.
+
+    :param indexer: the record indexer.
+    :param record_ids: iterable of record ids.
+    :param index: index to write the documents to, instead of the indexer's.
+    :returns: a tuple of the number of indexed and failed records.
+    """
+    config = current_app.config
+    workers = workers or config["RECORDS_RESOURCES_BULK_INDEX_WORKERS"]
+    chunk_size = ChunkSize(
+        max_chunk_bytes or config["RECORDS_RESOURCES_BULK_INDEX_MAX_CHUNK_BYTES"]
+    )
+    batch_size = batch_size or config["RECORDS_RESOURCES_BULK_INDEX_BATCH_SIZE"]
+    max_retries = config["RECORDS_RESOURCES_BULK_INDEX_MAX_RETRIES"]
+    backoff = config["RECORDS_RESOURCES_BULK_INDEX_BACKOFF"]
+
+    # the workers run outside of the application context
+    client = indexer.client
+    if isinstance(client, LocalProxy):
+        client = client._get_current_object()
+    documents = _serialize_records(
+        indexer, record_ids, batch_size, client.transport.serializer, index=index
+    )
+
+    indexed, failed = 0, []
+
+    def _collect(futures):
+        nonlocal indexed
+        for future in futures:
+            written, errors = future.result()
+            indexed += len(written)
+            failed.extend(errors)
+            notify_writes(indexer, written)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in _chunks(documents, chunk_size):
+            # bound the number of dumped chunks waiting to be sent
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending.add(
+                executor.submit(
+                    _send_with_retries, client, chunk, chunk_size, max_retries, backoff
+                )
+            )
+        _collect(pending)
+
+    if failed:
+        current_app.logger.warning(
+            "Failed to index %s records, e.g.: %s", len(failed), failed[0]
+        )
+        dead_letter(indexer, [id_ for id_, _ in failed])
+    return indexed, len(failed)
+
+
+class IndexMigration:
+    """Reindex the records into a new index, without downtime.
+
+    The searches keep using the current index until the new one is complete,
+    e.g. to apply mapping changes:
+
+    1. :meth:`start` creates a new (suffixed) index, without replicas nor
+       refreshes to speed up the copy. The writes to the current index are
+       also copied to the new one from then on.
+    2. :meth:`copy` indexes the records into the new index in parallel, and
+       :meth:`delete` deletes the records deleted meanwhile.
+    3. :meth:`finish` restores the settings of the new index, and atomically
+       swaps the aliases of the current index to it.
+
+    The writes are only copied by the :class:`RecordIndexer` indexers.
+    """
+
+    def __init__(self, indexer, index):
+        """Constructor.
+
+        :param index: name of the index, e.g. ``record_cls.index._name``.
+        """
+        self.indexer = indexer
+        self.index = index
+        self.alias = build_alias_name(index)
+        self.new_index = None
+        self._settings = None
+
+    @property
+    def client(self):
+        """Search client."""
+        return self.indexer.client
+
+    def start(self):
+        """Create the new index, and copy the writes to it."""
+        (self.new_index, _), _ = current_search.create_index(
+            self.index, suffix=timestamp_suffix(), create_write_alias=False
+        )
+        response = self.client.indices.get_settings(index=self.new_index)
+        settings = response[self.new_index]["settings"]["index"]
+        # a missing setting is restored to its default value
+        self._settings = {
+            key: settings.get(key) for key in ("number_of_replicas", "refresh_interval")
+        }
+        self.client.indices.put_settings(
+            index=self.new_index,
+            body={"index": {"number_of_replicas": 0, "refresh_interval": "-1"}},
+        )
+        self.client.indices.put_alias(
+            index=self.new_index, name=migration_alias(self.alias)
+        )
+        # wait for all the writers to notice the migration
+        time.sleep(_migration_indices.ttl)
+
+    def copy(self, record_ids):
+        """Index records into the new index.
+
+        :returns: a tuple of the number of indexed and failed records.
+        """
+        return parallel_bulk_index(self.indexer, record_ids, index=self.new_index)
+
+    def delete(self, record_ids, batch_size=1000):
+        """Delete records from the new index, e.g. deleted during the copy."""
+        # the documents are only found by the search once refreshed
+        self.client.indices.refresh(index=self.new_index)
+        for ids in _batched((str(id_) for id_ in record_ids), batch_size):
+            self.client.delete_by_query(
+                index=self.new_index,
+                body={"query": {"ids": {"values": ids}}},
+                conflicts="proceed",
+            )
+
+    def finish(self, delete_old_index=False):
+        """Restore the settings of the new index, and swap the aliases to it.
+
+        :param delete_old_index: delete the previous index after the swap.
+        """
+        self.client.indices.put_settings(
+            index=self.new_index, body={"index": self._settings}
+        )
+        self.client.indices.refresh(index=self.new_index)
+
+        try:
+            old_indices = self.client.indices.get_alias(index=self.alias)
+        except search.exceptions.NotFoundError:
+            old_indices = {}
+        aliases = {self.alias: {}}
+        if not old_indices:
+            search_alias = build_alias_name(self.indexer.record_cls.index.search_alias)
+            aliases[search_alias] = {}
+
+        actions = [
+            {"remove": {"index": self.new_index, "alias": migration_alias(self.alias)}}
+        ]
+        for old_index, data in old_indices.items():
+            for alias, properties in data["aliases"].items():
+                actions.append({"remove": {"index": old_index, "alias": alias}})
+                aliases[alias] = properties
+        actions.extend(
+            {"add": {"index": self.new_index, "alias": alias, **properties}}
+            for alias, properties in aliases.items()
+        )
+        self.client.indices.update_aliases(body={"actions": actions})
+        _migration_indices.delete(self.alias)
+
+        if delete_old_index and old_indices:
+            self.client.indices.delete(index=",".join(old_indices))
+
+    def abort(self):
+        """Delete the new index, and stop copying the writes to it."""
+        if self.new_index:
+            try:
+                self.client.indices.delete(index=self.new_index)
+            except search.exceptions.NotFoundError:
+                pass
+        _migration_indices.delete(self.alias)
+
+
+def _consumer_keys(queue):
+    """Cache keys of the running consumers of a queue, one per consumer."""
+    max_consumers = current_app.config["INDEXER_MAX_BULK_CONSUMERS"]
+    return [
+        f"invenio-records-resources:indexer-consumers:{queue}:{i}"
+        for i in range(max_consumers)
+    ]
+
+
+class QueueConsumer:
+    """Registration of a running consumer of an indexer queue in the cache.
+
+    A consumer takes one of the ``INDEXER_MAX_BULK_CONSUMERS`` keys of its
+    queue, which expires after ``RECORDS_RESOURCES_INDEXER_CONSUMER_TTL``
+    seconds unless renewed. A killed consumer is thus only counted until its
+    key expires. The consumers beyond the maximum are not counted.
+    """
+
+    def __init__(self, queue):
+        """Constructor."""
+        self.queue = queue
+        self.id = uuid4().hex
+        self.key = None
+
+    def register(self):
+        """Take a key of the queue, or renew the one taken."""
+        timeout = current_app.config["RECORDS_RESOURCES_INDEXER_CONSUMER_TTL"]
+        if self.key is not None:
+            if current_cache.get(self.key) == self.id:
+                current_cache.set(self.key, self.id, timeout=timeout)
+                return
+            # expired, and possibly taken by another consumer meanwhile
+            self.key = None
+        for key in _consumer_keys(self.queue):
+            if current_cache.add(key, self.id, timeout=timeout):
+                self.key = key
+                return
+
+    def unregister(self):
+        """Release the key of the queue."""
+        if self.key is not None and current_cache.get(self.key) == self.id:
+            current_cache.delete(self.key)
+        self.key = None
+
+
+def running_consumers(queue):
+    """Get the number of running consumers of an indexer queue.
+
+    The consumers drain the queues with ``basic_get``, and are thus not
+    counted by the broker: they are registered in the cache by
+    :meth:`RecordIndexer.process_bulk_queue` (see :class:`QueueConsumer`).
+    """
+    keys = _consumer_keys(queue)
+    return sum(1 for value in current_cache.get_many(*keys) if value is not None)
+
+
+class QueueAutoscaler:
+    """Number of consumers of the indexer queues, adapted to their backlog.
+
+    The consumers needed for a queue are derived from its backlog, and from
+    its drain rate observed between two runs: enough consumers are spawned to
+    drain the backlog within a target time. No consumer is spawned while the
+    search cluster rejects writes or responds slowly, so that the number of
+    consumers decreases as the running ones terminate.
+
+    The observations are kept in the cache, shared by the workers, and the
+    last metrics of each queue are available in ``metrics``.
+    """
+
+    cache_prefix = "invenio-records-resources:indexer-autoscaler"
+
+    def __init__(self):
+        """Constructor."""
+        self.metrics = {}
+
+    def cluster_overloaded(self, client, max_latency):
+        """Check if the cluster rejected writes or is slow since the last check.
+
+        Other errors, e.g. a missing monitor privilege, do not stop indexing:
+        the cluster is then assumed not to be overloaded.
+        """
+        start = time.monotonic()
+        try:
+            stats = client.cat.thread_pool(
+                thread_pool_patterns="write", params={"format": "json", "h": "rejected"}
+            )
+        except search.exceptions.ConnectionTimeout:
+            return True
+        except search.exceptions.TransportError as e:
+            if e.status_code == 429:
+                return True
+            current_app.logger.warning(
+                "Failed to get the write rejections of the search cluster: %s", e
+            )
+            return False
+        latency = time.monotonic() - start
+
+        rejected = sum(int(s.get("rejected") or 0) for s in stats)
+        key = f"{self.cache_prefix}:rejected"
+        previous = current_cache.get(key)
+        current_cache.set(key, rejected, timeout=0)
+        return latency > max_latency or (previous is not None and rejected > previous)
+
+    def consumers(self, queue, num_messages, num_consumers, config):
+        """Get the number of consumers to spawn for a queue."""
+        now = time.time()
+        key = f"{self.cache_prefix}:observations:{queue}"
+        previous = current_cache.get(key)
+        current_cache.set(key, (now, num_messages), timeout=0)
+
+        # net number of messages consumed per second since the last run
+        rate = None
+        if previous and now > previous[0]:
+            rate = (previous[1] - num_messages) / (now - previous[0])
+        self.metrics[queue] = {
+            "backlog": num_messages,
+            "consumers": num_consumers,
+            "drain_rate": rate,
+        }
+        current_app.logger.info(
+            "Indexer queue %s: backlog=%s consumers=%s drain_rate=%s",
+            queue,
+            num_messages,
+            num_consumers,
+            rate,
+        )
+        if num_messages == 0:
+            return 0
+
+        target_time = config["RECORDS_RESOURCES_INDEXER_TARGET_DRAIN_TIME"]
+        if rate and rate > 0 and num_consumers:
+            consumer_rate = rate / num_consumers
+            needed = ceil(num_messages / (consumer_rate * target_time))
+        else:
+            items = config["RECORDS_RESOURCES_INDEXER_ITEMS_PER_CONSUMER"]
+            needed = ceil(num_messages / items)
+
+        needed = min(needed, config["INDEXER_MAX_BULK_CONSUMERS"])
+        return max(needed - num_consumers, 0)
+
+
+queue_autoscaler = QueueAutoscaler()
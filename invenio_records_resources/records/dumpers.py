@@ -3,6 +3,8 @@
 
 """Records dumpers and extensions."""
 
+import hashlib
+import json
 from copy import deepcopy
 
 from flask import current_app
@@ -37,6 +39,68 @@ class CustomFieldsDumperExt(SearchDumperExt):
             cf.load(data, cf_key=self.key)
 
 
+class ContentHashDumperExt(SearchDumperExt):
+    """Content hash dumper extension.
+
+    Stores a hash of the dumped document, so that the index write of a record
+    whose document did not change can be skipped (see
+    :func:`invenio_records_resources.indexer.filter_unchanged`). The field
+    must be mapped, e.g. as a non-indexed ``keyword``, and the extension be
+    the last one of the dumper.
+
+    The system fields changed by any commit of a record, and the version of
+    the dereferenced related records (``@v``), are not hashed by default. A
+    save without changes, or the propagation of a related record whose
+    dereferenced fields did not change, is then skipped, and the indexed
+    document keeps their previous values.
+    """
+
+    def __init__(
+        self,
+        key="content_hash",
+        exclude=("indexed_at", "uuid", "version_id", "updated"),
+        exclude_nested=("@v",),
+    ):
+        """Initialize the dumper.
+
+        :param key: The dictionary key where the hash is set.
+        :param exclude: The keys of the document which are not hashed.
+        :param exclude_nested: The keys of the nested objects of the document
+            which are not hashed.
+        """
+        self.key = key
+        self.exclude = set(exclude)
+        self.exclude_nested = set(exclude_nested)
+
+    def _content(self, value):
+        """Get the hashed content of a value of the document."""
+        if isinstance(value, dict):
+            return {
+                k: self._content(v)
+                for k, v in value.items()
+                if k not in self.exclude_nested
+            }
+        if isinstance(value, list):
+            return [self._content(v) for v in value]
+        return value
+
+    def update(self, data):
+        """Compute the hash of a document."""
+        content = self._content(
+            {k: v for k, v in data.items() if k != self.key and k not in self.exclude}
+        )
+        content = json.dumps(content, sort_keys=True, default=str)
+        data[self.key] = hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def dump(self, record, data):
+        """Dump the content hash."""
+        self.update(data)
+
+    def load(self, data, record_cls):
+        """Load (remove) the content hash."""
+        data.pop(self.key, None)
+
+
 class PartialFileDumper(Dumper):
     """File in record dumper."""
 
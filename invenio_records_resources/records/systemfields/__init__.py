@@ -8,7 +8,14 @@ from .files import FilesField
 from .index import IndexField
 from .pid import ModelPIDField, PIDField
 from .pid_statuscheck import PIDStatusCheckField
-from .relations import PIDListRelation, PIDNestedListRelation, PIDRelation
+from .relations import (
+    PIDListRelation,
+    PIDNestedListRelation,
+    PIDRelation,
+    dereference_relations,
+    prefetch_relations,
+    relations_cache,
+)
 
 __all__ = (
     "FilesField",
@@ -19,4 +26,7 @@ __all__ = (
     "PIDRelation",
     "PIDListRelation",
     "PIDNestedListRelation",
+    "dereference_relations",
+    "prefetch_relations",
+    "relations_cache",
 )
@@ -31,8 +31,8 @@ key in the record:
 """
 
 from invenio_db import db
-from invenio_pidstore.errors import PIDDoesNotExistError
-from invenio_pidstore.models import PersistentIdentifier
+from invenio_pidstore.errors import PersistentIdentifierError, PIDDoesNotExistError
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_pidstore.resolver import Resolver
 from invenio_records.systemfields import (
     ModelField,
@@ -40,6 +40,7 @@ from invenio_records.systemfields import (
     RelatedModelFieldContext,
 )
 from sqlalchemy import inspect
+from sqlalchemy.orm.exc import NoResultFound
 
 from ..api import PersistentIdentifierWrapper
 from ..providers import ModelPIDProvider
@@ -82,6 +83,61 @@ class PIDFieldContext(RelatedModelFieldContext):
 
         return record
 
+    def resolve_many(self, pid_values, registered_only=True, with_deleted=False):
+        """Resolve many identifiers with a constant number of queries.
+
+        Identifiers which cannot be resolved are left out of the result, as
+        well as the redirected identifiers, for which ``resolve`` raises
+        ``PIDRedirectedError``.
+
+        :returns: a dict mapping the PID values to their records.
+        """
+        pid_values = set(pid_values)
+        if not pid_values:
+            return {}
+        if self.field._resolver_cls is not Resolver:
+            # Custom resolvers can only resolve one identifier at a time.
+            return self._resolve_each(pid_values, registered_only, with_deleted)
+
+        statuses = [PIDStatus.REGISTERED]
+        if not registered_only:
+            statuses += [PIDStatus.NEW, PIDStatus.RESERVED]
+        with db.session.no_autoflush:
+            pids = PersistentIdentifier.query.filter(
+                PersistentIdentifier.pid_type == self.field._pid_type,
+                PersistentIdentifier.pid_value.in_(pid_values),
+                PersistentIdentifier.object_type == self.field._object_type,
+                PersistentIdentifier.status.in_(statuses),
+                PersistentIdentifier.object_uuid.isnot(None),
+            ).all()
+        if not pids:
+            return {}
+        pids = {pid.object_uuid: pid for pid in pids}
+
+        resolved = {}
+        # The getter of the single resolve never returns deleted models.
+        for record in self.record_cls.get_records(list(pids)):
+            if not with_deleted and record.is_deleted:
+                continue
+            pid = pids[record.id]
+            self.field._set_cache(record, pid)
+            resolved[pid.pid_value] = record
+        return resolved
+
+    def _resolve_each(self, pid_values, registered_only, with_deleted):
+        """Resolve identifiers one by one, skipping the unresolvable ones."""
+        resolved = {}
+        for pid_value in pid_values:
+            try:
+                resolved[pid_value] = self.resolve(
+                    pid_value,
+                    registered_only=registered_only,
+                    with_deleted=with_deleted,
+                )
+            except (PersistentIdentifierError, NoResultFound):
+                continue
+        return resolved
+
 
 class PIDField(RelatedModelField):
     """Persistent identifier system field."""
@@ -221,6 +277,31 @@ class ModelPIDFieldContext(PIDFieldContext):
 
         return record
 
+    def resolve_many(self, pid_values, registered_only=True, with_deleted=False):
+        """Resolve many identifiers with a single query.
+
+        Identifiers which cannot be resolved are left out of the result.
+
+        :returns: a dict mapping the PID values to their records.
+        """
+        pid_values = set(pid_values)
+        if not pid_values:
+            return {}
+
+        model_cls = self.record_cls.model_cls
+        column = getattr(model_cls, self.field.model_field_name)
+        with db.session.no_autoflush:
+            query = model_cls.query.filter(column.in_(pid_values))
+            if not with_deleted:
+                query = query.filter(model_cls.is_deleted != True)  # noqa
+            records = [self.record_cls(obj.data, model=obj) for obj in query.all()]
+
+        resolved = {}
+        for record in records:
+            self.field._set_cache(record, record.pid)
+            resolved[record.pid.pid_value] = record
+        return resolved
+
     def create(self, record):
         """Method to create a new persistent identifier for the record."""
         # pop from metadata
@@ -1,9 +1,12 @@
-# SPDX-FileCopyrightText: 2020-2021 CERN.
+# SPDX-FileCopyrightText: 2020-2026 CERN.
 # SPDX-FileCopyrightText: 2020 Northwestern University.
 # SPDX-License-Identifier: MIT
 
 """Relations system field."""
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 from invenio_records.systemfields.relations import (
@@ -11,35 +14,236 @@ from invenio_records.systemfields.relations import (
     ListRelation,
     NestedListRelation,
     RelationBase,
+    RelationListResult,
+    RelationNestedListResult,
+    RelationResult,
 )
 
+from ...cache import TTLCache
+
+_relations_cache = ContextVar("relations_cache", default=None)
+
+
+@contextmanager
+def relations_cache(maxsize=10000):
+    """Share the resolved relations between all the relations of all records.
+
+    Within the block, a related record is resolved only once, whichever the
+    record and relation referencing it (e.g. during a request, or while
+    dumping a batch of records). Nested blocks use the outermost cache.
+
+    .. code-block:: python
+
+        with relations_cache():
+            for record in records:
+                record.relations.dereference()
+    """
+    cache = _relations_cache.get()
+    if cache is not None:
+        yield cache
+        return
+
+    token = _relations_cache.set(TTLCache(maxsize=maxsize))
+    try:
+        yield _relations_cache.get()
+    finally:
+        _relations_cache.reset(token)
+
+
+def _lookup_ids(result, dereferenced=False):
+    """Get the ids of a relation of a record.
+
+    :param dereferenced: include the ids of the dereferenced values.
+    """
+    try:
+        values = result._lookup_data()
+    except KeyError:
+        return []
+    if not values:
+        return []
+
+    # values of an unexpected type are left to the validation
+    if isinstance(result, RelationListResult):
+        if not isinstance(values, list):
+            return []
+        if isinstance(result, RelationNestedListResult):
+            if not all(isinstance(v, list) for v in values):
+                return []
+            values = [v for inner_values in values for v in inner_values]
+    else:
+        values = [values]
+
+    suffix = result.field._value_key_suffix
+    return [
+        v[suffix]
+        for v in values
+        if isinstance(v, dict) and suffix in v and (dereferenced or "@v" not in v)
+    ]
+
+
+def _get_results(records, fields=None):
+    """Get the relation results of many records."""
+    results = []
+    for record in records:
+        if not hasattr(record, "relations"):
+            continue
+        for name in fields or record.relations:
+            results.append(getattr(record.relations, name))
+    return results
+
+
+def _resolve_results(results, dereferenced=False):
+    """Resolve the ids of PID relation results, once per PID field."""
+    # relations on the same PID field are resolved together, and then
+    # served from the shared cache
+    by_pid_field = {}
+    for result in results:
+        if isinstance(result.field, PIDRelation):
+            relation, ids = by_pid_field.setdefault(
+                id(result.field.pid_field), (result.field, set())
+            )
+            ids.update(_lookup_ids(result, dereferenced=dereferenced))
+    for relation, ids in by_pid_field.values():
+        if ids:
+            relation.resolve_many(ids)
+
+
+def prefetch_relations(records, fields=None):
+    """Resolve the PID relations of many records, e.g. before validating them.
+
+    The ids are resolved with one query per PID field, into the cache of the
+    enclosing ``relations_cache()`` block.
+    """
+    _resolve_results(_get_results(records, fields=fields), dereferenced=True)
+
+
+def dereference_relations(records, fields=None):
+    """Dereference the relations of many records.
+
+    The ids of all the PID relations of the records are resolved beforehand,
+    with one query per PID field (see ``PIDRelation.resolve_many``).
+    """
+    with relations_cache():
+        results = _get_results(records, fields=fields)
+        _resolve_results(results)
+        for result in results:
+            result.dereference()
+
+
+class PIDRelationResultMixin:
+    """Validation of all the ids of a relation at once."""
+
+    def validate(self):
+        """Validate the field."""
+        # the ids of the inner lists of nested lists are flattened
+        ids = _lookup_ids(self, dereferenced=True)
+        if ids and not self.value_check and self.field._exists_all(ids):
+            return None
+        # report the invalid value, or check the values
+        return super().validate()
+
+
+class PIDRelationResult(PIDRelationResultMixin, RelationResult):
+    """PID relation access result."""
+
+
+class PIDRelationListResult(PIDRelationResultMixin, RelationListResult):
+    """PID list relation access result."""
+
+
+class PIDRelationNestedListResult(PIDRelationResultMixin, RelationNestedListResult):
+    """PID nested list relation access result."""
+
 
 class PIDRelation(RelationBase):
     """PID relation type."""
 
+    result_cls = PIDRelationResult
+
     def __init__(self, *args, pid_field=None, **kwargs):
         """Initialize the PK relation."""
         self.pid_field = pid_field
         super().__init__(*args, **kwargs)
 
+    def _add_to_cache(self, id_, obj):
+        """Add a resolved record to the relation and shared caches."""
+        # We detach the related record model from the database session when
+        # we add it in the cache. Otherwise, accessing the cached record
+        # model, will execute a new select query after a db.session.commit.
+        db.session.expunge(obj.model)
+        self.cache[id_] = obj
+        shared_cache = _relations_cache.get()
+        if shared_cache is not None:
+            shared_cache.set((id(self.pid_field), id_), obj)
+
+    def _get_from_cache(self, id_):
+        """Get a resolved record from the relation or shared caches."""
+        if id_ in self.cache:
+            return self.cache[id_]
+        shared_cache = _relations_cache.get()
+        if shared_cache is not None:
+            obj = shared_cache.get((id(self.pid_field), id_))
+            if obj is not None:
+                self.cache[id_] = obj
+            return obj
+        return None
+
     def resolve(self, id_):
         """Resolve the value using the record class."""
-        if id_ in self.cache:
-            obj = self.cache[id_]
+        obj = self._get_from_cache(id_)
+        if obj is not None:
             return obj
 
         try:
             obj = self.pid_field.resolve(id_)
-            # We detach the related record model from the database session when
-            # we add it in the cache. Otherwise, accessing the cached record
-            # model, will execute a new select query after a db.session.commit.
-            db.session.expunge(obj.model)
-            self.cache[id_] = obj
+            self._add_to_cache(id_, obj)
             return obj
             # TODO: there's many ways PID resolution can fail...
         except Exception:
             return None
 
+    def resolve_many(self, ids):
+        """Resolve many values, with one query if the PID field supports it.
+
+        :returns: a dict mapping the resolved ids to their records.
+        """
+        resolved, missing = {}, set()
+        for id_ in ids:
+            obj = self._get_from_cache(id_)
+            if obj is not None:
+                resolved[id_] = obj
+            else:
+                missing.add(id_)
+
+        if not missing:
+            return resolved
+
+        try:
+            objs = self.pid_field.resolve_many(missing)
+        except Exception:
+            # e.g. PID fields with a custom context, resolved one by one
+            objs = None
+
+        if objs is None:
+            for id_ in missing:
+                obj = self.resolve(id_)
+                if obj is not None:
+                    resolved[id_] = obj
+        else:
+            for id_, obj in objs.items():
+                self._add_to_cache(id_, obj)
+            resolved.update(objs)
+        return resolved
+
+    def exists_many(self, ids):
+        """Check if all the ids exist, with one query if supported."""
+        return self._exists_all(ids)
+
+    def _exists_all(self, ids):
+        """Check if all the ids of a flat list exist."""
+        ids = set(ids)
+        return len(self.resolve_many(ids)) == len(ids)
+
     def parse_value(self, value):
         """Parse a record (or ID) to the ID to be stored."""
         if isinstance(value, str):
@@ -55,19 +259,18 @@ class PIDRelation(RelationBase):
                 f'"{self.pid_field.record_cls}"'
             )
 
-    # TODO: We could have a more efficient "exists" via PK queries
-    # def exists(self, id_):
-    #     """Check if an ID exists using the record class."""
-    #     return bool(self.record_cls.model_cls.query.filter_by(id=id_))
-    #
-    # def exists_many(self, ids):
-    #     """."""
-    #     self.record_cls.get_record(id_)
-
 
 class PIDListRelation(ListRelation, PIDRelation):
     """PID list relation type."""
 
+    result_cls = PIDRelationListResult
+
 
 class PIDNestedListRelation(NestedListRelation, PIDRelation):
     """PID nested list relation type."""
+
+    result_cls = PIDRelationNestedListResult
+
+    def exists_many(self, ids):
+        """Check if all the ids of the inner lists exist."""
+        return self._exists_all([id_ for inner_ids in ids for id_ in inner_ids])
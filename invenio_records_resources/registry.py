@@ -32,6 +32,10 @@ class ServiceRegistry:
                 return service_id
         raise KeyError("Service not found in registry.")
 
+    def all(self):
+        """Get all the registered services."""
+        return self._services
+
 
 class NotificationRegistry:
     """Notifications registry."""
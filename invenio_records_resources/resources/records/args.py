@@ -16,6 +16,7 @@ class SearchRequestArgsSchema(MultiDictSchema):
     sort = fields.String()
     page = fields.Int(validate=validate.Range(min=1))
     size = fields.Int(validate=validate.Range(min=1))
+    facets_mode = fields.String(validate=validate.OneOf(["all", "none", "only"]))
 
     max_page_size = None  # to be set in context by sub-classes
 
@@ -15,6 +15,7 @@ from .base import (
 )
 from .files import FileEndpointLink, FileLink, FileService, FileServiceConfig
 from .records import (
+    FieldRouting,
     RecordEndpointLink,
     RecordIndexerMixin,
     RecordLink,
@@ -30,6 +31,7 @@ __all__ = (
     "ConditionalLink",
     "EndpointLink",
     "ExternalLink",
+    "FieldRouting",
     "FileEndpointLink",
     "FileLink",
     "FileService",
@@ -11,10 +11,12 @@ from .links import (
     pagination_endpoint_links,
     pagination_links,
 )
+from .routing import FieldRouting
 from .schema import ServiceSchemaWrapper
 from .service import RecordIndexerMixin, RecordService
 
 __all__ = (
+    "FieldRouting",
     "pagination_endpoint_links",
     "pagination_links",
     "RecordEndpointLink",
@@ -6,6 +6,7 @@
 
 """Records service component base classes."""
 
+from ....records.systemfields.relations import dereference_relations
 from ...uow import ChangeNotificationOp
 from .base import ServiceComponent
 
@@ -15,7 +16,7 @@ class RelationsComponent(ServiceComponent):
 
     def read(self, identity, record=None, **kwargs):
         """Read record handler."""
-        record.relations.dereference()
+        dereference_relations([record])
 
 
 class ChangeNotificationsComponent(ServiceComponent):
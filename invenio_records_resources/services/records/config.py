@@ -6,10 +6,10 @@
 """Record Service API."""
 
 from invenio_i18n import lazy_gettext as _
-from invenio_indexer.api import RecordIndexer
 from invenio_records_permissions.policies.records import RecordPermissionPolicy
 from invenio_search import RecordsSearchV2
 
+from ...indexer import RecordIndexer
 from ...records import Record
 from ..base import ServiceConfig
 from .components import MetadataComponent
@@ -40,7 +40,15 @@ class SearchOptions:
         ),
     }
     facets = {}
+    # e.g. {"type": "sampler", "shard_size": 1000} to aggregate facets on a sample
+    facets_sampler = None
+    # e.g. FacetsCache(ttl=300) to cache the facets of the no query listing
+    facets_cache = None
     pagination_options = {"default_results_per_page": 25, "default_max_results": 10000}
+    # e.g. ["id", "metadata.title"] to fetch only the fields rendered by the
+    # search results instead of the full documents (only search() is affected,
+    # and the expandable fields are always fetched)
+    list_projection = None
     params_interpreters_cls = [QueryStrParam, PaginationParam, SortParam, FacetsParam]
 
 
@@ -59,9 +67,20 @@ class RecordServiceConfig(ServiceConfig):
     record_cls = Record
     indexer_cls = RecordIndexer
     indexer_queue_name = service_id
+    # queue of the reindexing and relations propagation, e.g. "records-bulk",
+    # to not delay the indexer queue (the indexer must also be registered)
+    indexer_bulk_queue_name = None
     index_dumper = None  # use default dumper defined on record class
+    # e.g. FieldRouting("parent.communities.default") to store the records of
+    # a community in the same shard, and route the searches scoped by it
+    index_routing = None
     # inverse relation mapping, stores which fields relate to which record type
     relations = {}
+    # "reindex" the records referencing an updated record, or only update
+    # their dereferenced relations in the index ("partial")
+    relations_propagation = "reindex"
+    # e.g. TTLCache(maxsize=10000, ttl=60) to cache the expanded records
+    expand_cache = None
 
     # Search configuration
     search = SearchOptions
@@ -4,9 +4,11 @@
 
 """Facets."""
 
+from .cache import FacetsCache
 from .facets import (
     CFTermsFacet,
     CombinedTermsFacet,
+    CompositeTermsFacet,
     DateFacet,
     Facet,
     NestedTermsFacet,
@@ -18,10 +20,12 @@ from .response import FacetsResponse
 __all__ = (
     "CFTermsFacet",
     "Facet",
+    "FacetsCache",
     "FacetsResponse",
     "NestedTermsFacet",
     "RecordRelationLabels",
     "CombinedTermsFacet",
+    "CompositeTermsFacet",
     "TermsFacet",
     "DateFacet",
 )
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Cache of the facets of the base query."""
+
+import hashlib
+import json
+import threading
+
+from ....cache import TTLCache
+from ....signals import index_written
+
+
+class FacetsCache:
+    """Cache of the aggregations of the base (no query, no filter) search.
+
+    The listing without a query nor selected facet values computes the same
+    facet counts on every request. With a facets cache configured on the
+    search options, the aggregations of such a search are computed once and
+    then served from the cache, and the search skips its aggregations:
+
+    .. code-block:: python
+
+        class SearchOptions:
+            facets_cache = FacetsCache(ttl=300, max_writes=100)
+
+    The cache key is the final query of the search, which includes the
+    permission filter of the identity (i.e. its needs) and any extra filter of
+    the service. The counts are refreshed every ``ttl`` seconds, and after
+    ``max_writes`` documents were indexed or deleted by the current process in
+    the indices of the cached searches (see
+    :data:`invenio_records_resources.signals.index_written`). The writes made
+    by other processes (e.g. the indexer queue consumers) are only picked up
+    through the ``ttl``.
+    """
+
+    def __init__(self, ttl=300, max_writes=None, maxsize=128):
+        """Constructor.
+
+        :param ttl: seconds after which the counts are recomputed.
+        :param max_writes: number of indexed or deleted documents after which
+            the counts are recomputed, never if ``None``.
+        :param maxsize: maximum number of cached base queries.
+        """
+        self.max_writes = max_writes
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._indices = set()
+        self._writes = 0
+        self._lock = threading.Lock()
+        if max_writes:
+            index_written.connect(self._on_index_written, weak=False)
+
+    def __deepcopy__(self, memo):
+        """Share the cache instead of copying it."""
+        return self
+
+    def make_key(self, search):
+        """Create the cache key of a search."""
+        indices = sorted(search._index or [])
+        with self._lock:
+            self._indices.update(indices)
+        data = json.dumps(
+            [indices, search.to_dict().get("query")], sort_keys=True, default=str
+        )
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Get the raw aggregations of a search."""
+        return self._cache.get(key)
+
+    def set(self, key, aggregations):
+        """Set the raw aggregations of a search."""
+        self._cache.set(key, aggregations)
+
+    def clear(self):
+        """Remove all the cached aggregations."""
+        with self._lock:
+            self._writes = 0
+        self._cache.clear()
+
+    def record_writes(self, count=1):
+        """Count index writes, clearing the cache after ``max_writes``."""
+        if not self.max_writes:
+            return
+        with self._lock:
+            self._writes += count
+            expired = self._writes >= self.max_writes
+        if expired:
+            self.clear()
+
+    def _on_index_written(self, sender, index=None, count=1, **kwargs):
+        """Count the documents written to the indices of the cached searches."""
+        with self._lock:
+            indices = tuple(self._indices)
+        if index and any(index.startswith(name) for name in indices):
+            self.record_writes(count)
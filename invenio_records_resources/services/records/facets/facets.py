@@ -20,14 +20,22 @@ class Facet(dsl.Facet):
 
     ``post_filter`` can be set as a class attribute, passed to the constructor,
     or set on an instance after construction.
+
+    ``sampler`` aggregates the facet on a sample of the matching documents
+    (e.g. ``{"type": "sampler", "shard_size": 1000}``), instead of the sampler
+    shared by the facets of the search options (``facets_sampler``). Setting it
+    to ``False`` always aggregates the facet on all the matching documents.
     """
 
     post_filter = True
+    sampler = None
 
-    def __init__(self, post_filter=None, **kwargs):
+    def __init__(self, post_filter=None, sampler=None, **kwargs):
         """Constructor."""
         if post_filter is not None:
             self.post_filter = post_filter
+        if sampler is not None:
+            self.sampler = sampler
         super().__init__(**kwargs)
 
     def prepare_aggregation(self, filter_values):
@@ -58,8 +66,22 @@ class LabelledFacetMixin:
         else:
             return {k: value_labels.get(k, k) for k in keys}
 
+    def get_is_filtered(self, filter_values):
+        """Get a function checking if a key is selected by the filter values.
+
+        The filter values are prepared once per facet, instead of once per
+        bucket. Subclasses overriding ``is_filtered`` are checked per bucket.
+        """
+        if type(self).is_filtered is not dsl.Facet.is_filtered:
+            return lambda key: self.is_filtered(key, filter_values)
+        try:
+            return set(filter_values).__contains__
+        except TypeError:  # unhashable filter values
+            return filter_values.__contains__
+
     def get_values(self, data, filter_values):
         """Get an unlabelled version of the bucket."""
+        is_filtered = self.get_is_filtered(filter_values)
         out = []
         for bucket in data.buckets:
             key = self.get_value(bucket)
@@ -67,7 +89,7 @@ class LabelledFacetMixin:
                 {
                     "key": key,
                     "doc_count": self.get_metric(bucket),
-                    "is_selected": self.is_filtered(key, filter_values),
+                    "is_selected": is_filtered(key),
                 }
             )
 
@@ -75,6 +97,7 @@ class LabelledFacetMixin:
 
     def get_labelled_values(self, data, filter_values):
         """Get a labelled version of a bucket."""
+        is_filtered = self.get_is_filtered(filter_values)
         out = []
         # We get the labels first, so that we can efficiently query a resource
         # for all keys in one go, vs querying one by one if needed.
@@ -86,7 +109,7 @@ class LabelledFacetMixin:
                     "key": key,
                     "doc_count": self.get_metric(bucket),
                     "label": label_map[key],
-                    "is_selected": self.is_filtered(key, filter_values),
+                    "is_selected": is_filtered(key),
                 }
             )
         return {"buckets": out, "label": str(self._label)}
@@ -115,6 +138,107 @@ class TermsFacet(LabelledFacetMixin, Facet, dsl.TermsFacet):
     # that we overwrite the Facet.get_values() method in the Facet base class.
 
 
+class CompositeTermsFacet(TermsFacet):
+    """Terms facet paging through all values of a high-cardinality field.
+
+    Unlike ``TermsFacet``, which only returns the top buckets of a ``terms``
+    aggregation, this facet uses a ``composite`` aggregation returning the
+    buckets ordered by key, one page of ``size`` buckets at a time.
+
+    .. code-block:: python
+
+        facets = {
+            'keywords': CompositeTermsFacet(
+                field='metadata.keywords',
+                label=_('Keywords'),
+                size=50,
+            )
+        }
+
+    The labelled values include the ``after_key`` of the page. Passing it back
+    as ``keywords.after`` returns the next page, and ``keywords.prefix``
+    restricts the buckets to the values starting with a prefix, e.g.
+    ``?keywords.prefix=phys&keywords.after=physics``.
+    """
+
+    prefix_script = (
+        "def values = []; "
+        "for (value in doc[params.field]) "
+        "{ if (value.startsWith(params.prefix)) { values.add(value); } } "
+        "return values;"
+    )
+    """Values of a document starting with the prefix."""
+
+    def __init__(self, field=None, size=100, **kwargs):
+        """Constructor."""
+        self._size = size
+        self._after = None
+        self._prefix = None
+        super().__init__(field=field, **kwargs)
+
+    def set_cursor(self, after=None, prefix=None):
+        """Set the page to aggregate."""
+        self._after = after
+        self._prefix = prefix
+
+    def get_aggregation(self):
+        """Get the composite aggregation, filtered on the prefix if any."""
+        field = self._params["field"]
+        source = {"field": field}
+        if self._prefix:
+            # the other values of the multi-valued fields of the matching
+            # documents are left out of the source, so that pages are full
+            source = {
+                "script": {
+                    "source": self.prefix_script,
+                    "params": {"field": field, "prefix": self._prefix},
+                }
+            }
+        params = {
+            "size": self._size,
+            "sources": [{"key": {"terms": source}}],
+        }
+        if self._after is not None:
+            params["after"] = {"key": self._after}
+        agg = dsl.A("composite", **params)
+
+        if self._prefix:
+            return dsl.A(
+                "filter",
+                filter=dsl.Q("prefix", **{field: self._prefix}),
+                aggs={"inner": agg},
+            )
+        return agg
+
+    def get_value(self, bucket):
+        """Get key value for a bucket."""
+        return bucket.key.key
+
+    def _get_buckets(self, data):
+        """Get the composite aggregation data and its buckets."""
+        if self._prefix:
+            data = data.inner
+        buckets = data.buckets
+        after_key = data.after_key.key if "after_key" in data else None
+        return buckets, after_key
+
+    def get_values(self, data, filter_values):
+        """Get an unlabelled version of the bucket."""
+        buckets, after_key = self._get_buckets(data)
+        values = super().get_values(dsl.AttrDict({"buckets": buckets}), filter_values)
+        values["after_key"] = after_key
+        return values
+
+    def get_labelled_values(self, data, filter_values):
+        """Get a labelled version of a bucket."""
+        buckets, after_key = self._get_buckets(data)
+        values = super().get_labelled_values(
+            dsl.AttrDict({"buckets": buckets}), filter_values
+        )
+        values["after_key"] = after_key
+        return values
+
+
 class NestedTermsFacet(TermsFacet):
     """A hierarchical terms facet.
 
@@ -212,8 +336,10 @@ class NestedTermsFacet(TermsFacet):
 
         return f
 
-    def get_values(self, data, filter_values, key_prefix=None):
+    def get_values(self, data, filter_values, key_prefix=None, is_filtered=None):
         """Get an unlabelled version of the bucket."""
+        if is_filtered is None:
+            is_filtered = self.get_is_filtered(filter_values)
         out = []
         for bucket in data.buckets:
             key = full_key = self.get_value(bucket)
@@ -222,19 +348,29 @@ class NestedTermsFacet(TermsFacet):
             bucket_out = {
                 "key": key,
                 "doc_count": self.get_metric(bucket),
-                "is_selected": self.is_filtered(full_key, filter_values),
+                "is_selected": is_filtered(full_key),
             }
             if "inner" in bucket:
                 bucket_out["inner"] = self.get_values(
-                    bucket.inner, filter_values, key_prefix=full_key
+                    bucket.inner,
+                    filter_values,
+                    key_prefix=full_key,
+                    is_filtered=is_filtered,
                 )
             out.append(bucket_out)
         return {"buckets": out}
 
     def get_labelled_values(
-        self, data, filter_values, bucket_label=True, key_prefix=None
+        self,
+        data,
+        filter_values,
+        bucket_label=True,
+        key_prefix=None,
+        is_filtered=None,
     ):
         """Get a labelled version of a bucket."""
+        if is_filtered is None:
+            is_filtered = self.get_is_filtered(filter_values)
         out = []
         # We get the labels first, so that we can efficiently query a resource
         # for all keys in one go, vs querying one by one if needed.
@@ -247,11 +383,15 @@ class NestedTermsFacet(TermsFacet):
                 "key": key,
                 "doc_count": self.get_metric(bucket),
                 "label": label_map[key],
-                "is_selected": self.is_filtered(full_key, filter_values),
+                "is_selected": is_filtered(full_key),
             }
             if "inner" in bucket:
                 bucket_out["inner"] = self.get_labelled_values(
-                    bucket.inner, filter_values, bucket_label=False, key_prefix=full_key
+                    bucket.inner,
+                    filter_values,
+                    bucket_label=False,
+                    key_prefix=full_key,
+                    is_filtered=is_filtered,
                 )
             out.append(bucket_out)
         ret_val = {"buckets": out}
@@ -325,9 +465,24 @@ class CombinedTermsFacet(NestedTermsFacet):
 
     This facet formats the result of the aggregation such that it looks like it was
     a nested aggregation.
+
+    With ``strategy="combined"``, the facet instead runs the terms aggregation
+    of each parent's combined terms once, next to the parent terms aggregation,
+    rather than below every parent bucket. A combined term only occurs in the
+    documents of its parent, so the output is the same, but the aggregation
+    grows linearly instead of quadratically with the number of parents.
     """
 
-    def __init__(self, field, combined_field, parents, splitchar="::", **kwargs):
+    def __init__(
+        self,
+        field,
+        combined_field,
+        parents,
+        splitchar="::",
+        strategy="per_parent",
+        inner_size=10,
+        **kwargs,
+    ):
         """Constructor.
 
         :param field: top-level/parent field
@@ -338,12 +493,19 @@ class CombinedTermsFacet(NestedTermsFacet):
         :type groups: Iterable[str]
         :param splitchar: splitting/combining token, defaults to "::"
         :type splitchar: str, optional
+        :param strategy: "per_parent" to aggregate the combined terms below each
+            parent, or "combined" to aggregate them once, defaults to "per_parent"
+        :type strategy: str, optional
+        :param inner_size: number of child buckets per parent, defaults to 10
+        :type inner_size: int, optional
         """
         self._field = field
         self._combined_field = combined_field
         self._parents = parents
         self._cached_parents = None
         self._splitchar = splitchar
+        self._strategy = strategy
+        self._inner_size = inner_size
         TermsFacet.__init__(self, **kwargs)
 
     def get_parents(self):
@@ -372,23 +534,32 @@ class CombinedTermsFacet(NestedTermsFacet):
 
         Only the subaggregation corresponding to the top-level group will be kept in
         get_labelled_values.
+
+        With the "combined" strategy, the subaggregation of each group is run
+        once instead, next to the top-level terms aggregation.
         """
-        return dsl.A(
-            {
+        inner_aggs = {
+            f"inner_{parent}": {
                 "terms": {
-                    "field": self._field,
+                    "field": self._combined_field,
+                    "include": f"{parent}{self._splitchar}.*",
+                    "size": self._inner_size,
+                },
+            }
+            for parent in self.get_parents()
+        }
+        if self._strategy == "combined":
+            return dsl.A(
+                {
+                    "filter": {"match_all": {}},
                     "aggs": {
-                        f"inner_{parent}": {
-                            "terms": {
-                                "field": self._combined_field,
-                                "include": f"{parent}{self._splitchar}.*",
-                            },
-                        }
-                        for parent in self.get_parents()
+                        "parents": {"terms": {"field": self._field}},
+                        **inner_aggs,
                     },
                 }
-            }
-        )
+            )
+
+        return dsl.A({"terms": {"field": self._field, "aggs": inner_aggs}})
 
     def get_labelled_values(self, data, filter_values):
         """Get a labelled version of a bucket.
@@ -396,6 +567,12 @@ class CombinedTermsFacet(NestedTermsFacet):
         :param data: Bucket data returned by document engine for a field
         :type data: dsl.response.aggs.FieldBucketData
         """
+        is_filtered = self.get_is_filtered(filter_values)
+        # the subaggregations are next to the top-level one, or in its buckets
+        inner_data = None
+        if self._strategy == "combined":
+            inner_data = data
+            data = data.parents
 
         def get_child_buckets(bucket, key):
             """Get lower-level/child buckets."""
@@ -403,11 +580,15 @@ class CombinedTermsFacet(NestedTermsFacet):
 
             # Ignore other subaggregations, and only retrieve inner_{key} one.
             # inner_{key} should always be present unless disconnect between
-            # parents passed to generate subaggregations and parents actually present.
-            # To not break in that case, we put a default empty list value.
-            inner_data = getattr(bucket, f"inner_{key}", dsl.AttrDict({"buckets": []}))
-
-            for inner_bucket in inner_data.buckets:
+            # parents passed to generate subaggregations and parents actually
+            # present. To not break in that case, we put a default empty list.
+            inner_buckets = getattr(
+                bucket if inner_data is None else inner_data,
+                f"inner_{key}",
+                dsl.AttrDict({"buckets": []}),
+            ).buckets
+
+            for inner_bucket in inner_buckets:
                 # get raw key and appropriately formatted key
                 key_raw_inner = self.get_value(inner_bucket)
                 prefix = key + self._splitchar
@@ -418,7 +599,7 @@ class CombinedTermsFacet(NestedTermsFacet):
                         "key": key_inner,
                         "doc_count": self.get_metric(inner_bucket),
                         "label": key_inner,
-                        "is_selected": self.is_filtered(key_raw_inner, filter_values),
+                        "is_selected": is_filtered(key_raw_inner),
                     }
                 )
 
@@ -441,7 +622,7 @@ class CombinedTermsFacet(NestedTermsFacet):
                         "key": key,
                         "doc_count": self.get_metric(bucket),
                         "label": label_map[key],
-                        "is_selected": self.is_filtered(key, filter_values),
+                        "is_selected": is_filtered(key),
                         "inner": {"buckets": get_child_buckets(bucket, key)},
                     }
                 )
@@ -449,6 +630,14 @@ class CombinedTermsFacet(NestedTermsFacet):
 
         return {"buckets": get_parent_buckets(data), "label": str(self._label)}
 
+    def get_values(self, data, filter_values, key_prefix=None, is_filtered=None):
+        """Get an unlabelled version of the bucket."""
+        if self._strategy == "combined":
+            data = data.parents
+        return super().get_values(
+            data, filter_values, key_prefix=key_prefix, is_filtered=is_filtered
+        )
+
     def get_value_filter(self, parsed_value):
         """Return a filter for a single parsed value."""
         # Expect to get a value from the output of `_parse_values()`
@@ -701,36 +890,64 @@ class DateFacet(LabelledFacetMixin, Facet):
             },
         )
 
-    def is_filtered(self, key, filter_values):
-        """Check if a histogram bucket year is selected by any range."""
-        try:
-            year = int(key)
-        except ValueError:
-            return False
+    def _year_ranges(self, filter_values):
+        """Normalize the filter values into year ranges.
 
+        :returns: a list of (start_year, start_inclusive, end_year, end_inclusive)
+            tuples, with ``None`` years for open ranges.
+        """
+        ranges = []
         for value in filter_values:
             r = self._normalize_value(value)
             if r is None:
                 continue
+            ranges.append(
+                (
+                    int(r["start"][:4]) if r["start"] else None,
+                    r["start_inclusive"],
+                    int(r["end"][:4]) if r["end"] else None,
+                    r["end_inclusive"],
+                )
+            )
+        return ranges
+
+    @staticmethod
+    def _in_year_ranges(key, ranges):
+        """Check if a histogram bucket year is within any of the year ranges."""
+        try:
+            year = int(key)
+        except ValueError:
+            return False
 
-            if r["start"]:
-                start_year = int(r["start"][:4])
+        for start_year, start_inclusive, end_year, end_inclusive in ranges:
+            if start_year is not None:
                 if year < start_year:
                     continue
-                if year == start_year and not r["start_inclusive"]:
+                if year == start_year and not start_inclusive:
                     continue
 
-            if r["end"]:
-                end_year = int(r["end"][:4])
+            if end_year is not None:
                 if year > end_year:
                     continue
-                if year == end_year and not r["end_inclusive"]:
+                if year == end_year and not end_inclusive:
                     continue
 
             return True
 
         return False
 
+    def is_filtered(self, key, filter_values):
+        """Check if a histogram bucket year is selected by any range."""
+        return self._in_year_ranges(key, self._year_ranges(filter_values))
+
+    def get_is_filtered(self, filter_values):
+        """Get a function checking if a bucket year is selected by any range.
+
+        The filter values are normalized once, instead of once per bucket.
+        """
+        ranges = self._year_ranges(filter_values)
+        return lambda key: self._in_year_ranges(key, ranges)
+
     def _normalize_value(self, value):
         """Normalize a value into a range dict."""
         value = value.strip()
@@ -1,26 +1,69 @@
-# SPDX-FileCopyrightText: 2021 CERN.
+# SPDX-FileCopyrightText: 2021-2026 CERN.
 # SPDX-License-Identifier: MIT
 
 """Facets value labelling."""
 
 from invenio_records.dictutils import dict_lookup
 
+from ....cache import TTLCache
+
 
 class RecordRelationLabels:
-    """Inefficient fetching of relations for facets."""
+    """Fetching of relations for facets.
+
+    All the bucket keys of a facet are resolved at once, with a constant number
+    of queries if the relation's PID field supports ``resolve_many``. Labels
+    can additionally be cached across requests:
+
+    .. code-block:: python
+
+        TermsFacet(
+            field="metadata.languages.id",
+            value_labels=RecordRelationLabels(
+                Record.relations.languages, "title.en", cache_ttl=300
+            ),
+        )
+    """
+
+    def __init__(self, relation, lookup_key, cache_ttl=None, cache_maxsize=1024):
+        """Initialize the labels.
 
-    def __init__(self, relation, lookup_key):
-        """Initialize the labels."""
+        :param cache_ttl: seconds during which labels are cached, no caching
+            if ``None``.
+        """
         self.relation = relation
         self.lookup_key = lookup_key
+        self._cache = (
+            TTLCache(maxsize=cache_maxsize, ttl=cache_ttl) if cache_ttl else None
+        )
+
+    def resolve(self, ids):
+        """Resolve the ids into records."""
+        pid_field = self.relation.pid_field
+        if hasattr(pid_field, "resolve_many"):
+            return pid_field.resolve_many(ids)
+
+        records = {}
+        for id_ in ids:
+            records[id_] = pid_field.resolve(id_)
+        return records
 
     def __call__(self, ids):
         """Return the mapping when evaluated."""
-        labels = {}
+        labels, missing = {}, list(ids)
+        if self._cache is not None:
+            labels, missing = self._cache.get_many(missing)
 
-        for id_ in ids:
-            labels[id_] = dict_lookup(
-                self.relation.pid_field.resolve(id_), self.lookup_key
-            )
+        if missing:
+            records = self.resolve(missing)
+            fetched = {
+                id_: dict_lookup(records[id_], self.lookup_key)
+                for id_ in missing
+                if id_ in records
+            }
+            if self._cache is not None:
+                self._cache.set_many(fetched)
+            labels.update(fetched)
 
-        return labels
+        # keys which could not be resolved are labelled by themselves
+        return {id_: labels.get(id_, id_) for id_ in ids}
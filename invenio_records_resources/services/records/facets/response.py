@@ -23,6 +23,9 @@ class FacetsResponse(dsl.response.Response):
                 b.key
                 b.is_selected  # <-- true if result are filtered on this bucket
 
+    Facets aggregated on a sample of the documents are marked with
+    ``approximate``. The aggregations of the base query are read from the
+    facets cache when configured (see ``FacetsCache``).
     """
 
     @classmethod
@@ -39,16 +42,39 @@ class FacetsResponse(dsl.response.Response):
 
         return FacetsResponseForRequest
 
+    @property
+    def aggs(self):
+        """Aggregations of the search, or of the facets cache."""
+        if not hasattr(self, "_aggs"):
+            facets_param = self._facets_param
+            search, data = self._search, self._d_.get("aggregations", {})
+            if facets_param.cached_aggregations is not None:
+                search = facets_param.aggs_search
+                data = facets_param.cached_aggregations
+            elif facets_param.cache_key is not None:
+                facets_param.config.facets_cache.set(facets_param.cache_key, data)
+
+            aggs = dsl.response.AggResponse(search.aggs, search, data)
+            # avoid assigning _aggs into self._d_
+            super(dsl.AttrDict, self).__setattr__("_aggs", aggs)
+        return self._aggs
+
     def _iter_facets(self):
         # _facets_param instance is added to _search by the FacetsParam.apply
         for name, facet in self._facets_param.facets.items():
             yield (
                 name,
                 facet,
-                getattr(self.aggregations, name),
+                self._facets_param.get_aggregation_data(self.aggregations, name),
                 self._facets_param.selected_values.get(name, []),
             )
 
+    def _mark_sampled(self, name, values):
+        """Mark the counts of sampled facets as approximate."""
+        if name in self._facets_param.sampled:
+            values["approximate"] = True
+        return values
+
     @property
     def facets(self):
         """Unlabelled facets."""
@@ -57,7 +83,9 @@ class FacetsResponse(dsl.response.Response):
 
             try:
                 for name, facet, data, selection in self._iter_facets():
-                    self._facets[name] = facet.get_values(data, selection)
+                    self._facets[name] = self._mark_sampled(
+                        name, facet.get_values(data, selection)
+                    )
             except AttributeError:
                 # Attribute errors are masked by AttrDict, so we reraise as a
                 # different exception.
@@ -73,8 +101,8 @@ class FacetsResponse(dsl.response.Response):
 
             try:
                 for name, facet, data, selection in self._iter_facets():
-                    self._labelled_facets[name] = facet.get_labelled_values(
-                        data, selection
+                    self._labelled_facets[name] = self._mark_sampled(
+                        name, facet.get_labelled_values(data, selection)
                     )
             except AttributeError:
                 # Attribute errors are masked by AttrDict, so we reraise as a
@@ -6,6 +6,8 @@
 
 from copy import deepcopy
 
+from invenio_search.engine import dsl
+
 from ..facets import FacetsResponse
 from .base import ParamInterpreter
 
@@ -13,16 +15,32 @@ from .base import ParamInterpreter
 class FacetsParam(ParamInterpreter):
     """Evaluate facets."""
 
+    shared_sample_name = "facets_sample"
+    """Name of the sampler aggregation shared by the sampled facets."""
+
     def __init__(self, config):
         """Initialise the facets interpreter."""
         super().__init__(config)
         self.selected_values = {}
+        self.cursors = {}
+        self.sampled = {}
+        self.cache_key = None
+        self.cached_aggregations = None
+        self.aggs_search = None
+        self._base_query = False
         self._filters = {}
+        self._facets = None
 
     @property
     def facets(self):
-        """Get the defined facets."""
-        return deepcopy(self.config.facets)
+        """Get the defined facets.
+
+        The facets are copied once per interpreter, i.e. once per search, so
+        that they can hold the state of the search (e.g. a paging cursor).
+        """
+        if self._facets is None:
+            self._facets = deepcopy(self.config.facets)
+        return self._facets
 
     def add_filter(self, name, values):
         """Add a filter for a facet."""
@@ -31,6 +49,11 @@ class FacetsParam(ParamInterpreter):
         if f is not None:
             self._filters[name] = f
 
+    def add_cursor(self, name, after=None, prefix=None):
+        """Add a paging cursor for a facet supporting it."""
+        self.cursors[name] = {"after": after, "prefix": prefix}
+        self.facets[name].set_cursor(after=after, prefix=prefix)
+
     @staticmethod
     def _combine(filters):
         """Combine filters with AND. Returns None if no filters."""
@@ -63,14 +86,68 @@ class FacetsParam(ParamInterpreter):
 
         return search
 
+    @staticmethod
+    def _sampler(sampler, aggs=None):
+        """Create a sampler aggregation from its configuration."""
+        params = dict(sampler)
+        return dsl.A(params.pop("type", "sampler"), aggs=aggs or {}, **params)
+
     def aggregate(self, search):
-        """Add aggregations representing the facets."""
+        """Add aggregations representing the facets.
+
+        Sampled facets are aggregated below a ``sample`` sub-aggregation of
+        their own sampler, or below the sampler shared by the facets
+        (``shared_sample_name``).
+        """
         facets = self.facets
+        shared_sampler = getattr(self.config, "facets_sampler", None)
+        shared = None
         for name, facet in facets.items():
             if name in self.selected_values and hasattr(facet, "prepare_aggregation"):
                 facet.prepare_aggregation(list(self.selected_values[name]))
             agg = facet.get_aggregation()
-            search.aggs.bucket(name, agg)
+
+            sampler = getattr(facet, "sampler", None)
+            if sampler:
+                self.sampled[name] = "own"
+                search.aggs.bucket(name, self._sampler(sampler, {"sample": agg}))
+            elif sampler is None and shared_sampler:
+                self.sampled[name] = "shared"
+                if shared is None:
+                    shared = search.aggs.bucket(
+                        self.shared_sample_name, self._sampler(shared_sampler)
+                    )
+                shared.bucket(name, agg)
+            else:
+                search.aggs.bucket(name, agg)
+        return search
+
+    def get_aggregation_data(self, aggregations, name):
+        """Get the aggregation data of a facet from the response."""
+        sampled = self.sampled.get(name)
+        if sampled == "shared":
+            aggregations = aggregations[self.shared_sample_name]
+        data = getattr(aggregations, name)
+        return data.sample if sampled == "own" else data
+
+    def use_cache(self, search):
+        """Serve the aggregations of the base query from the facets cache.
+
+        Must be called on the final search (i.e. once the components added
+        their filters), since its query is the cache key. On a cache hit, the
+        aggregations are removed from the search.
+        """
+        cache = getattr(self.config, "facets_cache", None)
+        if cache is None or not self._base_query:
+            return search
+
+        self.cache_key = cache.make_key(search)
+        self.cached_aggregations = cache.get(self.cache_key)
+        # the aggregations definitions are needed to read the cached data
+        self.aggs_search = search
+        if self.cached_aggregations is not None:
+            search = search._clone()
+            search.aggs._params = {"aggs": {}}
         return search
 
     def apply(self, identity, search, params):
@@ -81,11 +158,31 @@ class FacetsParam(ParamInterpreter):
             if name in self.facets:
                 self.add_filter(name, values)
 
-        # Customize response class to add a ".facets" property.
-        search = search.response_class(FacetsResponse.create_response_cls(self))
+        # Add paging cursors (e.g. "?subjects.after=...&subjects.prefix=...")
+        for name, facet in self.facets.items():
+            if not hasattr(facet, "set_cursor"):
+                continue
+            after = facets_values.get(f"{name}.after") or [None]
+            prefix = facets_values.get(f"{name}.prefix") or [None]
+            if after[0] or prefix[0]:
+                self.add_cursor(name, after=after[0], prefix=prefix[0])
+
+        # "none" only returns the hits, "only" only returns the aggregations
+        facets_mode = params.get("facets_mode") or "all"
+        if facets_mode != "none":
+            # Customize response class to add a ".facets" property.
+            search = search.response_class(FacetsResponse.create_response_cls(self))
+            search = self.aggregate(search)
+            self._base_query = not (
+                params.get("q")
+                or params.get("suggest")
+                or self.selected_values
+                or self.cursors
+            )
+        if facets_mode == "only":
+            search = search.extra(size=0).source(False)
 
         # Build search
-        search = self.aggregate(search)
         search = self.filter(search)
 
         # Update params
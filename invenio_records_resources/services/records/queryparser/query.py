@@ -3,13 +3,16 @@
 
 """Lucene query syntax parser."""
 
+import re
 from copy import deepcopy
 from functools import partial
 
+from invenio_i18n import gettext as _
 from invenio_search.engine import dsl
 from luqum.auto_head_tail import auto_head_tail
 from luqum.exceptions import ParseError
 from luqum.parser import parser as luqum_parser
+from luqum.tree import Word
 from werkzeug.utils import cached_property
 
 from invenio_records_resources.services.errors import QuerystringValidationError
@@ -57,8 +60,33 @@ class QueryParser:
                     }
                 )
             )
+
+    A complexity budget protects the parser and the search cluster from
+    pathological query strings. All limits are disabled by default::
+
+        class SearchOptions:
+            query_parser_cls = QueryParser.factory(
+                max_length=1000,  # characters in the query string
+                max_depth=10,  # depth of the syntax tree
+                max_nodes=200,  # nodes in the syntax tree
+                leading_wildcard=False,  # reject terms such as ``*foo``
+                over_budget="fallback",  # or "error" (the default)
+            )
+
+    The length limit bounds the cost of parsing, while the depth and node
+    limits apply to the syntax tree, also for the plain queries which skip the
+    parser.
+
+    Queries over budget raise a ``QuerystringValidationError``, or are
+    degraded to a ``multi_match`` query if ``over_budget`` is ``"fallback"``.
     """
 
+    simple_query_re = re.compile(r"^[\w.,'@#$%;]+(?:\s+[\w.,'@#$%;]+)*$")
+    """Matches query strings made only of plain terms (no Lucene syntax)."""
+
+    reserved_words = frozenset(["AND", "OR", "NOT", "TO"])
+    """Lucene keywords which must go through the full parser."""
+
     def __init__(self, identity=None, extra_params=None, tree_transformer_cls=None):
         """Initialise the parser."""
         self.identity = identity
@@ -75,8 +103,14 @@ class QueryParser:
         # fields is not removed from extra params since if given it must be
         # used in both querystring and multi match
         self._fields = self.extra_params.get("fields") or []
+        # complexity budget of the query, not sent to the search cluster
+        self.max_length = self.extra_params.pop("max_length", None)
+        self.max_depth = self.extra_params.pop("max_depth", None)
+        self.max_nodes = self.extra_params.pop("max_nodes", None)
+        self.leading_wildcard = self.extra_params.pop("leading_wildcard", True)
+        self.over_budget = self.extra_params.pop("over_budget", "error")
 
-    @property
+    @cached_property
     def allow_list(self):
         """Calculate the allow list."""
         if self._allow_list:  # only add the mapping if there is an allow list
@@ -112,31 +146,148 @@ class QueryParser:
             tree_transformer_cls=tree_transformer_cls,
         )
 
+    def is_simple(self, query_str):
+        """Check if the query string is free of any Lucene syntax.
+
+        Such queries are plain terms separated by whitespace, for which parsing
+        and transforming the tree is a no-op. Tree transformers which rewrite
+        bare terms must not set ``passthrough_simple_queries``.
+        """
+        transformer_cls = self.tree_transformer_cls
+        if transformer_cls is not None and not self._passes_through(transformer_cls):
+            return False
+        if not self.simple_query_re.match(query_str.strip()):
+            return False
+        return self.reserved_words.isdisjoint(query_str.split())
+
+    @staticmethod
+    def _passes_through(transformer_cls):
+        """Check if a tree transformer leaves the simple queries untouched.
+
+        The ``passthrough_simple_queries`` flag only holds for the class setting
+        it: a subclass overriding any visitor must set it again.
+        """
+        for cls in transformer_cls.__mro__:
+            if "passthrough_simple_queries" in vars(cls):
+                return cls.passthrough_simple_queries
+            if any(name.startswith("visit") for name in vars(cls)):
+                return False
+        return False
+
+    def check_budget(self, query_str):
+        """Check the query string against the budget before parsing it.
+
+        Returns an error message if the query is over budget, ``None`` otherwise.
+        """
+        if self.max_length and len(query_str) > self.max_length:
+            return _(
+                "Query is too long (maximum %(max_length)s characters).",
+                max_length=self.max_length,
+            )
+
+    def check_size(self, nodes, depth):
+        """Check the number of nodes and the depth of a syntax tree.
+
+        Returns an error message if the query is over budget, ``None`` otherwise.
+        """
+        if (self.max_depth and depth > self.max_depth) or (
+            self.max_nodes and nodes > self.max_nodes
+        ):
+            return _("Query is too complex.")
+
+    def check_simple(self, query_str):
+        """Check a plain query against the budget, without parsing it.
+
+        Its syntax tree is one node per term, under an operation node if there
+        are several terms.
+
+        Returns an error message if the query is over budget, ``None`` otherwise.
+        """
+        terms = len(query_str.split())
+        if terms == 1:
+            return self.check_size(1, 1)
+        return self.check_size(terms + 1, 2)
+
+    def check_tree(self, tree):
+        """Check the syntax tree against the budget.
+
+        Returns an error message if the query is over budget, ``None`` otherwise.
+        """
+        if not (self.max_depth or self.max_nodes or not self.leading_wildcard):
+            return None
+
+        nodes = 0
+        # iterative walk, deeply nested trees could exceed the recursion limit
+        stack = [(tree, 1)]
+        while stack:
+            node, depth = stack.pop()
+            nodes += 1
+            error = self.check_size(nodes, depth)
+            if error:
+                return error
+            if (
+                not self.leading_wildcard
+                and isinstance(node, Word)
+                and node.value.startswith(("*", "?"))
+            ):
+                return _("Leading wildcards are not allowed.")
+            stack.extend((child, depth + 1) for child in node.children)
+
+    def degrade(self, query_str, message):
+        """Handle a query over budget according to the ``over_budget`` policy."""
+        if self.over_budget == "fallback":
+            return self.multi_match(query_str)
+        raise QuerystringValidationError(message)
+
+    def multi_match(self, query_str):
+        """Build the fallback multi match query."""
+        if self.allow_list:
+            # if there is an allow list it must overwrite a potential value
+            # given by the query to include it in the fields
+            kwargs = {**self.extra_params, "fields": self.fields}
+            return dsl.Q("multi_match", query=query_str, **kwargs)
+
+        # if there is no allow list we pass the parameters as default, without
+        # modifying the fields, or nothing if it was not passed. this is to
+        # avoid passing `fields=None`
+        return dsl.Q("multi_match", query=query_str, **self.extra_params)
+
     def parse(self, query_str):
         """Parse the query."""
+        # Fast path: skip luqum for blank queries and queries without syntax
+        if not query_str.strip():
+            return self.multi_match(query_str)
+        error = self.check_budget(query_str)
+        if error:
+            return self.degrade(query_str, error)
+        if self.is_simple(query_str):
+            error = self.check_simple(query_str)
+            if error:
+                return self.degrade(query_str, error)
+            return dsl.Q("query_string", query=query_str, **self.extra_params)
+
         try:
             # We parse the Lucene query syntax in Python, so we know upfront
             # if the syntax is correct before executing it in the search engine
             tree = luqum_parser.parse(query_str)
+            error = self.check_tree(tree)
             # Perform transformation on the abstract syntax tree (AST)
-            if self.tree_transformer_cls is not None:
+            new_query_str = query_str
+            if not error and self.tree_transformer_cls is not None:
                 transformer = self.tree_transformer_cls(
                     mapping=self.mapping,
                     allow_list=self.allow_list,
                 )
                 new_tree = transformer.visit(tree, context={"identity": self.identity})
                 new_tree = auto_head_tail(new_tree)
-                query_str = str(new_tree)
-            return dsl.Q("query_string", query=query_str, **self.extra_params)
+                new_query_str = str(new_tree)
+        except RecursionError:
+            error = _("Query is too complex.")
         except (ParseError, QuerystringValidationError):
             # Fallback to a multi-match query.
-            if self.allow_list:
-                # if there is an allow list it must overwrite a potential value
-                # given by the query to include it in the fields
-                kwargs = {**self.extra_params, "fields": self.fields}
-                return dsl.Q("multi_match", query=query_str, **kwargs)
-
-            # if there is no allow list we pass the parameters as default, without
-            # modifying the fields, or nothing if it was not passed. this is to
-            # avoid passing `fields=None`
-            return dsl.Q("multi_match", query=query_str, **self.extra_params)
+            return self.multi_match(query_str)
+
+        if error:
+            # raised outside of the try block to not fall back to multi match
+            return self.degrade(query_str, error)
+        return dsl.Q("query_string", query=new_query_str, **self.extra_params)
@@ -94,6 +94,9 @@ class RestrictedTermValue:
 class SearchFieldTransformer(TreeTransformer):
     """Transform from user-friendly field names to internal field names."""
 
+    passthrough_simple_queries = True
+    """Queries without any search field are left untouched by the transformer."""
+
     def __init__(self, mapping, allow_list, *args, **kwargs):
         """Constructor."""
         self._mapping = mapping
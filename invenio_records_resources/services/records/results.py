@@ -5,7 +5,10 @@
 """Service results."""
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 
+from flask import current_app, g, has_request_context
 from invenio_access.permissions import system_user_id
 from invenio_records.dictutils import dict_lookup, dict_merge, dict_set
 
@@ -40,7 +43,9 @@ class RecordItem(ServiceItemResult):
         self._record = record
         self._service = service
         self._schema = schema or service.schema
-        self._fields_resolver = FieldsResolver(expandable_fields)
+        self._fields_resolver = FieldsResolver(
+            expandable_fields, cache=getattr(service.config, "expand_cache", None)
+        )
         self._expand = expand
         self._nested_links_item = nested_links_item
         self._data = None
@@ -161,7 +166,9 @@ class RecordList(ServiceListResult):
         self._links_tpl = links_tpl
         self._links_item_tpl = links_item_tpl
         self._nested_links_item = nested_links_item
-        self._fields_resolver = FieldsResolver(expandable_fields)
+        self._fields_resolver = FieldsResolver(
+            expandable_fields, cache=getattr(service.config, "expand_cache", None)
+        )
         self._expand = expand
 
     def __len__(self):
@@ -406,14 +413,38 @@ class FieldsResolver:
       selected and returned from the resolved record.
 
     It supports resolution of nested fields out of the box.
+
+    The referenced records can be cached across requests by passing a cache
+    (e.g. a ``TTLCache``), configured with ``expand_cache`` on the service
+    config. Records are cached per service, value and needs of the identity,
+    and the records not in the cache are fetched concurrently for the
+    different services.
     """
 
-    def __init__(self, expandable_fields):
+    max_workers = 4
+    """Maximum number of services called concurrently."""
+
+    def __init__(self, expandable_fields, cache=None):
         """Constructor.
 
         :params expandable_fields: list of ExpandableField obj.
+        :params cache: optional cache of the dereferenced records.
         """
         self._fields = expandable_fields
+        self._cache = cache
+        self._fields_index = dict()
+
+    def _add_service_value(self, field, service, value, grouped_values):
+        """Add the value of a field to the values to fetch."""
+        field.add_service_value(service, value)
+        # index the fields by value for finding them once dereferenced
+        fields = self._fields_index.setdefault((service, value), [])
+        if field not in fields:
+            fields.append(field)
+        # collect values (ids) and group by service e.g.:
+        # service_1: (13, 4),
+        # service_2: (uuid1, uuid2, ...)
+        grouped_values.setdefault(service, set()).add(value)
 
     def _collect_values(self, hits):
         """Collect all field values to be expanded."""
@@ -429,12 +460,7 @@ class FieldsResolver:
                 else:
                     # value is not None
                     v, service = field.get_value_service(value)
-                    field.add_service_value(service, v)
-                    # collect values (ids) and group by service e.g.:
-                    # service_1: (13, 4),
-                    # service_2: (uuid1, uuid2, ...)
-                    grouped_values.setdefault(service, set())
-                    grouped_values[service].add(v)
+                    self._add_service_value(field, service, v, grouped_values)
 
         return grouped_values
 
@@ -444,7 +470,42 @@ class FieldsResolver:
         The `id` field used to match the resolved record is hardcoded,
         as in the `read_many` method.
         """
-        return [field for field in self._fields if field.has(service, value)]
+        return self._fields_index.get((service, value), [])
+
+    @staticmethod
+    def _read_many(identity, service, values):
+        """Fetch the referenced records of a service."""
+        return service, list(service.read_many(identity, list(values)).hits)
+
+    def _read_all(self, identity, grouped_values):
+        """Fetch the referenced records, concurrently for different services.
+
+        The services are only called concurrently within a request. Each call
+        runs in its own application context, with a copy of ``g`` (e.g. the
+        logged in user): the request context itself is not shared with the
+        workers, as popping it would tear down the request.
+        """
+        if len(grouped_values) < 2 or self.max_workers < 2 or not has_request_context():
+            return [
+                self._read_many(identity, service, values)
+                for service, values in grouped_values.items()
+            ]
+
+        app = current_app._get_current_object()
+        state = dict(vars(g._get_current_object()))
+
+        def read_many(*args):
+            with app.app_context():
+                vars(g._get_current_object()).update(state)
+                return self._read_many(*args)
+
+        workers = min(self.max_workers, len(grouped_values))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(read_many, identity, service, values)
+                for service, values in grouped_values.items()
+            ]
+            return [future.result() for future in futures]
 
     def _fetch_referenced(self, grouped_values, identity):
         """Search and fetch referenced recs by ids."""
@@ -454,16 +515,34 @@ class FieldsResolver:
             for field in self._find_fields(service, value):
                 field.add_dereferenced_record(service, value, resolved_rec)
 
-        for service, all_values in grouped_values.items():
-            results = service.read_many(identity, list(all_values))
-
+        # serve the records from the cache
+        if self._cache is not None:
+            needs = frozenset(identity.provides)
+            missing_values = dict()
+            for service, all_values in grouped_values.items():
+                keys = [(service.id, value, needs) for value in all_values]
+                cached, missing = self._cache.get_many(keys)
+                for (_, value, _), hit in cached.items():
+                    # the cached records are shared between the requests
+                    _add_dereferenced_record(service, value, deepcopy(hit))
+                if missing:
+                    missing_values[service] = {value for _, value, _ in missing}
+            grouped_values = missing_values
+
+        for service, hits in self._read_all(identity, grouped_values):
+            all_values = grouped_values[service]
             found_values = set()
-            for hit in results.hits:
+            for hit in hits:
                 value = hit.get("id", None)
                 # keep values visited so we can extract the ones not found i.e ghost
                 found_values.add(value)
                 _add_dereferenced_record(service, value, hit)
 
+            if self._cache is not None:
+                self._cache.set_many(
+                    {(service.id, hit.get("id"), needs): deepcopy(hit) for hit in hits}
+                )
+
             ghost_values = all_values - found_values
             for value in ghost_values:
                 # set dereferenced record to None. That will trigger eventually
@@ -473,6 +552,7 @@ class FieldsResolver:
     def resolve(self, identity, hits):
         """Collect field values and resolve referenced records."""
         _hits = list(hits)  # ensure it is a list, when a single value passed
+        self._fields_index = dict()
         grouped_values = self._collect_values(_hits)
         self._fetch_referenced(grouped_values, identity)
 
@@ -534,8 +614,7 @@ class MultiFieldsResolver(FieldsResolver):
                     values_services = [values_services]  # Ensure list format
 
                 for v, service in values_services:
-                    field.add_service_value(service, v)
-                    grouped_values.setdefault(service, set()).add(v)
+                    self._add_service_value(field, service, v, grouped_values)
 
         return grouped_values
 
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Custom routing of the records to the shards of an index."""
+
+from invenio_records.dictutils import dict_lookup
+
+
+class FieldRouting:
+    """Route the records by the value of a field.
+
+    The records sharing the value, e.g. the records of a community, are stored
+    in the same shard. A search restricted to some values of the field, with a
+    ``term`` or ``terms`` filter, then only hits the shards of these values.
+
+    .. code-block:: python
+
+        class MyServiceConfig(RecordServiceConfig):
+            index_routing = FieldRouting("parent.communities.default")
+
+    The field must be single-valued: the records without a value are routed
+    by id, which the searches restricted to some values do not need to hit.
+    When the value of a record changes, its document with the previous routing
+    is deleted (see
+    :meth:`invenio_records_resources.indexer.RecordIndexer.stale_copies`).
+
+    The routing of an index cannot be changed once records are indexed: the
+    records must be reindexed in a new index.
+    """
+
+    def __init__(self, field, search_field=None):
+        """Constructor.
+
+        :param field: dotted path of the field in the record.
+        :param search_field: field of the documents in the index, if it
+            differs from the record field.
+        """
+        self.field = field
+        self.search_field = search_field or field
+
+    def record_to_routing(self, record):
+        """Get the routing value of a record, or ``None`` to route it by id.
+
+        :raises ValueError: if the field has several values.
+        """
+        try:
+            value = dict_lookup(record, self.field)
+        except (KeyError, IndexError, TypeError):
+            return None
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"The routing field {self.field} must be single-valued.")
+        return None if value is None else str(value)
+
+    def search_to_routing(self, search):
+        """Get the routing values of a search, if it is scoped by the field.
+
+        :returns: the list of routing values, or ``None`` if the search is not
+            restricted to some values of the field.
+        """
+        query = search.to_dict().get("query")
+        values = self._query_values(query) if query else None
+        return sorted(values) if values else None
+
+    def _query_values(self, query):
+        """Get the values of the field required by a query.
+
+        Only the clauses every matching document must satisfy are considered,
+        i.e. the ``filter`` and ``must`` clauses of boolean queries.
+        """
+        if "term" in query or "terms" in query:
+            return self._clause_values(query)
+        if "bool" not in query:
+            return None
+
+        values = None
+        bool_query = query["bool"]
+        for occur in ("filter", "must"):
+            clauses = bool_query.get(occur, [])
+            if isinstance(clauses, dict):
+                clauses = [clauses]
+            for clause in clauses:
+                clause_values = self._query_values(clause)
+                if clause_values is not None:
+                    values = clause_values if values is None else values & clause_values
+        return values
+
+    def _clause_values(self, clause):
+        """Get the values of the field of a term(s) clause."""
+        if "term" in clause:
+            value = clause["term"].get(self.search_field)
+            if isinstance(value, dict):
+                value = value.get("value")
+            return None if value is None else {str(value)}
+        values = clause["terms"].get(self.search_field)
+        return None if values is None else {str(v) for v in values}
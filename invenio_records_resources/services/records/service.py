@@ -5,14 +5,21 @@
 
 """Record Service API."""
 
+from copy import deepcopy
+from datetime import datetime, timezone
+
 from flask import current_app
 from invenio_db import db
 from invenio_pidstore.errors import PIDDoesNotExistError
+from invenio_records.dictutils import dict_lookup, dict_set
 from invenio_records.errors import RecordsError
 from invenio_records_permissions.api import permission_filter
 from invenio_search import current_search_client
 from invenio_search.engine import dsl
+from invenio_search.engine import search as search_engine
+from invenio_search.utils import build_alias_name
 from kombu import Queue
+from sqlalchemy import func
 from sqlalchemy.orm.exc import NoResultFound
 from werkzeug.local import LocalProxy
 
@@ -21,6 +28,17 @@ from invenio_records_resources.services.errors import (
     RecordPermissionDeniedError,
 )
 
+from ...indexer import (
+    IndexMigration,
+    bulk_copy,
+    get_content_hash_extension,
+    parallel_bulk_index,
+)
+from ...records.systemfields.relations import (
+    PIDRelation,
+    prefetch_relations,
+    relations_cache,
+)
 from ..base import LinksTemplate, Service
 from ..errors import RevisionIdMismatchError
 from ..uow import RecordBulkIndexOp, RecordCommitOp, RecordDeleteOp, unit_of_work
@@ -34,9 +52,8 @@ class RecordIndexerMixin:
     configuration attributes.
     """
 
-    @property
-    def indexer(self):
-        """Factory for creating an indexer instance."""
+    def _create_indexer(self, queue_name):
+        """Create an indexer sending the records to a queue."""
         return self.config.indexer_cls(
             # the routing key is mandatory in the indexer constructor since
             # it is afterwards passed explicitly to the created consumers
@@ -46,21 +63,64 @@ class RecordIndexerMixin:
             # entity declaration on publish.
             queue=LocalProxy(
                 lambda: Queue(
-                    self.config.indexer_queue_name,
+                    queue_name,
                     exchange=current_app.config["INDEXER_MQ_EXCHANGE"],
-                    routing_key=self.config.indexer_queue_name,
+                    routing_key=queue_name,
                 )
             ),
-            routing_key=self.config.indexer_queue_name,
+            routing_key=queue_name,
             record_cls=self.config.record_cls,
             record_to_index=self.record_to_index,
             record_dumper=self.config.index_dumper,
+            **(
+                {"record_to_routing": self.record_to_routing}
+                if self.index_routing
+                else {}
+            ),
         )
 
+    @property
+    def indexer(self):
+        """Factory for creating an indexer instance."""
+        return self._create_indexer(self.config.indexer_queue_name)
+
+    @property
+    def bulk_indexer(self):
+        """Factory for creating the indexer of background and bulk operations.
+
+        Reindexing and relations propagation use a separate queue if
+        ``indexer_bulk_queue_name`` is configured, so that they do not delay
+        the indexing of the interactive operations.
+        """
+        queue_name = getattr(self.config, "indexer_bulk_queue_name", None)
+        if not queue_name:
+            return self.indexer
+        return self._create_indexer(queue_name)
+
     def record_to_index(self, record):
         """Function used to map a record to an index."""
         return record.index._name
 
+    @property
+    def index_routing(self):
+        """Routing strategy of the records, or ``None`` to route them by id."""
+        return getattr(self.config, "index_routing", None)
+
+    def record_to_routing(self, record):
+        """Function used to map a record to its routing value."""
+        if not self.index_routing:
+            return None
+        return self.index_routing.record_to_routing(record)
+
+    def route_search(self, search):
+        """Restrict a search to the shards of its routing values."""
+        if not self.index_routing:
+            return search
+        routing = self.index_routing.search_to_routing(search)
+        if not routing:
+            return search
+        return search.params(routing=",".join(routing))
+
 
 class RecordService(Service, RecordIndexerMixin):
     """Record Service."""
@@ -160,7 +220,7 @@ class RecordService(Service, RecordIndexerMixin):
         extras["track_total_hits"] = True
         search = search.extra(**extras)
 
-        return search
+        return self.route_search(search)
 
     def search_request(
         self,
@@ -188,7 +248,8 @@ class RecordService(Service, RecordIndexerMixin):
         for interpreter_cls in search_opts.params_interpreters_cls:
             search = interpreter_cls(search_opts).apply(identity, search, params)
 
-        return search
+        # the interpreters can scope the search, e.g. FilterParam
+        return self.route_search(search)
 
     def _search(
         self,
@@ -201,9 +262,14 @@ class RecordService(Service, RecordIndexerMixin):
         extra_filter=None,
         permission_action="read",
         versioning=True,
+        projected=False,
         **kwargs,
     ):
-        """Create the search engine DSL."""
+        """Create the search engine DSL.
+
+        :param projected: fetch only the ``list_projection`` fields of the
+            search options, instead of the full documents.
+        """
         # Merge params
         # NOTE: We allow using both the params variable, as well as kwargs. The
         # params is used by the resource, and kwargs is used to have an easier
@@ -227,6 +293,23 @@ class RecordService(Service, RecordIndexerMixin):
         for component in self.components:
             if hasattr(component, action):
                 search = getattr(component, action)(identity, search, params)
+
+        # Serve the facets of the base query from the facets cache
+        facets_param = getattr(search._response_class, "_facets_param", None)
+        if facets_param is not None:
+            search = facets_param.use_cache(search)
+
+        # Fetch only the fields of the search results, and the fields to expand
+        list_projection = getattr(
+            search_opts or self.config.search, "list_projection", None
+        )
+        if projected and list_projection:
+            fields = list(list_projection) + [
+                f.field_name
+                for f in self.expandable_fields
+                if f.field_name not in list_projection
+            ]
+            search = search.source(self._source_fields(fields))
         return search
 
     #
@@ -240,7 +323,9 @@ class RecordService(Service, RecordIndexerMixin):
 
         # Prepare and execute the search
         params = params or {}
-        search = self._search("search", identity, params, search_preference, **kwargs)
+        search = self._search(
+            "search", identity, params, search_preference, projected=True, **kwargs
+        )
         search_result = search.execute()
 
         return self.result_list(
@@ -286,9 +371,14 @@ class RecordService(Service, RecordIndexerMixin):
         search_preference=None,
         search_query=None,
         extra_filter=None,
+        sync=None,
         **kwargs,
     ):
-        """Reindex records matching the query parameters."""
+        """Reindex records matching the query parameters.
+
+        :param sync: index the records directly instead of through the
+            indexer queue. Defaults to ``RECORDS_RESOURCES_BULK_INDEX_SYNC``.
+        """
         self.require_permission(
             identity,
             "search",
@@ -320,7 +410,12 @@ class RecordService(Service, RecordIndexerMixin):
         search_result = search.scan()
         iterable_ids = (res.meta.id for res in search_result)
 
-        self.indexer.bulk_index(iterable_ids)
+        if sync is None:
+            sync = current_app.config["RECORDS_RESOURCES_BULK_INDEX_SYNC"]
+        if sync:
+            parallel_bulk_index(self.bulk_indexer, iterable_ids)
+        else:
+            self.bulk_indexer.bulk_index(iterable_ids)
         return True
 
     @unit_of_work()
@@ -421,6 +516,16 @@ class RecordService(Service, RecordIndexerMixin):
         except (PIDDoesNotExistError, PermissionDeniedError):
             return False
 
+    @staticmethod
+    def _source_fields(fields):
+        """Source fields of the documents to fetch.
+
+        Explicitly add internal system fields required to use the result list
+        to dump the output.
+        """
+        dumper_fields = ["uuid", "version_id", "created", "updated", "expires_at"]
+        return list(fields) + dumper_fields
+
     def _read_many(
         self,
         identity,
@@ -447,16 +552,13 @@ class RecordService(Service, RecordIndexerMixin):
             versioning=True,
         )
 
-        # Fetch only certain fields - explicitly add internal system fields
-        # required to use the result list to dump the output.
+        # Fetch only certain fields
         if fields:
-            dumper_fields = ["uuid", "version_id", "created", "updated", "expires_at"]
-            fields = fields + dumper_fields
             # ES 7.11+ supports a more efficient way of fetching only certain
             # fields using the "fields"-option to a query. However, ES 7 and
             # OS 1 versions does not support it, so we use the source filtering
             # method instead for now.
-            search = search.source(fields)
+            search = search.source(self._source_fields(fields))
 
         search = search[0:max_records].query(search_query)
         if sort:
@@ -536,65 +638,316 @@ class RecordService(Service, RecordIndexerMixin):
 
         return True
 
+    def _indexable_ids(self, updated_since=None):
+        """Ids of the records to index, i.e. not (soft) deleted."""
+        model_cls = self.record_cls.model_cls
+        query = db.session.query(model_cls.id).filter(model_cls.is_deleted == False)
+        if updated_since is not None:
+            query = query.filter(model_cls.updated >= updated_since)
+        return (rec.id for rec in query.yield_per(1000))
+
+    def _deleted_ids(self, updated_since):
+        """Ids of the records (soft) deleted since a date."""
+        model_cls = self.record_cls.model_cls
+        query = db.session.query(model_cls.id).filter(
+            model_cls.is_deleted == True, model_cls.updated >= updated_since
+        )
+        return (rec.id for rec in query.yield_per(1000))
+
     def rebuild_index(self, identity, uow=None):
         """Reindex all records managed by this service.
 
         Note: Skips (soft) deleted records.
         """
-        model_cls = self.record_cls.model_cls
-        records = (
-            db.session.query(model_cls.id)
-            .filter(model_cls.is_deleted == False)
-            .yield_per(1000)
-        )
-
-        self.indexer.bulk_index((rec.id for rec in records))
+        self.bulk_indexer.bulk_index(self._indexable_ids())
 
         return True
 
+    def migrate_index(self, identity, delete_old_index=False):
+        """Reindex all records managed by this service into a new index.
+
+        Unlike ``rebuild_index``, the searches keep using the current index
+        until the new one is complete, and are then atomically switched to
+        it, e.g. to apply mapping changes without downtime.
+
+        Note: Skips (soft) deleted records.
+
+        :param delete_old_index: delete the previous index once replaced.
+        :returns: the name of the new index.
+        """
+        model_cls = self.record_cls.model_cls
+        updated_since = db.session.query(func.max(model_cls.updated)).scalar()
+
+        migration = IndexMigration(self.bulk_indexer, self.record_cls.index._name)
+        try:
+            migration.start()
+            migration.copy(self._indexable_ids())
+            # catch up with the records updated or deleted meanwhile, in case
+            # their writes were not copied (e.g. by a custom indexer), or they
+            # were copied after being deleted
+            if updated_since is not None:
+                migration.copy(self._indexable_ids(updated_since))
+                migration.delete(self._deleted_ids(updated_since))
+            migration.finish(delete_old_index=delete_old_index)
+        except Exception:
+            migration.abort()
+            raise
+
+        return migration.new_index
+
     #
     # notification handlers
     #
+    @staticmethod
+    def _get_relation_refs(source, field):
+        """Get the (possibly dereferenced) related objects of a field."""
+
+        def _flatten(values):
+            for v in values:
+                if isinstance(v, list):
+                    yield from _flatten(v)
+                else:
+                    yield v
+
+        # the field can be a list, or be nested in lists
+        values = [source]
+        for key in field.split("."):
+            values = [
+                v[key] for v in _flatten(values) if isinstance(v, dict) and key in v
+            ]
+        return [v for v in _flatten(values) if isinstance(v, dict)]
+
+    @classmethod
+    def _is_outdated(cls, hit, field, versions):
+        """Check if a hit references an outdated version of a related record.
+
+        :param versions: the latest version ("uuid::revision_id") of the
+                         related records by id.
+        """
+        refs = cls._get_relation_refs(hit, field)
+        current = {ref.get("@v") for ref in refs}
+        return any(
+            ref.get("id") in versions and versions[ref["id"]] not in current
+            for ref in refs
+        )
+
+    @classmethod
+    def _update_relation(cls, source, field, values):
+        """Replace the outdated related objects of a field in a document.
+
+        :param values: the dereferenced related objects by id.
+        :returns: False if the document cannot be partially updated, i.e. an
+                  object has a different shape than its replacement.
+        """
+        if values is None:
+            return False
+
+        refs = cls._get_relation_refs(source, field)
+        outdated = [
+            ref
+            for ref in refs
+            if ref.get("id") in values and ref.get("@v") != values[ref["id"]]["@v"]
+        ]
+        if any(set(ref) != set(values[ref["id"]]) for ref in outdated):
+            return False
+        for ref in outdated:
+            value = deepcopy(values[ref["id"]])
+            ref.clear()
+            ref.update(value)
+        return True
+
+    @staticmethod
+    def _dereference(relation, recid, obj):
+        """Dereference a related record, as done by the record dumper."""
+        data = {"id": recid}
+        if relation.keys is None:
+            data.update(obj)
+        else:
+            for key in relation.keys:
+                try:
+                    value = dict_lookup(obj, key)
+                except KeyError:
+                    continue
+                if value:
+                    dict_set(data, key, value)
+        for attr in relation.attrs or []:
+            data[attr] = getattr(obj, attr)
+        data["@v"] = f"{obj.id}::{obj.revision_id}"
+        return data
+
+    def _get_relation_values(self, field, recids):
+        """Dereference the related records of a field, as stored in the index.
+
+        :returns: the dereferenced objects by id, or None if the field is not
+                  a PID relation of the record class.
+        """
+        relations = getattr(self.record_cls({}), "relations", None)
+        results = [getattr(relations, name) for name in relations or []]
+        relation = next((r.field for r in results if r.field.key == field), None)
+        if relation is None or not isinstance(relation, PIDRelation):
+            return None
+
+        resolved = relation.resolve_many(recids)
+        return {
+            recid: self._dereference(relation, recid, obj)
+            for recid, obj in resolved.items()
+        }
+
+    @staticmethod
+    def _partial_doc(source, fields):
+        """Partial document of the updated fields of a document source.
+
+        The partial updates merge objects but replace lists, so the fields
+        nested in lists are updated with their whole list.
+        """
+        doc = {}
+        for field in fields:
+            keys, value = [], source
+            for key in field.split("."):
+                keys.append(key)
+                value = value[key]
+                if not isinstance(value, dict):
+                    break
+            dict_set(doc, ".".join(keys), value)
+        return doc
+
+    def _update_relations_in_index(
+        self, identity, fieldpaths, recids, versions, notif_time
+    ):
+        """Update the outdated related objects in the indexed documents.
+
+        Only the updated fields (and ``indexed_at``) are written, with a
+        partial update conditional on the sequence number of the scanned
+        document. The documents written in the meantime, e.g. reindexed, are
+        fully reindexed instead of being overwritten. The content hash of the
+        documents, if any, is cleared, as the record is not dumped again. Note
+        that the updates increment the internal version of the documents.
+
+        During a migration of the index, the updates are also copied to the
+        new index (without condition, as they write the current values).
+
+        :returns: the ids of the records which must be fully reindexed.
+        """
+        values = {f: self._get_relation_values(f, recids) for f in fieldpaths}
+        extension = get_content_hash_extension(self.indexer)
+        search = (
+            self.search_request(identity, {}, self.record_cls, self.config.search)
+            .extra(seq_no_primary_term=True)
+            .query(
+                "bool",
+                minimum_should_match=1,
+                should=[dsl.Q("terms", **{f"{f}.id": recids}) for f in fieldpaths],
+            )
+            .filter("range", indexed_at={"lte": notif_time})
+        )
+
+        migration_index = getattr(self.indexer, "migration_index", None)
+        new_index = migration_index and migration_index(
+            build_alias_name(self.record_cls.index._name)
+        )
+        reindex_ids, copies = set(), []
+
+        def _actions():
+            for hit in search.scan():
+                source = hit.to_dict()
+                outdated = [
+                    f for f in fieldpaths if self._is_outdated(source, f, versions)
+                ]
+                if not outdated:
+                    continue
+                if all(self._update_relation(source, f, values[f]) for f in outdated):
+                    doc = self._partial_doc(source, outdated)
+                    if "indexed_at" in source:
+                        doc["indexed_at"] = datetime.now(timezone.utc).isoformat()
+                    if extension is not None:
+                        doc[extension.key] = None
+                    action = {
+                        "_op_type": "update",
+                        "_id": hit.meta.id,
+                        "doc": doc,
+                        **(
+                            {"_routing": hit.meta.routing}
+                            if "routing" in hit.meta
+                            else {}
+                        ),
+                    }
+                    if new_index:
+                        copies.append({**action, "_index": new_index})
+                    yield {
+                        **action,
+                        "_index": hit.meta.index,
+                        "if_seq_no": hit.meta.seq_no,
+                        "if_primary_term": hit.meta.primary_term,
+                    }
+                else:
+                    reindex_ids.add(hit.meta.id)
+
+        for ok, item in search_engine.helpers.streaming_bulk(
+            current_search_client, _actions(), raise_on_error=False
+        ):
+            if not ok:
+                # e.g. a conflict with a write since the scan
+                reindex_ids.add(item["update"]["_id"])
+        bulk_copy(current_search_client, copies)
+        return reindex_ids
+
     def on_relation_update(
         self, identity, record_type, records_info, notif_time, limit=100
     ):
         """Handles the update of a related field record.
 
+        The records referencing the updated records are searched with one
+        ``terms`` query per field (and chunk of records), and each of the
+        outdated ones is reindexed once.
+
+        With the "partial" ``relations_propagation`` mode, only the related
+        objects are replaced in the indexed documents, without dumping the
+        records again. Records where the related object changed shape are
+        still reindexed.
+
         :param identity: the identity that will search and reindex.
         :param record_type: the record type with relations.
         :param records_info: a list of tuples containing (recid, uuid, revision_id)
                              for each record to reindex.
         :param notif_time: reindex records index before this time.
-        :param limit: reindex in chunks of these records. The limit must be lower than
-                      the search engine maxClauseCount setting.
+        :param limit: number of updated records per ``terms`` query.
         :returns: True.
         """
+        self.require_permission(identity, "search")
+
         fieldpaths = self.config.relations.get(record_type, [])
-        clauses = []
-        for field in fieldpaths:
-            for record in records_info:
-                recid, uuid, revision_id = record
-                clauses.append(
-                    dsl.Q(
-                        "bool",
-                        must=[dsl.Q("term", **{f"{field}.id": recid})],
-                        must_not=[
-                            dsl.Q("term", **{f"{field}.@v": f"{uuid}::{revision_id}"})
-                        ],
-                    )
+        versions = {
+            recid: f"{uuid}::{revision_id}" for recid, uuid, revision_id in records_info
+        }
+        recids = list(versions)
+        partial = self.config.relations_propagation == "partial"
+
+        ids = set()
+        # split the list in chunks of `limit`
+        for i in range(0, len(recids), limit):
+            chunk = recids[i : i + limit]
+            if partial and fieldpaths:
+                # the documents updated by a previous chunk and not refreshed
+                # yet conflict, and are reindexed
+                ids |= self._update_relations_in_index(
+                    identity, fieldpaths, chunk, versions, notif_time
+                )
+                continue
+
+            for field in fieldpaths:
+                search = self.search_request(
+                    identity, {}, self.record_cls, self.config.search
+                ).source([f"{field}.id", f"{field}.@v"])
+                search = search.filter("terms", **{f"{field}.id": chunk}).filter(
+                    "range", indexed_at={"lte": notif_time}
                 )
 
-        filter = [dsl.Q("range", indexed_at={"lte": notif_time})]
-        # split the list in chunks of `limit`, the last chunk will have the remaining
-        chunked_clauses = [
-            clauses[i : i + limit] for i in range(0, len(clauses), limit)
-        ]
-        for chunked_clause in chunked_clauses:
-            search_query = dsl.Q(
-                "bool", minimum_should_match=1, should=chunked_clause, filter=filter
-            )
+                for hit in search.scan():
+                    if self._is_outdated(hit.to_dict(), field, versions):
+                        ids.add(hit.meta.id)
 
-            self.reindex(identity, search_query=search_query)
+        if ids:
+            self.bulk_indexer.bulk_index(sorted(ids))
         return True
 
     @unit_of_work()
@@ -668,18 +1021,26 @@ class RecordService(Service, RecordIndexerMixin):
                 records_processed.append(("create", record_dict, None, exc))
         valid_records = []
 
-        for i, (action, record, errors, exc_) in enumerate(records_processed):
-            if errors == [] and exc_ is None:
-                try:
-                    # Ideally the commit should be done in the uow,
-                    # but since we need to keep track of the errors
-                    # that might happen during the commit (e.g. relation errors)
-                    # we keep it here.
-                    record.commit()
-                    valid_records.append(record)
-                except RecordsError as exc:
-                    # If commit fails we register the error for this record
-                    records_processed[i] = (action, record, errors, exc)
+        # The relations of all records are validated against the related
+        # records resolved at once.
+        with relations_cache():
+            prefetch_relations(
+                record
+                for _, record, errors, exc_ in records_processed
+                if errors == [] and exc_ is None
+            )
+            for i, (action, record, errors, exc_) in enumerate(records_processed):
+                if errors == [] and exc_ is None:
+                    try:
+                        # Ideally the commit should be done in the uow,
+                        # but since we need to keep track of the errors
+                        # that might happen during the commit (e.g. relation
+                        # errors) we keep it here.
+                        record.commit()
+                        valid_records.append(record)
+                    except RecordsError as exc:
+                        # If commit fails we register the error for this record
+                        records_processed[i] = (action, record, errors, exc)
 
         uow.register(RecordBulkIndexOp((r.id for r in valid_records), self.indexer))
 
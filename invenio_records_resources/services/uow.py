@@ -84,6 +84,23 @@ service method (and it will commit automatically):
 
     service.publish(...)
 
+**How to batch index refreshes?**
+
+Operations such as the record deletion refresh the index, so that the changes
+are visible to the next search. Bulk and system callers can instead set a
+refresh policy on the unit of work, e.g. to refresh each index only once
+after all the records are deleted:
+
+.. code-block:: python
+
+    with UnitOfWork(refresh_policy="end") as uow:
+        for id_ in ids:
+            service.delete(system_identity, id_, uow=uow)
+        uow.commit()
+
+The units of work created by the ``unit_of_work`` decorator, and without an
+explicit policy, use the ``RECORDS_RESOURCES_INDEX_REFRESH_POLICY`` policy.
+
 **Writing your own operation?**
 
 You can write your own unit of work operation by subclassing the operation
@@ -98,26 +115,278 @@ class and implementing the desired methods:
             # ... executed after the database transaction commit ...
 """
 
+from functools import wraps
+
 from celery import current_app
+from flask import current_app as flask_current_app
+from invenio_db import db
 
 # backwards compatible imports
-from invenio_db.uow import (
-    ModelCommitOp,
-    ModelDeleteOp,
-    Operation,
-    UnitOfWork,
-    unit_of_work,
+from invenio_db.uow import ModelCommitOp, ModelDeleteOp, Operation
+from invenio_db.uow import UnitOfWork as _UnitOfWork
+from invenio_search.engine import search
+
+from ..indexer import (
+    bulk_copy,
+    filter_unchanged,
+    get_content_hash_extension,
+    migration_actions,
+    notify_writes,
+    parallel_bulk_index,
 )
-
-from ..tasks import send_change_notifications
+from ..tasks import notify_changes
 
 __all__ = ["ModelCommitOp", "ModelDeleteOp", "Operation", "UnitOfWork", "unit_of_work"]
 
 
+class UnitOfWork(_UnitOfWork):
+    """Unit of work with an index buffer and an index refresh policy.
+
+    The index operations of the unit of work are buffered, and sent once all
+    the operations are committed (see :class:`IndexBuffer`).
+
+    The refresh policy applies to the index operations of the unit of work:
+
+    - ``"operation"``: refresh as requested by each operation (default).
+    - ``"none"``: never refresh.
+    - ``"wait_for"``: wait for the next periodic refresh of the indices.
+    - ``"end"``: refresh each index written to once, after the commit.
+    """
+
+    refresh_policies = ("operation", "none", "wait_for", "end")
+
+    def __init__(self, session=None, refresh_policy=None):
+        """Initialize unit of work context.
+
+        :param refresh_policy: index refresh policy, defaults to
+            ``RECORDS_RESOURCES_INDEX_REFRESH_POLICY``.
+        """
+        if refresh_policy is None:
+            refresh_policy = flask_current_app.config[
+                "RECORDS_RESOURCES_INDEX_REFRESH_POLICY"
+            ]
+        if refresh_policy not in self.refresh_policies:
+            raise ValueError(f"Invalid index refresh policy: {refresh_policy}")
+        super().__init__(session=session)
+        self.refresh_policy = refresh_policy
+        self.index_buffer = IndexBuffer()
+
+    def commit(self):
+        """Commit the unit of work."""
+        self.session.commit()
+        # Run commit operations
+        for op in self._operations:
+            op.on_commit(self)
+        # Send the buffered index operations
+        self.index_buffer.flush(self.refresh_policy)
+        # Run post commit operations
+        for op in self._operations:
+            op.on_post_commit(self)
+        self.index_buffer.refresh(self)
+        self._mark_dirty()
+
+
+def unit_of_work(**kwargs):
+    """Decorator to auto-inject a unit of work if not provided.
+
+    If no unit of work is provided, this decorator will create a new unit of
+    work (see :class:`UnitOfWork`) and commit it after the function has been
+    executed.
+
+    .. code-block:: python
+
+        @unit_of_work()
+        def aservice_method(self, ...., uow=None):
+            # ...
+            uow.register(...)
+
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def inner(self, *args, **kwargs):
+            if "uow" not in kwargs or kwargs["uow"] is None:
+                # Migration path - start a UoW and commit
+                with UnitOfWork(db.session) as uow:
+                    kwargs["uow"] = uow
+                    res = f(self, *args, **kwargs)
+                    uow.commit()
+                    return res
+            else:
+                return f(self, *args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+#
+# Index buffer
+#
+class IndexBuffer:
+    """Buffer of the index operations of a unit of work.
+
+    The operations are collapsed per index and record id to the last one
+    registered, and sent in a single bulk request per search client. The
+    request is refreshed according to the refresh policy of the unit of work
+    (see :class:`UnitOfWork`).
+
+    The bulk actions are built by the ``index_action`` and ``delete_action``
+    methods of the indexers (see
+    :class:`invenio_records_resources.indexer.RecordIndexer`). The operations
+    of other indexers, and a single operation, are sent with ``indexer.index``
+    and ``indexer.delete``.
+    """
+
+    _refresh_strength = {False: 0, "wait_for": 1, True: 2}
+
+    def __init__(self):
+        """Constructor."""
+        self._operations = {}
+        self._refresh = False
+        self._refresh_ops = {}
+
+    def add(self, op_type, indexer, record, refresh=False):
+        """Buffer an index or delete operation of a record."""
+        index = indexer.record_to_index(record)
+        key = (id(indexer.client), index, str(record.id))
+        # re-insert to keep the order of the last operations
+        self._operations.pop(key, None)
+        self._operations[key] = (op_type, indexer, record, index)
+        if self._refresh_strength[refresh] > self._refresh_strength[self._refresh]:
+            self._refresh = refresh
+
+    def _send(self, op_type, indexer, record, refresh):
+        """Send an operation on its own."""
+        if op_type == "index":
+            arguments = {"refresh": refresh} if refresh else {}
+            indexer.index(record, arguments=arguments)
+        else:
+            indexer.delete(record, refresh=refresh)
+
+    def _actions(self, operations):
+        """Create the bulk actions of operations, except the unchanged documents."""
+        actions = [
+            (
+                indexer,
+                (
+                    indexer.index_action(record)
+                    if op_type == "index"
+                    else indexer.delete_action(record)
+                ),
+            )
+            for op_type, indexer, record, _ in operations
+        ]
+
+        documents = {}
+        for indexer, action in actions:
+            if action["_op_type"] == "index" and get_content_hash_extension(indexer):
+                documents.setdefault(indexer, []).append(
+                    (
+                        action["_index"],
+                        action["_id"],
+                        action["_source"],
+                        action.get("_routing"),
+                    )
+                )
+        unchanged = set()
+        for indexer, indexer_documents in documents.items():
+            changed = {
+                (index, id_)
+                for index, id_, _, _ in filter_unchanged(indexer, indexer_documents)
+            }
+            unchanged.update(
+                (index, id_)
+                for index, id_, _, _ in indexer_documents
+                if (index, id_) not in changed
+            )
+        return [
+            (indexer, action)
+            for indexer, action in actions
+            if (action["_index"], action["_id"]) not in unchanged
+        ]
+
+    def _get_refresh(self, policy, operations):
+        """Get the refresh of the request, according to a refresh policy."""
+        if policy == "operation":
+            return self._refresh
+        if policy == "wait_for":
+            return "wait_for"
+        if policy == "end":
+            for _, indexer, _, index in operations:
+                key = (id(indexer.client), index)
+                self._refresh_ops.setdefault(key, IndexRefreshOp(indexer, index=index))
+        return False
+
+    def flush(self, policy="operation"):
+        """Send the buffered operations."""
+        operations = list(self._operations.values())
+        refresh = self._get_refresh(policy, operations)
+        self._operations.clear()
+        self._refresh = False
+
+        bulk_operations = []
+        for op_type, indexer, record, index in operations:
+            if not hasattr(indexer, "index_action") or (
+                len(operations) == 1 and not get_content_hash_extension(indexer)
+            ):
+                self._send(op_type, indexer, record, refresh)
+            else:
+                bulk_operations.append((op_type, indexer, record, index))
+
+        indexer_actions = {}
+        for indexer, action in self._actions(bulk_operations):
+            indexer_actions.setdefault(indexer, []).append(action)
+
+        clients = {}
+        for indexer, actions in indexer_actions.items():
+            _, client_actions, copies = clients.setdefault(
+                id(indexer.client), (indexer.client, [], [])
+            )
+            # the copies of the documents with a previous routing
+            actions = actions + indexer.stale_copies(actions)
+            client_actions.extend(actions)
+            # the copies of the writes to the indices being migrated
+            copies.extend(migration_actions(indexer, actions))
+        kwargs = {"refresh": refresh} if refresh else {}
+        for client, actions, copies in clients.values():
+            search.helpers.bulk(client, actions, **kwargs)
+            bulk_copy(client, copies)
+        for indexer, actions in indexer_actions.items():
+            notify_writes(indexer, [action["_index"] for action in actions])
+
+    def refresh(self, uow):
+        """Refresh each index written to, once (with the "end" policy)."""
+        refresh_ops = list(self._refresh_ops.values())
+        self._refresh_ops.clear()
+        for op in refresh_ops:
+            op.on_post_commit(uow)
+
+
+class IndexBufferMixin:
+    """Buffer the index operation of an operation in the unit of work.
+
+    The operations registered in a unit of work without an index buffer, e.g.
+    the one of invenio-db, or not registered, index the record immediately.
+    """
+
+    def _commit_index_op(self, uow, op_type, refresh):
+        """Buffer the operation, or send it if there is no buffer."""
+        if self._indexer is None:
+            return
+        buffer = getattr(uow, "index_buffer", None)
+        if buffer is None:
+            buffer = IndexBuffer()
+            buffer.add(op_type, self._indexer, self._record, refresh=refresh)
+            buffer.flush()
+        else:
+            buffer.add(op_type, self._indexer, self._record, refresh=refresh)
+
+
 #
 # Unit of work operations
 #
-class RecordCommitOp(Operation):
+class RecordCommitOp(IndexBufferMixin, Operation):
     """Record commit operation with indexing."""
 
     def __init__(self, record, indexer=None, index_refresh=False):
@@ -132,9 +401,7 @@ class RecordCommitOp(Operation):
 
     def on_commit(self, uow):
         """Run the operation."""
-        if self._indexer is not None:
-            arguments = {"refresh": True} if self._index_refresh else {}
-            self._indexer.index(self._record, arguments=arguments)
+        self._commit_index_op(uow, "index", self._index_refresh)
 
 
 class RecordIndexOp(RecordCommitOp):
@@ -148,22 +415,32 @@ class RecordIndexOp(RecordCommitOp):
 class RecordBulkIndexOp(Operation):
     """Record bulk indexing operation."""
 
-    def __init__(self, records_iter, indexer=None):
+    def __init__(self, records_iter, indexer=None, sync=None):
         """Initialize the records bulk index operation.
 
         :param records_iter: iterable of record ids.
         :param indexer: indexer instance.
+        :param sync: index the records directly instead of through the
+            indexer queue. Defaults to ``RECORDS_RESOURCES_BULK_INDEX_SYNC``.
         """
         self._records_iter = records_iter
         self._indexer = indexer
+        self._sync = sync
 
     def on_post_commit(self, uow):
         """Run bulk indexing as one of the last operations."""
-        if self._indexer is not None:
+        if self._indexer is None:
+            return
+        sync = self._sync
+        if sync is None:
+            sync = flask_current_app.config["RECORDS_RESOURCES_BULK_INDEX_SYNC"]
+        if sync:
+            parallel_bulk_index(self._indexer, self._records_iter)
+        else:
             self._indexer.bulk_index(self._records_iter)
 
 
-class RecordDeleteOp(Operation):
+class RecordDeleteOp(IndexBufferMixin, Operation):
     """Record removal operation."""
 
     def __init__(self, record, indexer=None, force=False, index_refresh=False):
@@ -179,8 +456,7 @@ class RecordDeleteOp(Operation):
 
     def on_commit(self, uow):
         """Delete from index."""
-        if self._indexer is not None:
-            self._indexer.delete(self._record, refresh=self._index_refresh)
+        self._commit_index_op(uow, "delete", self._index_refresh)
 
 
 class RecordIndexDeleteOp(RecordDeleteOp):
@@ -245,16 +521,35 @@ class TaskRevokeOp(Operation):
 
 
 class ChangeNotificationOp(Operation):
-    """A change notification operation."""
+    """A change notification operation.
+
+    The notifications of the same record type in a unit of work are merged
+    into a single one.
+    """
 
     def __init__(self, record_type, records):
         """Constructor."""
         self._record_type = record_type
-        self._records = records
+        self._records = list(records)
+        self._merged = False
+
+    def on_register(self, uow):
+        """Merge into a notification of the same record type, if any."""
+        for op in uow._operations:
+            if (
+                isinstance(op, ChangeNotificationOp)
+                and op._record_type == self._record_type
+                and not op._merged
+            ):
+                op._records.extend(self._records)
+                self._merged = True
+                return
 
     def on_post_commit(self, uow):
         """Send the notification (run celery task)."""
-        send_change_notifications.delay(
+        if self._merged:
+            return
+        notify_changes(
             self._record_type,
             [(r.pid.pid_value, str(r.id), r.revision_id) for r in self._records],
         )
@@ -0,0 +1,22 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Signals of the records resources."""
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+index_written = _signals.signal("index-written")
+"""Signal sent after documents were written to an index.
+
+The sender is the record indexer, and two keyword arguments are provided:
+
+- ``index``: the name of the index written to.
+- ``count``: the number of documents indexed or deleted.
+
+The signal is sent by the writes of
+:class:`invenio_records_resources.indexer.RecordIndexer`: single writes, the
+bulk requests of the units of work, of the indexer queue and of
+:func:`invenio_records_resources.indexer.parallel_bulk_index`.
+"""
@@ -4,6 +4,7 @@
 
 """Celery tasks for async processing."""
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from celery import current_app as current_celery_app
@@ -13,8 +14,17 @@ from invenio_access.permissions import system_identity
 from invenio_indexer.proxies import current_indexer_registry
 from invenio_indexer.tasks import process_bulk_queue
 from invenio_pidstore.errors import PIDDoesNotExistError
+from invenio_search import current_search_client
+from kombu import Exchange, Producer, Queue
+from kombu.compat import Consumer
 from sqlalchemy.orm.exc import NoResultFound
 
+from .indexer import (
+    dead_letter_queue,
+    parallel_bulk_index,
+    queue_autoscaler,
+    running_consumers,
+)
 from .proxies import current_notifications_registry, current_service_registry
 
 
@@ -64,20 +74,197 @@ def send_change_notifications(record_type, records_info):
     task_start = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
 
     handlers = current_notifications_registry.get(record_type)
-    for notif_handler in handlers:
-        notif_handler(system_identity, record_type, records_info, task_start)
+    max_workers = current_app.config["RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WORKERS"]
+    if len(handlers) < 2 or max_workers < 2:
+        for notif_handler in handlers:
+            notif_handler(system_identity, record_type, records_info, task_start)
+        return
+
+    # run the handlers in parallel, each in its own application context
+    app = current_app._get_current_object()
+
+    def _run(notif_handler):
+        with app.app_context():
+            notif_handler(system_identity, record_type, records_info, task_start)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(handlers))) as executor:
+        futures = [executor.submit(_run, h) for h in handlers]
+        # raise the errors of the handlers
+        for future in futures:
+            future.result()
+
+
+def merge_records_info(records_info):
+    """Merge the info of changed records, keeping their latest revision."""
+    merged = {}
+    for pid_value, record_id, revision_id in records_info:
+        latest = merged.get(record_id)
+        if latest is None or (revision_id or 0) > (latest[2] or 0):
+            merged[record_id] = (pid_value, record_id, revision_id)
+    return list(merged.values())
+
+
+def _change_notifications_queue():
+    """Get the queue of the coalesced change notifications."""
+    name = current_app.config["RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_QUEUE"]
+    return Queue(name, exchange=Exchange(name, type="direct"), routing_key=name)
+
+
+def notify_changes(record_type, records_info):
+    """Notify the handlers of a record type about changed records.
+
+    The notifications are coalesced during
+    ``RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WINDOW`` seconds if set.
+    """
+    records_info = merge_records_info(records_info)
+    window = current_app.config["RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WINDOW"]
+    if not window:
+        send_change_notifications.delay(record_type, records_info)
+        return
+
+    queue = _change_notifications_queue()
+    with current_celery_app.pool.acquire(block=True) as conn:
+        producer = Producer(
+            conn,
+            exchange=queue.exchange,
+            routing_key=queue.routing_key,
+            auto_declare=True,
+        )
+        producer.publish(
+            {"record_type": record_type, "records": records_info},
+            declare=[queue],
+            serializer="json",
+        )
+    # the first task sends all the notifications of the window, the next ones
+    # only find the notifications queued after it
+    process_change_notifications.apply_async(countdown=window)
+
+
+@shared_task(ignore_result=True)
+def process_change_notifications():
+    """Send the queued change notifications, merged by record type."""
+    queue = _change_notifications_queue()
+    with current_celery_app.pool.acquire(block=True) as conn:
+        consumer = Consumer(
+            connection=conn,
+            queue=queue.name,
+            exchange=queue.exchange.name,
+            routing_key=queue.routing_key,
+        )
+        messages = list(consumer.iterqueue())
+
+        records_info = {}
+        for message in messages:
+            payload = message.decode()
+            records_info.setdefault(payload["record_type"], []).extend(
+                payload["records"]
+            )
+
+        try:
+            for record_type, info in records_info.items():
+                send_change_notifications(record_type, merge_records_info(info))
+        except Exception:
+            for message in messages:
+                message.requeue()
+            raise
+        else:
+            for message in messages:
+                message.ack()
+        finally:
+            consumer.close()
+
+
+@shared_task(ignore_result=True)
+def replay_dead_letter_index():
+    """Index again the records which failed to be bulk indexed.
+
+    Records failing again are sent back to the dead-letter queue.
+    """
+    indexers = {
+        indexer.mq_routing_key: indexer
+        for indexer in current_indexer_registry.all().values()
+    }
+    queue = dead_letter_queue()
+    with current_celery_app.pool.acquire(block=True) as conn:
+        consumer = Consumer(
+            connection=conn,
+            queue=queue.name,
+            exchange=queue.exchange.name,
+            routing_key=queue.routing_key,
+        )
+        messages = list(consumer.iterqueue())
+
+        record_ids, unknown = {}, []
+        for message in messages:
+            payload = message.decode()
+            if payload["indexer"] in indexers:
+                record_ids.setdefault(payload["indexer"], []).extend(payload["ids"])
+            else:
+                unknown.append(message)
+
+        try:
+            for name, ids in record_ids.items():
+                parallel_bulk_index(indexers[name], dict.fromkeys(ids))
+        except Exception:
+            for message in messages:
+                message.requeue()
+            raise
+        else:
+            for message in messages:
+                if message in unknown:
+                    message.requeue()
+                else:
+                    message.ack()
+        finally:
+            consumer.close()
 
 
 @shared_task(ignore_result=True)
 def manage_indexer_queues():
-    """Peeks into queues and spawns bulk indexers."""
+    """Peeks into queues and spawns bulk indexers.
+
+    The number of consumers of each queue is adapted to its backlog and drain
+    rate, and no consumer is spawned while the search cluster is overloaded
+    (see :class:`~invenio_records_resources.indexer.QueueAutoscaler`).
+
+    The queues of the interactive operations are served first. The bulk
+    queues of the services (see ``indexer_bulk_queue_name``), where the
+    reindexing and relations propagation are sent, share at most
+    ``RECORDS_RESOURCES_INDEXER_BULK_MAX_CONSUMERS`` consumers.
+    """
+    config = current_app.config
     channel = current_celery_app.connection().channel()
     indexers = current_indexer_registry.all()
+    max_bulk_consumers = config["RECORDS_RESOURCES_INDEXER_BULK_MAX_CONSUMERS"]
+    bulk_queues = {
+        getattr(service.config, "indexer_bulk_queue_name", None)
+        for service in current_service_registry.all().values()
+    }
+    overloaded = queue_autoscaler.cluster_overloaded(
+        current_search_client, config["RECORDS_RESOURCES_INDEXER_MAX_LATENCY"]
+    )
 
+    queues, bulk_consumers = [], 0
     for name, indexer in indexers.items():
         queue = indexer.mq_queue.bind(channel)
-        _, num_messages, num_consumers = queue.queue_declare()
-        max_consumers = current_app.config["INDEXER_MAX_BULK_CONSUMERS"]
+        _, num_messages, _ = queue.queue_declare()
+        num_consumers = running_consumers(queue.name)
+        is_bulk = queue.name in bulk_queues
+        if is_bulk:
+            bulk_consumers += num_consumers
+        consumers = queue_autoscaler.consumers(
+            queue.name, num_messages, num_consumers, config
+        )
+        queues.append((is_bulk, name, consumers))
+
+    if overloaded:
+        current_app.logger.warning("Search cluster overloaded, no indexer spawned.")
+        return
 
-        if num_messages > 0 and num_consumers < max_consumers:
+    # the interactive queues first
+    for is_bulk, name, consumers in sorted(queues, key=lambda q: q[0]):
+        if is_bulk:
+            consumers = min(consumers, max(max_bulk_consumers - bulk_consumers, 0))
+            bulk_consumers += consumers
+        for _ in range(consumers):
             process_bulk_queue.delay(indexer_name=name)
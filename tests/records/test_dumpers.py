@@ -6,8 +6,12 @@
 from copy import deepcopy
 
 import pytest
+from invenio_records.dumpers import SearchDumper
 
-from invenio_records_resources.records.dumpers import CustomFieldsDumperExt
+from invenio_records_resources.records.dumpers import (
+    ContentHashDumperExt,
+    CustomFieldsDumperExt,
+)
 from invenio_records_resources.services.custom_fields import (
     EDTFDateStringCF,
     ISODateStringCF,
@@ -68,3 +72,29 @@ def test_custom_field_dumperext(record_with_cfs):
     # load
     dumper.load(data=record_with_cfs, record_cls=None)
     assert record_with_cfs["custom_fields"] == expected_load_data
+
+
+def test_content_hash_dumperext(base_app, db):
+    """The hash only changes with the content of the record."""
+    dumper = SearchDumper(extensions=[ContentHashDumperExt()])
+    record = Record.create({"metadata": {"title": "test"}})
+    record.commit()
+    db.session.commit()
+    dumped = record.dumps(dumper=dumper)
+
+    # a save without changes
+    record.commit()
+    db.session.commit()
+    assert record.dumps(dumper=dumper)["content_hash"] == dumped["content_hash"]
+
+    record["metadata"]["title"] = "new title"
+    assert record.dumps(dumper=dumper)["content_hash"] != dumped["content_hash"]
+
+    # a new version of a related record, with the same dereferenced fields
+    extension = ContentHashDumperExt()
+    data = {"metadata": {"inner_record": {"id": "1", "title": "a", "@v": "a::1"}}}
+    extension.update(data)
+    new_data = deepcopy(data)
+    new_data["metadata"]["inner_record"]["@v"] = "a::2"
+    extension.update(new_data)
+    assert new_data["content_hash"] == data["content_hash"]
@@ -103,3 +103,13 @@ def test_session_merge(base_app, db, example_record):
     Record.pid.session_merge(record)
     assert inspect(record.pid).persistent is True
     assert inspect(record.conceptpid).persistent is False
+
+
+def test_resolve_many(base_app, db, example_record):
+    """Test resolving many identifiers at once."""
+    pid_value = example_record.pid.pid_value
+    resolved = Record.pid.resolve_many([pid_value, "does-not-exist"])
+    assert list(resolved) == [pid_value]
+    assert resolved[pid_value] == Record.get_record(example_record.id)
+    assert resolved[pid_value].pid.pid_value == pid_value
+    assert Record.pid.resolve_many([]) == {}
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""PID relations tests."""
+
+import pytest
+from invenio_records.systemfields import RelationsField
+from invenio_records.systemfields.relations import InvalidRelationValue
+
+from invenio_records_resources.records.systemfields import (
+    PIDListRelation,
+    PIDNestedListRelation,
+    dereference_relations,
+    relations_cache,
+)
+from invenio_records_resources.records.systemfields.pid import PIDFieldContext
+from tests.mock_module.api import Record, RecordWithRelations
+
+
+def _create(db, record_cls, data):
+    """Create a record."""
+    record = record_cls.create(data)
+    record.commit()
+    db.session.commit()
+    return record
+
+
+def test_dereference_relations(base_app, db, mocker):
+    """Relations of many records are resolved at once."""
+    related = [
+        _create(db, Record, {"metadata": {"title": f"Related {i}"}}) for i in range(2)
+    ]
+    records = [
+        _create(
+            db,
+            RecordWithRelations,
+            {"metadata": {"inner_record": {"id": r.pid.pid_value}}},
+        )
+        for r in related + related[:1]
+    ]
+
+    records = [RecordWithRelations.get_record(r.id) for r in records]
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    resolve_many = mocker.spy(PIDFieldContext, "resolve_many")
+    dereference_relations(records)
+
+    assert resolve.call_count == 0
+    assert resolve_many.call_count == 1
+    for record, r in zip(records, related + related[:1]):
+        inner_record = record["metadata"]["inner_record"]
+        assert inner_record["metadata"]["title"] == r["metadata"]["title"]
+        assert inner_record["@v"] == f"{r.id}::{r.revision_id}"
+
+
+def test_relations_cache(base_app, db, mocker):
+    """Related records are resolved once within a relations cache block."""
+    related = _create(db, Record, {"metadata": {"title": "Related"}})
+    data = {"metadata": {"inner_record": {"id": related.pid.pid_value}}}
+    ids = [_create(db, RecordWithRelations, data).id for _ in range(2)]
+
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    with relations_cache():
+        for id_ in ids:
+            record = RecordWithRelations.get_record(id_)
+            record.relations.dereference()
+            assert record["metadata"]["inner_record"]["metadata"]["title"] == "Related"
+    assert resolve.call_count == 1
+
+
+def test_validate_relations(base_app, db, mocker):
+    """Relations are validated with set-based existence checks."""
+    related = _create(db, Record, {"metadata": {"title": "Related"}})
+    pid_value = related.pid.pid_value
+
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    record = RecordWithRelations.create(
+        {"metadata": {"inner_record": {"id": pid_value}}}
+    )
+    record.commit()
+    assert resolve.call_count == 0
+
+    record["metadata"]["inner_record"]["id"] = "invalid"
+    with pytest.raises(InvalidRelationValue):
+        record.commit()
+
+
+class RecordWithListRelations(Record):
+    """Record with list and nested list relations."""
+
+    relations = RelationsField(
+        list=PIDListRelation(
+            "metadata.list", keys=["metadata.title"], pid_field=Record.pid
+        ),
+        nested=PIDNestedListRelation(
+            "metadata.nested", keys=["metadata.title"], pid_field=Record.pid
+        ),
+    )
+
+
+def test_validate_list_relations(base_app, db, mocker):
+    """The ids of list and nested list relations are checked at once."""
+    pid_values = [
+        _create(db, Record, {"metadata": {"title": f"Related {i}"}}).pid.pid_value
+        for i in range(2)
+    ]
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    resolve_many = mocker.spy(PIDFieldContext, "resolve_many")
+
+    record = RecordWithListRelations.create(
+        {
+            "metadata": {
+                "list": [{"id": v} for v in pid_values],
+                "nested": [[{"id": pid_values[0]}], [{"id": pid_values[1]}]],
+            }
+        }
+    )
+    record.commit()
+    assert resolve.call_count == 0
+    assert [set(c.args[1]) for c in resolve_many.call_args_list] == [
+        set(pid_values),
+        set(pid_values),
+    ]
+
+    record["metadata"]["nested"][1].append({"id": "invalid"})
+    with pytest.raises(InvalidRelationValue):
+        record.commit()
+
+
+def test_resolve_many_redirected(base_app, db):
+    """Redirected PIDs are not resolved, as with a single resolve."""
+    merged, target = [
+        _create(db, Record, {"metadata": {"title": f"Record {i}"}}) for i in range(2)
+    ]
+    merged.pid.redirect(target.pid)
+    db.session.commit()
+
+    resolved = Record.pid.resolve_many([merged.pid.pid_value, target.pid.pid_value])
+    assert {k: r.id for k, r in resolved.items()} == {target.pid.pid_value: target.id}
+
+    # a relation to a redirected record is invalid
+    record = RecordWithRelations.create(
+        {"metadata": {"inner_record": {"id": merged.pid.pid_value}}}
+    )
+    with pytest.raises(InvalidRelationValue):
+        record.commit()
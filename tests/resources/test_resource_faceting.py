@@ -296,3 +296,19 @@ def test_links_keep_repeated_facets(client, headers, three_indexed_records):
     }
     for key, url in expected_links.items():
         assert url == response_links[key]
+
+
+def test_facets_modes(client, headers, three_indexed_records):
+    response = client.get("/mocks?facets_mode=none", headers=headers)
+    assert response.status_code == 200
+    assert "aggregations" not in response.json
+    assert len(response.json["hits"]["hits"]) == 3
+
+    response = client.get("/mocks?facets_mode=only&type=A", headers=headers)
+    assert response.status_code == 200
+    assert response.json["hits"]["hits"] == []
+    assert response.json["hits"]["total"] == 2
+    assert response.json["aggregations"]["type"]["buckets"][0]["is_selected"]
+
+    response = client.get("/mocks?facets_mode=invalid", headers=headers)
+    assert response.status_code == 400
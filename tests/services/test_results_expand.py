@@ -3,7 +3,17 @@
 
 """Test expand referenced records Service layer RecordItem."""
 
-from invenio_records_resources.services.records.results import ExpandableField
+import time
+
+from flask import g, has_request_context
+from invenio_access.permissions import system_identity
+
+from invenio_records_resources.cache import TTLCache
+from invenio_records_resources.services.records import results
+from invenio_records_resources.services.records.results import (
+    ExpandableField,
+    FieldsResolver,
+)
 from tests.mock_module.api import Record
 
 MOCK_USER = {"id": 3, "profile": {"full_name": "John Doe"}}
@@ -314,3 +324,120 @@ def test_result_item_fields_expansion(app, db, service, identity_simple):
             },
         }
     }
+
+
+class CountingService(MockedService):
+    def __init__(self, id_, return_values):
+        self.id = id_
+        self.return_values = return_values
+        self.calls = []
+
+    def read_many(self, identity, ids):
+        self.calls.append(sorted(ids))
+        hits = [self.return_values[id_] for id_ in ids if id_ in self.return_values]
+        return type("obj", (object,), {"hits": hits})
+
+
+def test_fields_resolver_cache(base_app, identity_simple):
+    users = CountingService("users", {3: MOCK_USER})
+    entities = CountingService("entities", {"ABC": MOCK_ENTITY})
+
+    class ReferencedField(CreatedByExpandableField):
+        def get_value_service(self, value):
+            if value.get("user"):
+                return value["user"], users
+            return value["entity"], entities
+
+    hits = [
+        {"created_by": {"user": 3}, "owner": {"user": 3}},
+        {"created_by": {"entity": "ABC"}, "owner": {"user": 4}},
+    ]
+    cache = TTLCache()
+
+    def expand(identity):
+        fields = [ReferencedField("created_by"), ReferencedField("owner")]
+        resolver = FieldsResolver(fields, cache=cache)
+        resolver.resolve(identity, hits)
+        return [resolver.expand(identity, hit) for hit in hits]
+
+    expected = [
+        {
+            "created_by": {"id": 3, "full_name": "John Doe"},
+            "owner": {"id": 3, "full_name": "John Doe"},
+        },
+        {"created_by": {"id": "ABC", "title": "My title"}},
+    ]
+    assert expand(system_identity) == expected
+    assert users.calls == [[3, 4]]
+    assert entities.calls == [["ABC"]]
+
+    # only the ghost value is fetched again
+    assert expand(system_identity) == expected
+    assert users.calls == [[3, 4], [4]]
+    assert entities.calls == [["ABC"]]
+
+    # the records are cached per identity
+    assert expand(identity_simple) == expected
+    assert users.calls == [[3, 4], [4], [3, 4]]
+
+    # the cached records are not shared with the results
+    expand(system_identity)[0]["created_by"]["full_name"] = "Changed"
+    assert expand(system_identity) == expected
+
+
+def test_fields_resolver_concurrency(base_app, mocker):
+    """The services are called concurrently only within a request."""
+    users = CountingService("users", {3: MOCK_USER})
+    entities = CountingService("entities", {"ABC": MOCK_ENTITY})
+    grouped_values = {users: {3}, entities: {"ABC"}}
+    resolver = FieldsResolver([])
+    executor = mocker.spy(results, "ThreadPoolExecutor")
+
+    with base_app.app_context():
+        resolver._read_all(system_identity, grouped_values)
+    executor.assert_not_called()
+
+    with base_app.test_request_context():
+        g.marker = "request"
+        users.read_many = lambda identity, ids: type(
+            "obj", (object,), {"hits": [g.marker]}
+        )
+        assert resolver._read_all(system_identity, grouped_values)[0] == (
+            users,
+            ["request"],
+        )
+    executor.assert_called_once()
+
+
+def test_fields_resolver_concurrency_latencies(base_app):
+    """Services with different latencies are called in separate contexts."""
+
+    class SlowService(CountingService):
+        def __init__(self, id_, return_values, latency):
+            super().__init__(id_, return_values)
+            self.latency = latency
+
+        def read_many(self, identity, ids):
+            time.sleep(self.latency)
+            assert not has_request_context()
+            hits = [{**self.return_values[id_], "marker": g.marker} for id_ in ids]
+            return type("obj", (object,), {"hits": hits})
+
+    services = [
+        SlowService(f"service-{i}", {i: {"id": i}}, latency)
+        for i, latency in enumerate([0.05, 0.01, 0.03])
+    ]
+    resolver = FieldsResolver([])
+
+    for _ in range(5):
+        with base_app.test_request_context():
+            g.marker = "request"
+            read = resolver._read_all(
+                system_identity, {service: {i} for i, service in enumerate(services)}
+            )
+            assert read == [
+                (service, [{"id": i, "marker": "request"}])
+                for i, service in enumerate(services)
+            ]
+            # the request is still usable once the workers are done
+            assert has_request_context() and g.marker == "request"
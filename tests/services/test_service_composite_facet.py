@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Composite terms facet tests."""
+
+from invenio_access.permissions import system_identity
+from invenio_search.engine import dsl
+
+from invenio_records_resources.services import SearchOptions
+from invenio_records_resources.services.records.facets import CompositeTermsFacet
+from invenio_records_resources.services.records.params import FacetsParam
+
+
+class CompositeSearchOptions(SearchOptions):
+    """Search options for composite facet tests."""
+
+    facets = {
+        "keywords": CompositeTermsFacet(
+            field="metadata.keywords", label="Keywords", size=2
+        )
+    }
+
+
+def _search(facets):
+    """Build a search with the facets parameters."""
+    params = {"facets": facets}
+    return FacetsParam(CompositeSearchOptions).apply(
+        system_identity, dsl.Search(), params
+    )
+
+
+def _response(search, aggregations):
+    """Build a response for the search."""
+    raw = {"hits": {"hits": [], "total": {"value": 0}}, "aggregations": aggregations}
+    return search._response_class(search, raw)
+
+
+def test_composite_facet_aggregation():
+    """First page without cursor."""
+    search = _search({"keywords": ["physics"]})
+    assert search.to_dict()["aggs"]["keywords"] == {
+        "composite": {
+            "size": 2,
+            "sources": [{"key": {"terms": {"field": "metadata.keywords"}}}],
+        }
+    }
+
+    response = _response(
+        search,
+        {
+            "keywords": {
+                "after_key": {"key": "physics"},
+                "buckets": [
+                    {"key": {"key": "chemistry"}, "doc_count": 3},
+                    {"key": {"key": "physics"}, "doc_count": 5},
+                ],
+            }
+        },
+    )
+    assert response.labelled_facets.to_dict()["keywords"] == {
+        "after_key": "physics",
+        "label": "Keywords",
+        "buckets": [
+            {
+                "key": "chemistry",
+                "doc_count": 3,
+                "label": "chemistry",
+                "is_selected": False,
+            },
+            {"key": "physics", "doc_count": 5, "label": "physics", "is_selected": True},
+        ],
+    }
+
+
+def test_composite_facet_cursor():
+    """Next page of values starting with a prefix."""
+    search = _search({"keywords.after": ["physics"], "keywords.prefix": ["ph"]})
+    assert search.to_dict()["aggs"]["keywords"] == {
+        "filter": {"prefix": {"metadata.keywords": "ph"}},
+        "aggs": {
+            "inner": {
+                "composite": {
+                    "size": 2,
+                    "sources": [
+                        {
+                            "key": {
+                                "terms": {
+                                    "script": {
+                                        "source": CompositeTermsFacet.prefix_script,
+                                        "params": {
+                                            "field": "metadata.keywords",
+                                            "prefix": "ph",
+                                        },
+                                    }
+                                }
+                            }
+                        }
+                    ],
+                    "after": {"key": "physics"},
+                }
+            }
+        },
+    }
+
+    response = _response(
+        search,
+        {
+            "keywords": {
+                "doc_count": 4,
+                "inner": {
+                    "after_key": {"key": "photonics"},
+                    "buckets": [{"key": {"key": "photonics"}, "doc_count": 4}],
+                },
+            }
+        },
+    )
+    assert response.facets.to_dict()["keywords"] == {
+        "after_key": "photonics",
+        "buckets": [{"key": "photonics", "doc_count": 4, "is_selected": False}],
+    }
@@ -465,3 +465,19 @@ def test_date_facet_format_bound():
     )
     facet.prepare_aggregation(["1000..1800"])
     assert facet._effective_bounds() == {"min": "1000", "max": "1800"}
+
+
+def test_date_facet_is_filtered(mocker):
+    """Filter values are normalized once for all the buckets."""
+    facet = DateFacet(field="date", label="Date")
+    filter_values = ["(2014..2016]", "2020", "invalid"]
+    normalize = mocker.spy(facet, "_normalize_value")
+
+    is_filtered = facet.get_is_filtered(filter_values)
+    years = [str(year) for year in range(2013, 2022)]
+    selected = [year for year in years if is_filtered(year)]
+
+    assert selected == ["2015", "2016", "2020"]
+    assert normalize.call_count == len(filter_values)
+    assert selected == [y for y in years if facet.is_filtered(y, filter_values)]
+    assert not is_filtered("not-a-year")
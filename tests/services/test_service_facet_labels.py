@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Facet labels tests."""
+
+import pytest
+
+from invenio_records_resources.records.systemfields.pid import PIDFieldContext
+from invenio_records_resources.services.records.facets import RecordRelationLabels
+from tests.mock_module.api import Record, RecordWithRelations
+
+
+@pytest.fixture()
+def related_records(db):
+    """Records to which relations point."""
+    records = []
+    for title in ["Foo", "Bar"]:
+        record = Record.create({"metadata": {"title": title}})
+        record.commit()
+        records.append(record)
+    db.session.commit()
+    return records
+
+
+def test_relation_labels(base_app, db, related_records, mocker):
+    """Bucket keys are resolved in one go."""
+    labels = RecordRelationLabels(
+        RecordWithRelations.relations.languages, "metadata.title"
+    )
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    ids = [r.pid.pid_value for r in related_records] + ["unknown"]
+
+    assert labels(ids) == {ids[0]: "Foo", ids[1]: "Bar", "unknown": "unknown"}
+    resolve.assert_not_called()
+
+
+def test_relation_labels_cache(base_app, db, related_records, mocker):
+    """Labels are cached across calls."""
+    labels = RecordRelationLabels(
+        RecordWithRelations.relations.languages, "metadata.title", cache_ttl=60
+    )
+    ids = [r.pid.pid_value for r in related_records]
+    assert labels(ids) == {ids[0]: "Foo", ids[1]: "Bar"}
+
+    resolve = mocker.patch.object(labels, "resolve")
+    assert labels(ids) == {ids[0]: "Foo", ids[1]: "Bar"}
+    resolve.assert_not_called()
@@ -6,8 +6,16 @@
 """Facets tests."""
 
 import pytest
+from invenio_access.permissions import system_identity
+from invenio_search.engine import dsl
 
+from invenio_records_resources.services.records.facets import (
+    CombinedTermsFacet,
+    NestedTermsFacet,
+)
+from invenio_records_resources.services.records.params import FacetsParam
 from tests.mock_module.api import Record
+from tests.mock_module.config import MockSearchOptions
 
 
 #
@@ -341,3 +349,115 @@ def test_combined_terms_facets(app, service, identity_simple, search_clear):
         },
     }
     assert expected_aggs == service_aggs
+
+
+def test_combined_terms_facets_strategies():
+    """Both strategies of the combined terms facet build the same values."""
+    facet_args = dict(
+        field="metadata.subjects.scheme",
+        combined_field="metadata.combined_subjects",
+        parents=["SC1", "SC2"],
+        label="Subjects",
+        inner_size=1,
+    )
+    per_parent = CombinedTermsFacet(**facet_args)
+    combined = CombinedTermsFacet(strategy="combined", **facet_args)
+
+    # each parent keeps its child buckets, however skewed the distribution
+    inner_aggs = {
+        f"inner_{parent}": {
+            "terms": {
+                "field": "metadata.combined_subjects",
+                "include": f"{parent}::.*",
+                "size": 1,
+            }
+        }
+        for parent in ["SC1", "SC2"]
+    }
+    assert combined.get_aggregation().to_dict() == {
+        "filter": {"match_all": {}},
+        "aggs": {
+            "parents": {"terms": {"field": "metadata.subjects.scheme"}},
+            **inner_aggs,
+        },
+    }
+    assert per_parent.get_aggregation().to_dict() == {
+        "terms": {"field": "metadata.subjects.scheme"},
+        "aggs": inner_aggs,
+    }
+
+    def bucket(key, doc_count, **aggs):
+        return {"key": key, "doc_count": doc_count, **aggs}
+
+    per_parent_data = dsl.AttrDict(
+        {
+            "buckets": [
+                bucket(
+                    "SC1",
+                    3,
+                    inner_SC1={"buckets": [bucket("SC1::SU2", 2)]},
+                    inner_SC2={"buckets": []},
+                ),
+                bucket(
+                    "SC2",
+                    1,
+                    inner_SC1={"buckets": []},
+                    inner_SC2={"buckets": [bucket("SC2::SU3", 1)]},
+                ),
+            ]
+        }
+    )
+    combined_data = dsl.AttrDict(
+        {
+            "doc_count": 3,
+            "parents": {"buckets": [bucket("SC1", 3), bucket("SC2", 1)]},
+            "inner_SC1": {"buckets": [bucket("SC1::SU2", 2)]},
+            "inner_SC2": {"buckets": [bucket("SC2::SU3", 1)]},
+        }
+    )
+
+    expected = per_parent.get_labelled_values(per_parent_data, ["SC1::SU2"])
+    assert expected["buckets"][0]["inner"]["buckets"][0]["is_selected"]
+    assert combined.get_labelled_values(combined_data, ["SC1::SU2"]) == expected
+    assert combined.get_values(combined_data, []) == per_parent.get_values(
+        per_parent_data, []
+    )
+
+
+@pytest.mark.parametrize(
+    "facets_mode,has_aggs,size",
+    [(None, True, 25), ("none", False, 25), ("only", True, 0)],
+)
+def test_facets_modes(facets_mode, has_aggs, size):
+    """Facets and hits can be skipped."""
+    params = {"facets": {"type": ["A"]}, "facets_mode": facets_mode}
+    search = dsl.Search()[0:25]
+    search = FacetsParam(MockSearchOptions).apply(system_identity, search, params)
+
+    search_dict = search.to_dict()
+    assert ("aggs" in search_dict) == has_aggs
+    assert search_dict["size"] == size
+    assert search_dict["post_filter"] == {"term": {"metadata.type.type": "A"}}
+    assert params["type"] == ["A"]
+
+
+def test_nested_terms_facet_values():
+    """Selected values are checked on the full key of nested buckets."""
+    facet = NestedTermsFacet(field="type", subfield="subtype", label="Type")
+    data = dsl.AttrDict(
+        {
+            "buckets": [
+                {
+                    "key": "A",
+                    "doc_count": 2,
+                    "inner": {"buckets": [{"key": "AA", "doc_count": 2}]},
+                },
+                {"key": "B", "doc_count": 1, "inner": {"buckets": []}},
+            ]
+        }
+    )
+
+    values = facet.get_labelled_values(data, ["A::AA", "B"])
+    assert values["label"] == "Type"
+    assert [b["is_selected"] for b in values["buckets"]] == [False, True]
+    assert values["buckets"][0]["inner"]["buckets"][0]["is_selected"] is True
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Facets cache tests."""
+
+from invenio_access.permissions import system_identity
+from invenio_search.engine import dsl
+
+from invenio_records_resources.indexer import RecordIndexer
+from invenio_records_resources.services import SearchOptions
+from invenio_records_resources.services.records.facets import FacetsCache, TermsFacet
+from invenio_records_resources.services.records.params import FacetsParam
+from invenio_records_resources.services.uow import RecordIndexOp, UnitOfWork
+from tests.mock_module.api import Record
+
+
+class CachedSearchOptions(SearchOptions):
+    """Search options with cached facets."""
+
+    facets_cache = FacetsCache(ttl=60, max_writes=2)
+    facets = {"type": TermsFacet(field="metadata.type", label="Type")}
+
+
+def _search(params, query=None):
+    """Build the search of a request."""
+    facets_param = FacetsParam(CachedSearchOptions)
+    search = dsl.Search(index="records")
+    if query is not None:
+        search = search.filter(query)
+    search = facets_param.apply(system_identity, search, params)
+    return facets_param.use_cache(search)
+
+
+def _execute(search, count):
+    """Fake the execution of a search."""
+    raw = {"hits": {"hits": [], "total": {"value": count}}}
+    if "aggs" in search.to_dict():
+        raw["aggregations"] = {"type": {"buckets": [{"key": "A", "doc_count": count}]}}
+    return search._response_class(search, raw)
+
+
+def test_facets_cache():
+    """The facets of the base query are served from the cache."""
+    cache = CachedSearchOptions.facets_cache
+    cache.clear()
+
+    # the first base search computes and caches the facets
+    search = _search({})
+    assert "aggs" in search.to_dict()
+    assert _execute(search, 1).facets.to_dict()["type"]["buckets"][0]["doc_count"]
+
+    # the next one skips the aggregations
+    search = _search({})
+    assert "aggs" not in search.to_dict()
+    facets = _execute(search, 2).labelled_facets.to_dict()
+    assert facets["type"]["buckets"][0]["doc_count"] == 1
+
+    # queries, selected values and other filters are not served from it
+    assert "aggs" in _search({"q": "test"}).to_dict()
+    assert "aggs" in _search({"facets": {"type": ["A"]}}).to_dict()
+    assert "aggs" in _search({}, query=dsl.Q("term", owner=1)).to_dict()
+
+
+def test_facets_cache_writes(base_app, db, mocker):
+    """The facets are recomputed after a number of index writes."""
+    mocker.patch("invenio_search.engine.search.helpers.bulk")
+    cache = CachedSearchOptions.facets_cache
+    cache.clear()
+    _execute(_search({}), 1).facets
+
+    def _indexer(index):
+        indexer = RecordIndexer(
+            search_client=mocker.Mock(),
+            record_cls=Record,
+            record_to_index=lambda r: index,
+        )
+        indexer.client.indices.get_alias.return_value = {}
+        return indexer
+
+    record = Record.create({"metadata": {"title": "Test"}})
+    _indexer("records-v1.0.0").index(record)
+    assert "aggs" not in _search({}).to_dict()
+    _indexer("other-v1.0.0").delete(record)
+    assert "aggs" not in _search({}).to_dict()
+    _indexer("records-v1.0.0").delete(record)
+    assert "aggs" in _search({}).to_dict()
+
+    # the bulk writes of the units of work are counted too
+    _execute(_search({}), 1).facets
+    indexer = _indexer("records-v1.0.0")
+    with UnitOfWork() as uow:
+        for record in [record, Record.create({"metadata": {"title": "Test"}})]:
+            uow.register(RecordIndexOp(record, indexer))
+        uow.commit()
+    assert "aggs" in _search({}).to_dict()
@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""List projection tests."""
+
+from unittest.mock import Mock
+
+from invenio_access.permissions import system_identity
+
+from invenio_records_resources.services import RecordService
+from invenio_records_resources.services.records.results import RecordList
+from tests.mock_module.config import MockSearchOptions, ServiceConfig
+
+
+class ProjectedSearchOptions(MockSearchOptions):
+    """Search options fetching only the fields of the search results."""
+
+    list_projection = ["id", "metadata.title"]
+
+
+class ProjectedServiceConfig(ServiceConfig):
+    """Service configuration with a list projection."""
+
+    search = ProjectedSearchOptions
+
+
+class ExpandableService(RecordService):
+    """Service with an expandable field."""
+
+    @property
+    def expandable_fields(self):
+        """Get expandable fields."""
+        return [Mock(field_name="metadata.owner")]
+
+
+def test_list_projection(base_app, db):
+    """The searches only fetch the projected fields of the documents."""
+    service = RecordService(ProjectedServiceConfig)
+    search = service._search("search", system_identity, {}, None, projected=True)
+    assert search.to_dict()["_source"] == [
+        "id",
+        "metadata.title",
+        "uuid",
+        "version_id",
+        "created",
+        "updated",
+        "expires_at",
+    ]
+
+    # the search results are dumped from the projected documents
+    raw = {
+        "hits": {
+            "hits": [
+                {
+                    "_index": "records",
+                    "_id": "1",
+                    "_source": {
+                        "id": "abcd-1234",
+                        "metadata": {"title": "Test"},
+                        "uuid": "8e6d6b36-5c0f-4c4b-9a7b-6a1f1e0f6a8d",
+                        "version_id": 1,
+                        "created": "2026-01-01T00:00:00+00:00",
+                        "updated": "2026-01-01T00:00:00+00:00",
+                        "expires_at": None,
+                    },
+                }
+            ],
+            "total": {"value": 1},
+        }
+    }
+    results = RecordList(
+        service, system_identity, search._response_class(search, raw), {}
+    )
+    hit = next(results.hits)
+    assert hit["id"] == "abcd-1234"
+    assert hit["metadata"] == {"title": "Test"}
+
+    # the scans and the other searches fetch the full documents
+    search = service._search("scan", system_identity, {}, None)
+    assert "_source" not in search.to_dict()
+
+    # the fields to expand are fetched
+    service = ExpandableService(ProjectedServiceConfig)
+    search = service._search("search", system_identity, {}, None, projected=True)
+    assert search.to_dict()["_source"][:3] == [
+        "id",
+        "metadata.title",
+        "metadata.owner",
+    ]
+
+    # the full documents are fetched by default
+    service = RecordService(ServiceConfig)
+    search = service._search("search", system_identity, {}, None, projected=True)
+    assert "_source" not in search.to_dict()
@@ -6,8 +6,10 @@
 import pytest
 from flask_principal import ActionNeed
 from invenio_access.permissions import Permission, SystemRoleNeed, system_identity
+from luqum.parser import parser as luqum_parser
 from luqum.tree import Phrase, Word
 
+from invenio_records_resources.services.errors import QuerystringValidationError
 from invenio_records_resources.services.records.queryparser import (
     FieldValueMapper,
     QueryParser,
@@ -276,3 +278,102 @@ def test_querystring_restricted_term(query, transformed_query, identity_simple,
     assert parser.parse(query).to_dict() == {
         "query_string": {"query": transformed_query}
     }
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["quick", "quick brown  fox", "o'neil", "foo.bar 10.1234", "ünïcode 東京"],
+)
+def test_simple_query_fast_path(query, mocker):
+    """Queries without Lucene syntax skip luqum but yield the same query."""
+    p = QueryParser.factory(
+        mapping={"title": "metadata.title"},
+        allow_list=["description"],
+        tree_transformer_cls=SearchFieldTransformer,
+    )(system_identity)
+    spy = mocker.spy(luqum_parser, "parse")
+
+    assert p.is_simple(query)
+    assert p.parse(query).to_dict() == {"query_string": {"query": query}}
+    spy.assert_not_called()
+
+
+def test_simple_query_fast_path_subclass():
+    """Transformers rewriting bare terms do not inherit the fast path."""
+
+    class LowerCaseTransformer(SearchFieldTransformer):
+        def visit_word(self, node, context):
+            yield Word(node.value.lower())
+
+    class MappedTransformer(SearchFieldTransformer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+
+    def is_simple(transformer_cls):
+        return QueryParser.factory(tree_transformer_cls=transformer_cls)(
+            system_identity
+        ).is_simple("Quick")
+
+    assert not is_simple(LowerCaseTransformer)
+    assert is_simple(MappedTransformer)
+
+    LowerCaseTransformer.passthrough_simple_queries = True
+    assert is_simple(LowerCaseTransformer)
+
+
+@pytest.mark.parametrize(
+    "query", ["title:test", "quick AND fox", "-news", "NOT", "qu?ck", '"a phrase"']
+)
+def test_simple_query_fast_path_syntax(parser, query):
+    """Queries with Lucene syntax go through the full parser."""
+    assert not parser.is_simple(query)
+
+
+def test_blank_query(parser):
+    """Blank queries fall back to a multi match query."""
+    assert parser.parse("   ").to_dict() == {"multi_match": {"query": "   "}}
+
+
+@pytest.mark.parametrize(
+    "budget,query",
+    [
+        ({"max_length": 10}, "a very long query"),
+        ({"max_nodes": 3}, "one two three four"),
+        ({"max_depth": 1}, "one two"),
+        ({"max_nodes": 3}, "title:(one OR two)"),
+        ({"max_depth": 3}, "((a OR b) AND c) OR d"),
+        ({"leading_wildcard": False}, "title:*foo"),
+    ],
+)
+def test_query_budget(budget, query):
+    """Queries over budget are rejected or degraded to a multi match query."""
+    p = QueryParser.factory(**budget)
+    with pytest.raises(QuerystringValidationError):
+        p(system_identity).parse(query)
+
+    p = QueryParser.factory(over_budget="fallback", **budget)
+    assert p(system_identity).parse(query).to_dict() == {
+        "multi_match": {"query": query}
+    }
+
+
+def test_query_budget_within(parser):
+    """Queries within budget are parsed as usual."""
+    p = QueryParser.factory(
+        max_length=100,
+        max_nodes=10,
+        max_depth=5,
+        leading_wildcard=False,
+    )
+    query = "title:(foo* OR bar) baz"
+    assert p(system_identity).parse(query).to_dict() == {
+        "query_string": {"query": query}
+    }
+
+
+@pytest.mark.parametrize("budget", [{"max_nodes": 4}, {"max_depth": 1}])
+@pytest.mark.parametrize("query", ["one", "one two three", "one two three four"])
+def test_query_budget_simple(budget, query):
+    """Plain queries are measured as their syntax tree, without parsing it."""
+    p = QueryParser.factory(**budget)(system_identity)
+    assert p.check_simple(query) == p.check_tree(luqum_parser.parse(query))
@@ -9,7 +9,10 @@ from copy import deepcopy
 from datetime import datetime, timezone
 
 import pytest
+from invenio_indexer.api import RecordIndexer
+from invenio_search.engine import dsl
 
+from invenio_records_resources.indexer import RecordIndexer as ResourcesRecordIndexer
 from invenio_records_resources.proxies import (
     current_notifications_registry,
     current_service_registry,
@@ -137,12 +140,27 @@ def test_relation_update_propagation(
     )
 
 
-def test_on_relation_update_limit(mocker, identity_simple, service_wrel):
+def _hit(id_, inner_record):
+    """Create a search hit referencing an inner record."""
+    return dsl.response.Hit(
+        {"_id": id_, "_source": {"metadata": {"inner_record": inner_record}}}
+    )
+
+
+def test_on_relation_update_limit(db, mocker, identity_simple, service_wrel):
     """Test on relation update max limit."""
     notif_time = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
-    mocked_reindex = mocker.patch.object(RecordService, "reindex")
+    queries = []
+
+    def _scan(search):
+        queries.append(search.to_dict()["query"])
+        return iter([])
+
+    mocker.patch.object(dsl.Search, "scan", _scan)
+    bulk_index = mocker.patch.object(RecordIndexer, "bulk_index")
 
     def _call(n_records, limit):
+        queries.clear()
         records_list = []
         for _ in range(n_records):
             _rand = random.randint(1000, 999999)
@@ -150,33 +168,130 @@ def test_on_relation_update_limit(mocker, identity_simple, service_wrel):
         service_wrel.on_relation_update(
             identity_simple, "mock-records", records_list, notif_time, limit
         )
+        return [
+            f["terms"]["metadata.inner_record.id"]
+            for q in queries
+            for f in q["bool"]["filter"]
+            if "terms" in f
+        ]
+
+    # below the limit - expected: 1 terms query of 3 ids
+    assert [len(ids) for ids in _call(n_records=3, limit=5)] == [3]
+    # on the limit - expected: 1 terms query of 5 ids
+    assert [len(ids) for ids in _call(n_records=5, limit=5)] == [5]
+    # over the limit - expected: 2 terms queries of 5 and 3 ids
+    assert [len(ids) for ids in _call(n_records=8, limit=5)] == [5, 3]
+    # nothing to reindex
+    bulk_index.assert_not_called()
+
+
+def test_on_relation_update_reindex_once(db, mocker, identity_simple, service_wrel):
+    """Outdated records are reindexed once."""
+    notif_time = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    hits = [
+        # outdated, and returned by both chunks
+        [_hit("a", [{"id": "1", "@v": "u1::1"}, {"id": "2", "@v": "u2::2"}])],
+        [
+            _hit("a", [{"id": "1", "@v": "u1::1"}, {"id": "2", "@v": "u2::2"}]),
+            # up to date
+            _hit("b", {"id": "2", "@v": "u2::2"}),
+            # never dereferenced
+            _hit("c", {"id": "2"}),
+        ],
+    ]
+    mocker.patch.object(dsl.Search, "scan", lambda search: iter(hits.pop(0)))
+    bulk_index = mocker.patch.object(RecordIndexer, "bulk_index")
+
+    records_list = [("1", "u1", 2), ("2", "u2", 2)]
+    service_wrel.on_relation_update(
+        identity_simple, "mock-records", records_list, notif_time, limit=1
+    )
+    bulk_index.assert_called_once_with(["a", "c"])
+
+
+def test_on_relation_update_partial(db, mocker, identity_simple, service_wrel):
+    """Outdated relations are updated in the index without reindexing."""
+    related = Record.create({"metadata": {"title": "New title"}})
+    related.commit()
+    db.session.commit()
+    recid, version = related.pid.pid_value, f"{related.id}::{related.revision_id}"
+
+    old = {"id": recid, "metadata": {"title": "Old title"}, "@v": "old::1"}
+    hits = [
+        # outdated
+        dsl.response.Hit(
+            {
+                "_id": "a",
+                "_index": "records",
+                "_seq_no": 3,
+                "_primary_term": 1,
+                "_source": {
+                    "metadata": {"title": "Test", "inner_record": old},
+                    "indexed_at": "2020-01-01T00:00:00+00:00",
+                },
+            }
+        ),
+        # the related object has a different shape
+        _hit("b", {"id": recid}),
+        # up to date
+        _hit("c", {"id": recid, "@v": version}),
+        # outdated, but written since the scan
+        dsl.response.Hit(
+            {
+                "_id": "d",
+                "_index": "records",
+                "_seq_no": 5,
+                "_primary_term": 1,
+                "_source": {"metadata": {"inner_record": dict(old)}},
+            }
+        ),
+    ]
+    notif_time = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    mocker.patch.object(service_wrel.config, "relations_propagation", "partial")
+    mocker.patch.object(dsl.Search, "scan", lambda search: iter(hits))
+    actions = []
+
+    def _streaming_bulk(client, items, **kwargs):
+        for action in items:
+            actions.append(action)
+            status = 409 if action["_id"] == "d" else 200
+            yield status == 200, {"update": {"_id": action["_id"], "status": status}}
+
+    mocker.patch(
+        "invenio_search.engine.search.helpers.streaming_bulk",
+        side_effect=_streaming_bulk,
+    )
+    bulk_index = mocker.patch.object(RecordIndexer, "bulk_index")
+    # the index is being migrated
+    mocker.patch.object(
+        ResourcesRecordIndexer, "migration_index", return_value="records-new"
+    )
+    bulk_copy = mocker.patch(
+        "invenio_records_resources.services.records.service.bulk_copy"
+    )
+
+    service_wrel.on_relation_update(
+        identity_simple,
+        "mock-records",
+        [(recid, str(related.id), related.revision_id)],
+        notif_time,
+    )
 
-    _call(n_records=3, limit=5)
-    # below the limit - expected: 1 call, 3 clauses
-    mocked_reindex.call_count == 1
-    _, _, kwargs = mocked_reindex.mock_calls[0]
-    clauses = kwargs["search_query"].to_dict()["bool"]["should"]
-    assert len(clauses) == 3
-
-    mocked_reindex.reset_mock()
-
-    _call(n_records=5, limit=5)
-    # on the limit - expected: 1 call, 5 clauses
-    mocked_reindex.call_count == 1
-    _, _, kwargs = mocked_reindex.mock_calls[0]
-    clauses = kwargs["search_query"].to_dict()["bool"]["should"]
-    assert len(clauses) == 5
-
-    mocked_reindex.reset_mock()
-
-    _call(n_records=8, limit=5)
-    # over the limit - expected: 2 calls, 5 clauses
-    mocked_reindex.call_count == 2
-    # first call
-    _, _, kwargs = mocked_reindex.mock_calls[0]
-    clauses = kwargs["search_query"].to_dict()["bool"]["should"]
-    assert len(clauses) == 5
-    # second call
-    _, _, kwargs = mocked_reindex.mock_calls[1]
-    clauses = kwargs["search_query"].to_dict()["bool"]["should"]
-    assert len(clauses) == 3
+    new = {"id": recid, "metadata": {"title": "New title"}, "@v": version}
+    assert actions[0]["_op_type"] == "update"
+    assert actions[0]["if_seq_no"] == 3
+    assert actions[0]["if_primary_term"] == 1
+    # only the updated fields are written
+    doc = actions[0]["doc"]
+    assert doc["metadata"] == {"inner_record": new}
+    assert doc["indexed_at"] > "2020-01-01T00:00:00+00:00"
+    assert [a["_id"] for a in actions] == ["a", "d"]
+    # the updates are copied to the new index
+    copies = bulk_copy.call_args.args[1]
+    assert [(c["_index"], c["_id"]) for c in copies] == [
+        ("records-new", "a"),
+        ("records-new", "d"),
+    ]
+    assert "if_seq_no" not in copies[0]
+    assert copies[0]["doc"] == doc
+    assert sorted(bulk_index.call_args.args[0]) == ["b", "d"]
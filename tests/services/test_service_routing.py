@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Custom routing tests."""
+
+import pytest
+from invenio_access.permissions import system_identity
+from invenio_search.engine import dsl
+
+from invenio_records_resources.indexer import RecordIndexer
+from invenio_records_resources.services import FieldRouting, RecordService
+from invenio_records_resources.services.uow import (
+    RecordCommitOp,
+    RecordIndexOp,
+    UnitOfWork,
+)
+from tests.mock_module.api import Record
+from tests.mock_module.config import ServiceConfig
+
+routing = FieldRouting("metadata.community")
+
+
+class RoutedServiceConfig(ServiceConfig):
+    """Service configuration with routed records."""
+
+    index_routing = routing
+
+
+def test_record_to_routing():
+    """Records are routed by the value of the field, if any."""
+    assert routing.record_to_routing({"metadata": {"community": 1}}) == "1"
+    assert routing.record_to_routing({"metadata": {}}) is None
+    with pytest.raises(ValueError):
+        routing.record_to_routing({"metadata": {"community": [1]}})
+
+
+def test_search_to_routing():
+    """Only searches restricted to some values of the field are routed."""
+    search = dsl.Search(index="records")
+    assert routing.search_to_routing(search) is None
+
+    search = search.filter("terms", **{"metadata.community": ["b", "a"]})
+    assert routing.search_to_routing(search) == ["a", "b"]
+    search = search.query("match", title="test")
+    assert routing.search_to_routing(search) == ["a", "b"]
+    search = search.filter("term", **{"metadata.community": "a"})
+    assert routing.search_to_routing(search) == ["a"]
+
+    # optional clauses do not restrict the search
+    query = dsl.Q(
+        "bool",
+        should=[dsl.Q("term", **{"metadata.community": "a"}), dsl.Q("match_all")],
+    )
+    assert routing.search_to_routing(dsl.Search().query(query)) is None
+
+
+def test_service_search_routing(base_app, db):
+    """The searches of a service scoped by the field are routed."""
+    service = RecordService(RoutedServiceConfig)
+    scope = dsl.Q("term", **{"metadata.community": "a"})
+
+    search = service.create_search(
+        system_identity, Record, service.config.search, extra_filter=scope
+    )
+    assert search._params["routing"] == "a"
+    search = service.create_search(system_identity, Record, service.config.search)
+    assert "routing" not in search._params
+    assert service.indexer.record_to_routing({"metadata": {"community": "a"}}) == "a"
+
+    # not routed by default
+    service = RecordService(ServiceConfig)
+    search = service.create_search(
+        system_identity, Record, service.config.search, extra_filter=scope
+    )
+    assert "routing" not in search._params
+    assert service.indexer.record_to_routing({"metadata": {"community": "a"}}) is None
+
+
+def test_indexer_routing(base_app, db, mocker):
+    """The documents are written with their routing."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = RecordIndexer(
+        search_client=mocker.Mock(),
+        record_cls=Record,
+        record_to_index=lambda r: r.index._name,
+        record_to_routing=routing.record_to_routing,
+    )
+    # no index being migrated, and no copy with another routing
+    indexer.client.indices.get_alias.return_value = {}
+    indexer.client.search.return_value = {"hits": {"hits": []}}
+    records = [
+        Record.create({"metadata": {"title": "Test", "community": f"{i}"}})
+        for i in range(2)
+    ]
+
+    with UnitOfWork() as uow:
+        uow.register(RecordCommitOp(records[0], indexer))
+        uow.commit()
+    assert indexer.client.index.call_args.kwargs["routing"] == "0"
+
+    with UnitOfWork() as uow:
+        for record in records:
+            uow.register(RecordIndexOp(record, indexer))
+        uow.commit()
+    assert [a["_routing"] for a in bulk.call_args.args[1]] == ["0", "1"]
+
+    indexer.delete(records[1])
+    assert indexer.client.delete.call_args.kwargs["routing"] == "1"
+
+
+def test_routing_change(base_app, db, mocker):
+    """The copy of a document with a previous routing is deleted."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = RecordIndexer(
+        search_client=mocker.Mock(),
+        record_cls=Record,
+        record_to_index=lambda r: r.index._name,
+        record_to_routing=routing.record_to_routing,
+    )
+    indexer.client.indices.get_alias.return_value = {}
+    records = [
+        Record.create({"metadata": {"title": "Test", "community": f"{i}"}})
+        for i in range(2)
+    ]
+    ids = [str(r.id) for r in records]
+
+    # the first record was routed by id, the second one is up to date
+    indexer.client.search.return_value = {
+        "hits": {
+            "hits": [
+                {"_index": "records-v1", "_id": ids[0]},
+                {"_index": "records-v1", "_id": ids[1], "_routing": "1"},
+            ]
+        }
+    }
+    with UnitOfWork() as uow:
+        for record in records:
+            uow.register(RecordIndexOp(record, indexer))
+        uow.commit()
+    actions = bulk.call_args.args[1]
+    assert [(a["_op_type"], a["_id"]) for a in actions] == [
+        ("index", ids[0]),
+        ("index", ids[1]),
+        ("delete", ids[0]),
+    ]
+    assert "_routing" not in actions[2]
+    assert indexer.client.search.call_args.kwargs["body"]["query"] == {
+        "ids": {"values": ids}
+    }
+
+    # moved to another community
+    indexer.client.search.return_value = {
+        "hits": {"hits": [{"_index": "records-v1", "_id": ids[0], "_routing": "1"}]}
+    }
+    indexer.index(records[0])
+    indexer.client.delete.assert_called_once_with(
+        index="records-v1", id=ids[0], routing="1"
+    )
@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Sampled facets tests."""
+
+from invenio_access.permissions import system_identity
+from invenio_search.engine import dsl
+
+from invenio_records_resources.services import SearchOptions
+from invenio_records_resources.services.records.facets import TermsFacet
+from invenio_records_resources.services.records.params import FacetsParam
+
+
+class SampledSearchOptions(SearchOptions):
+    """Search options with sampled facets."""
+
+    facets_sampler = {"type": "sampler", "shard_size": 100}
+    facets = {
+        "type": TermsFacet(field="metadata.type", label="Type"),
+        "subject": TermsFacet(
+            field="metadata.subject",
+            label="Subject",
+            sampler={
+                "type": "diversified_sampler",
+                "shard_size": 10,
+                "field": "metadata.type",
+            },
+        ),
+        "status": TermsFacet(field="status", label="Status", sampler=False),
+    }
+
+
+def _bucket(key, doc_count):
+    """Build a terms bucket."""
+    return {"key": key, "doc_count": doc_count}
+
+
+def test_sampled_facets():
+    """Facets are aggregated on samples and marked as approximate."""
+    search = FacetsParam(SampledSearchOptions).apply(system_identity, dsl.Search(), {})
+    assert search.to_dict()["aggs"] == {
+        "facets_sample": {
+            "sampler": {"shard_size": 100},
+            "aggs": {"type": {"terms": {"field": "metadata.type"}}},
+        },
+        "subject": {
+            "diversified_sampler": {"shard_size": 10, "field": "metadata.type"},
+            "aggs": {"sample": {"terms": {"field": "metadata.subject"}}},
+        },
+        "status": {"terms": {"field": "status"}},
+    }
+
+    raw = {
+        "hits": {"hits": [], "total": {"value": 0}},
+        "aggregations": {
+            "facets_sample": {
+                "doc_count": 100,
+                "type": {"buckets": [_bucket("A", 100)]},
+            },
+            "subject": {
+                "doc_count": 10,
+                "sample": {"buckets": [_bucket("B", 10)]},
+            },
+            "status": {"buckets": [_bucket("C", 1000)]},
+        },
+    }
+    facets = search._response_class(search, raw).labelled_facets.to_dict()
+
+    assert facets["type"]["approximate"] is True
+    assert facets["type"]["buckets"][0]["doc_count"] == 100
+    assert facets["subject"]["approximate"] is True
+    assert facets["subject"]["buckets"][0]["key"] == "B"
+    assert "approximate" not in facets["status"]
+    assert facets["status"]["buckets"][0]["doc_count"] == 1000
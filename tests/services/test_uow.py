@@ -0,0 +1,217 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Unit of work tests."""
+
+import pytest
+from invenio_records.dumpers import SearchDumper
+from invenio_records.dumpers.indexedat import IndexedAtDumperExt
+
+from invenio_records_resources.indexer import RecordIndexer, suppressed_writes
+from invenio_records_resources.records.dumpers import ContentHashDumperExt
+from invenio_records_resources.services.uow import (
+    RecordCommitOp,
+    RecordDeleteOp,
+    RecordIndexOp,
+    UnitOfWork,
+    unit_of_work,
+)
+from tests.mock_module.api import Record
+
+
+def _indexer(mocker, record_dumper=None):
+    """Indexer with a mocked search client."""
+    indexer = RecordIndexer(
+        search_client=mocker.Mock(),
+        record_cls=Record,
+        record_to_index=lambda r: r.index._name,
+        record_dumper=record_dumper,
+    )
+    # no index being migrated
+    indexer.client.indices.get_alias.return_value = {}
+    return indexer
+
+
+def test_index_operations_coalesced(base_app, db, mocker):
+    """The index operations of a unit of work are sent in one bulk request."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = _indexer(mocker)
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(3)]
+
+    with UnitOfWork() as uow:
+        uow.register(RecordCommitOp(records[0], indexer))
+        uow.register(RecordCommitOp(records[1], indexer))
+        uow.register(RecordCommitOp(records[0], indexer, index_refresh=True))
+        uow.register(RecordIndexOp(records[2], indexer))
+        uow.register(RecordDeleteOp(records[1], indexer))
+        uow.commit()
+
+    bulk.assert_called_once()
+    actions = bulk.call_args.args[1]
+    assert [(a["_op_type"], a["_id"]) for a in actions] == [
+        ("index", str(records[0].id)),
+        ("index", str(records[2].id)),
+        ("delete", str(records[1].id)),
+    ]
+    assert actions[0]["_version"] == records[0].revision_id
+    assert bulk.call_args.kwargs == {"refresh": True}
+    indexer.client.index.assert_not_called()
+
+
+def test_single_index_operation(base_app, db, mocker):
+    """A single index operation is not sent in bulk."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = _indexer(mocker)
+    record = Record.create({"metadata": {"title": "Test"}})
+
+    with UnitOfWork() as uow:
+        uow.register(RecordCommitOp(record, indexer))
+        uow.register(RecordCommitOp(record, indexer))
+        uow.commit()
+
+    bulk.assert_not_called()
+    indexer.client.index.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "policy,refresh,refreshes",
+    [
+        ("operation", {"refresh": True}, 0),
+        ("wait_for", {"refresh": "wait_for"}, 0),
+        ("none", {}, 0),
+        ("end", {}, 1),
+    ],
+)
+def test_refresh_policy(base_app, db, mocker, policy, refresh, refreshes):
+    """The refresh policy of the unit of work overrides the operations'."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = _indexer(mocker)
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(2)]
+    for record in records:
+        record.commit()
+
+    with UnitOfWork(refresh_policy=policy) as uow:
+        for record in records:
+            uow.register(RecordDeleteOp(record, indexer, index_refresh=True))
+        uow.commit()
+
+    assert bulk.call_args.kwargs == refresh
+    assert indexer.client.indices.refresh.call_count == refreshes
+
+
+class DeleteService:
+    """Service deleting records in its own unit of work."""
+
+    def __init__(self, indexer):
+        """Constructor."""
+        self.indexer = indexer
+
+    @unit_of_work()
+    def delete(self, records, uow=None):
+        """Delete the records, refreshing the index."""
+        for record in records:
+            uow.register(RecordDeleteOp(record, self.indexer, index_refresh=True))
+
+
+def test_refresh_policy_config(base_app, db, mocker):
+    """The units of work of the services have the configured refresh policy."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = _indexer(mocker)
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(2)]
+    for record in records:
+        record.commit()
+    mocker.patch.dict(
+        base_app.config, {"RECORDS_RESOURCES_INDEX_REFRESH_POLICY": "end"}
+    )
+
+    DeleteService(indexer).delete(records)
+
+    assert bulk.call_args.kwargs == {}
+    assert indexer.client.indices.refresh.call_count == 1
+
+
+def test_invalid_refresh_policy(base_app, db):
+    """Only the known refresh policies are accepted."""
+    with pytest.raises(ValueError):
+        UnitOfWork(refresh_policy="always")
+
+
+def test_unchanged_documents_skipped(base_app, db, mocker):
+    """The documents identical to their indexed version are not written."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    dumper = SearchDumper(extensions=[IndexedAtDumperExt(), ContentHashDumperExt()])
+    indexer = _indexer(mocker, record_dumper=dumper)
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(3)]
+    for record in records:
+        record.commit()
+
+    # the first record is indexed as is
+    indexed = indexer._prepare_record(records[0], records[0].index._name, {})
+    indexer.client.mget.return_value = {
+        "docs": [
+            {"found": True, "_source": {"content_hash": indexed["content_hash"]}},
+            {"found": True, "_source": {"content_hash": "outdated"}},
+            {"found": False},
+        ]
+    }
+    before = suppressed_writes.value
+
+    with UnitOfWork() as uow:
+        for record in records:
+            uow.register(RecordIndexOp(record, indexer))
+        uow.commit()
+
+    actions = bulk.call_args.args[1]
+    assert [a["_id"] for a in actions] == [str(r.id) for r in records[1:]]
+    assert suppressed_writes.value == before + 1
+
+
+class NoIndexCommitOp(RecordCommitOp):
+    """Record commit operation overriding the commit step."""
+
+    def on_commit(self, uow):
+        """Do not index the record."""
+
+
+def test_index_buffer_flushed_by_unit_of_work(base_app, db, mocker):
+    """The buffer is flushed whatever the last registered operation is."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = _indexer(mocker)
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(3)]
+
+    with UnitOfWork() as uow:
+        uow.register(RecordCommitOp(records[0], indexer))
+        uow.register(RecordCommitOp(records[1], indexer))
+        uow.register(NoIndexCommitOp(records[2], indexer))
+        uow.commit()
+
+    actions = bulk.call_args.args[1]
+    assert [a["_id"] for a in actions] == [str(r.id) for r in records[:2]]
+
+
+class PipelineIndexer(RecordIndexer):
+    """Indexer sending the documents through an ingest pipeline."""
+
+    def index_action(self, record, arguments=None, **kwargs):
+        """Index through the pipeline."""
+        arguments = {**(arguments or {}), "pipeline": "my-pipeline"}
+        return super().index_action(record, arguments=arguments, **kwargs)
+
+
+def test_index_action_override(base_app, db, mocker):
+    """The bulk actions are built by the indexer."""
+    bulk = mocker.patch("invenio_search.engine.search.helpers.bulk")
+    indexer = PipelineIndexer(
+        search_client=mocker.Mock(),
+        record_cls=Record,
+        record_to_index=lambda r: r.index._name,
+    )
+    indexer.client.indices.get_alias.return_value = {}
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(2)]
+
+    with UnitOfWork() as uow:
+        for record in records:
+            uow.register(RecordIndexOp(record, indexer))
+        uow.commit()
+
+    assert [a["pipeline"] for a in bulk.call_args.args[1]] == ["my-pipeline"] * 2
@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""In-process cache tests."""
+
+from copy import deepcopy
+
+from invenio_records_resources.cache import TTLCache
+
+
+def test_ttl_cache_get_set():
+    """Test getting and setting values."""
+    cache = TTLCache()
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.get_many(["a", "c"]) == ({"a": 1}, ["c"])
+    assert cache.get("b") == 2
+    cache.delete("b")
+    assert cache.get("b", "missing") == "missing"
+
+
+def test_ttl_cache_expiry(mocker):
+    """Test that entries expire after the ttl."""
+    monotonic = mocker.patch("invenio_records_resources.cache.time.monotonic")
+    monotonic.return_value = 0
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    monotonic.return_value = 5
+    assert cache.get("a") == 1
+    monotonic.return_value = 11
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_maxsize():
+    """Test that the least recently used entries are evicted."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get_many(["a", "b", "c"]) == ({"a": 1, "c": 3}, ["b"])
+
+
+def test_ttl_cache_deepcopy():
+    """Test that deep copies share the cache."""
+    cache = TTLCache()
+    assert deepcopy({"cache": cache})["cache"] is cache
@@ -0,0 +1,312 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: MIT
+
+"""Synchronous bulk indexing tests."""
+
+import json
+
+from invenio_indexer.api import RecordIndexer
+from invenio_records.dumpers import SearchDumper
+from invenio_search.engine import search
+from invenio_search.utils import build_alias_name
+
+from invenio_records_resources import indexer as indexer_module
+from invenio_records_resources.indexer import (
+    ChunkSize,
+    IndexMigration,
+    parallel_bulk_index,
+    suppressed_writes,
+)
+from invenio_records_resources.records.dumpers import ContentHashDumperExt
+from invenio_records_resources.records.systemfields.pid import PIDFieldContext
+from invenio_records_resources.services.uow import RecordBulkIndexOp, UnitOfWork
+from tests.mock_module.api import Record, RecordWithRelations
+
+
+def _indexer(mocker, statuses=None, indexer_cls=RecordIndexer, record_cls=Record):
+    """Indexer with a mocked search client.
+
+    :param statuses: function returning the status of a document by id.
+    """
+    client = mocker.Mock()
+    client.transport.serializer = search.serializer.JSONSerializer()
+    statuses = statuses or (lambda id_: 201)
+
+    def _bulk(body, **kwargs):
+        ids = [json.loads(d)["index"]["_id"] for d in body.splitlines()[::2]]
+        items = [{"index": {"status": statuses(id_)}} for id_ in ids]
+        for item in items:
+            if item["index"]["status"] == 400:
+                item["index"]["error"] = {"type": "mapper_parsing_exception"}
+        return {
+            "errors": any(i["index"]["status"] > 201 for i in items),
+            "items": items,
+        }
+
+    client.bulk.side_effect = _bulk
+    return indexer_cls(
+        search_client=client,
+        record_cls=record_cls,
+        record_to_index=lambda r: r.index._name,
+    )
+
+
+def _create(db, count):
+    """Create records."""
+    records = [Record.create({"metadata": {"title": f"{i}"}}) for i in range(count)]
+    for record in records:
+        record.commit()
+    db.session.commit()
+    return records
+
+
+def test_parallel_bulk_index(base_app, db, mocker):
+    """Records are indexed in bulk requests of a maximum size."""
+    dead_letter = mocker.patch("invenio_records_resources.indexer.dead_letter")
+    records = _create(db, 5)
+    failed_id = str(records[0].id)
+    indexer = _indexer(mocker, lambda id_: 400 if id_ == failed_id else 201)
+
+    indexed, failed = parallel_bulk_index(
+        indexer, [r.id for r in records], workers=2, max_chunk_bytes=1, batch_size=2
+    )
+
+    assert (indexed, failed) == (4, 1)
+    # one document per request, as each exceeds the maximum size
+    assert indexer.client.bulk.call_count == 5
+    actions = [
+        json.loads(c.kwargs["body"].splitlines()[0])["index"]
+        for c in indexer.client.bulk.call_args_list
+    ]
+    assert sorted(a["_id"] for a in actions) == sorted(str(r.id) for r in records)
+    assert all(a["version_type"] == "external_gte" for a in actions)
+    dead_letter.assert_called_once_with(indexer, [failed_id])
+
+
+def test_parallel_bulk_index_rejections(base_app, db, mocker):
+    """Rejected documents are retried in smaller requests."""
+    mocker.patch.dict(base_app.config, {"RECORDS_RESOURCES_BULK_INDEX_BACKOFF": 0})
+    dead_letter = mocker.patch("invenio_records_resources.indexer.dead_letter")
+    records = _create(db, 4)
+    rejected = {str(records[0].id): 2, str(records[1].id): 10}
+
+    def _status(id_):
+        if rejected.get(id_):
+            rejected[id_] -= 1
+            return 429
+        return 201
+
+    indexer = _indexer(mocker, _status)
+    chunk_size = mocker.spy(ChunkSize, "shrink")
+    indexed, failed = parallel_bulk_index(indexer, [r.id for r in records], workers=1)
+
+    assert (indexed, failed) == (3, 1)
+    # the maximum number of retries of the always rejected document
+    assert indexer.client.bulk.call_count == 6
+    assert chunk_size.call_count == 6
+    dead_letter.assert_called_once_with(indexer, [str(records[1].id)])
+
+
+def test_process_bulk_queue_rejections(base_app, db, mocker):
+    """The rejected documents of the queue are retried, then dead-lettered."""
+    mocker.patch.dict(base_app.config, {"RECORDS_RESOURCES_BULK_INDEX_BACKOFF": 0})
+    dead_letter = mocker.patch("invenio_records_resources.indexer.dead_letter")
+    mocker.patch.object(indexer_module, "current_celery_app")
+    records = _create(db, 4)
+    failed_id = str(records[3].id)
+    rejected = {str(records[0].id): 2, str(records[1].id): 10}
+
+    def _status(id_):
+        if rejected.get(id_):
+            rejected[id_] -= 1
+            return 429
+        return 400 if id_ == failed_id else 201
+
+    indexer = _indexer(mocker, _status, indexer_cls=indexer_module.RecordIndexer)
+    indexer.client.indices.get_alias.return_value = {}
+    messages = [mocker.Mock() for _ in records]
+    for message, record in zip(messages, records):
+        message.decode.return_value = {"id": str(record.id), "op": "index"}
+    consumer = mocker.patch.object(indexer_module, "Consumer")
+    consumer.return_value.iterqueue.return_value = iter(messages)
+
+    assert indexer.process_bulk_queue() == (2, 2)
+    # the maximum number of retries of the always rejected document
+    assert indexer.client.bulk.call_count == 6
+    dead_letter.assert_called_once_with(indexer, [failed_id, str(records[1].id)])
+
+
+def test_bulk_index_op_sync(base_app, db, mocker):
+    """The bulk index operation can index the records directly."""
+    records = _create(db, 3)
+    indexer = _indexer(mocker)
+    bulk_index = mocker.patch.object(indexer, "bulk_index")
+
+    with UnitOfWork() as uow:
+        uow.register(RecordBulkIndexOp([r.id for r in records], indexer, sync=True))
+        uow.commit()
+
+    bulk_index.assert_not_called()
+    indexer.client.bulk.assert_called_once()
+
+
+def test_parallel_bulk_index_unchanged(base_app, db, mocker):
+    """The records identical to their indexed version are skipped."""
+    records = _create(db, 2)
+    indexer = _indexer(mocker)
+    indexer.record_dumper = SearchDumper(extensions=[ContentHashDumperExt()])
+    indexed = indexer._prepare_record(records[0], records[0].index._name, {})
+    hashes = {str(records[0].id): indexed["content_hash"]}
+    indexer.client.mget.side_effect = lambda body: {
+        "docs": [
+            (
+                {"found": True, "_source": {"content_hash": hashes[d["_id"]]}}
+                if d["_id"] in hashes
+                else {"found": False}
+            )
+            for d in body["docs"]
+        ]
+    }
+    before = suppressed_writes.value
+
+    assert parallel_bulk_index(indexer, [r.id for r in records]) == (1, 0)
+    body = indexer.client.bulk.call_args.kwargs["body"]
+    assert json.loads(body.splitlines()[0])["index"]["_id"] == str(records[1].id)
+    assert suppressed_writes.value == before + 1
+
+
+def test_process_bulk_queue_unchanged(base_app, db, mocker):
+    """The queued records identical to their indexed version are skipped."""
+    mocker.patch.object(indexer_module, "current_celery_app")
+    records = _create(db, 2)
+    indexer = _indexer(mocker, indexer_cls=indexer_module.RecordIndexer)
+    indexer.client.indices.get_alias.return_value = {}
+    indexer.record_dumper = SearchDumper(extensions=[ContentHashDumperExt()])
+    indexed = indexer._prepare_record(records[0], records[0].index._name, {})
+    # saved again without changes
+    records[0].commit()
+    db.session.commit()
+    indexer.client.mget.return_value = {
+        "docs": [
+            {"found": True, "_source": {"content_hash": indexed["content_hash"]}},
+            {"found": False},
+        ]
+    }
+    messages = [mocker.Mock() for _ in records]
+    for message, record in zip(messages, records):
+        message.decode.return_value = {"id": str(record.id), "op": "index"}
+    consumer = mocker.patch.object(indexer_module, "Consumer")
+    consumer.return_value.iterqueue.return_value = iter(messages)
+    before = suppressed_writes.value
+
+    assert indexer.process_bulk_queue() == (1, 0)
+    body = indexer.client.bulk.call_args.args[0]
+    assert json.loads(body.splitlines()[0])["index"]["_id"] == str(records[1].id)
+    assert suppressed_writes.value == before + 1
+
+
+def test_bulk_index_relations(base_app, db, mocker):
+    """The relations of a batch of records are dereferenced at once."""
+    mocker.patch.object(indexer_module, "current_celery_app")
+    related = _create(db, 2)
+    records = [
+        RecordWithRelations.create({"metadata": {"inner_record": {"id": r["id"]}}})
+        for r in related + related
+    ]
+    for record in records:
+        record.commit()
+    db.session.commit()
+    indexer = _indexer(
+        mocker, indexer_cls=indexer_module.RecordIndexer, record_cls=RecordWithRelations
+    )
+    indexer.client.indices.get_alias.return_value = {}
+    resolve = mocker.spy(PIDFieldContext, "resolve")
+    resolve_many = mocker.spy(PIDFieldContext, "resolve_many")
+
+    assert parallel_bulk_index(indexer, [r.id for r in records]) == (4, 0)
+    body = indexer.client.bulk.call_args.kwargs["body"].splitlines()
+    assert [json.loads(d)["metadata"]["inner_record"]["metadata"] for d in body[1::2]]
+    assert resolve.call_count == 0
+    assert resolve_many.call_count == 1
+
+    messages = [mocker.Mock() for _ in records]
+    for message, record in zip(messages, records):
+        message.decode.return_value = {"id": str(record.id), "op": "index"}
+    consumer = mocker.patch.object(indexer_module, "Consumer")
+    consumer.return_value.iterqueue.return_value = iter(messages)
+    assert indexer.process_bulk_queue() == (4, 0)
+    assert resolve.call_count == 0
+    assert resolve_many.call_count == 2
+
+
+def test_index_migration(base_app, db, mocker):
+    """The records are copied to a new index, which replaces the current one."""
+    mocker.patch("invenio_records_resources.indexer.time.sleep")
+    current_search = mocker.patch(
+        "invenio_records_resources.indexer.current_search", new=mocker.Mock()
+    )
+    indexer_module._migration_indices.clear()
+    records = _create(db, 2)
+    indexer = _indexer(mocker, indexer_cls=indexer_module.RecordIndexer)
+    alias = build_alias_name(records[0].index._name)
+    new_index = f"{alias}-2"
+    current_search.create_index.return_value = ((new_index, None), (None, None))
+
+    client = indexer.client
+    client.indices.get_settings.return_value = {
+        new_index: {"settings": {"index": {"number_of_replicas": "1"}}}
+    }
+
+    def _get_alias(name=None, index=None):
+        if name:
+            return {new_index: {"aliases": {name: {}}}}
+        return {f"{alias}-1": {"aliases": {alias: {"is_write_index": True}}}}
+
+    client.indices.get_alias.side_effect = _get_alias
+
+    migration = IndexMigration(indexer, records[0].index._name)
+    migration.start()
+    client.indices.put_settings.assert_called_once_with(
+        index=new_index,
+        body={"index": {"number_of_replicas": 0, "refresh_interval": "-1"}},
+    )
+
+    # the writes are copied to the new index
+    indexer.index(records[0])
+    assert [c.kwargs["index"] for c in client.index.call_args_list] == [
+        alias,
+        new_index,
+    ]
+
+    assert migration.copy([r.id for r in records]) == (2, 0)
+    body = client.bulk.call_args.kwargs["body"]
+    assert json.loads(body.splitlines()[0])["index"]["_index"] == new_index
+
+    # the synchronous bulk writes are copied too, but not counted
+    assert parallel_bulk_index(indexer, [records[1].id]) == (1, 0)
+    body = client.bulk.call_args.kwargs["body"]
+    assert [json.loads(line)["index"]["_index"] for line in body.splitlines()[::2]] == [
+        alias,
+        new_index,
+    ]
+
+    # the records deleted during the copy are deleted from the new index
+    migration.delete([records[0].id])
+    client.delete_by_query.assert_called_once_with(
+        index=new_index,
+        body={"query": {"ids": {"values": [str(records[0].id)]}}},
+        conflicts="proceed",
+    )
+
+    migration.finish()
+    client.indices.put_settings.assert_called_with(
+        index=new_index,
+        body={"index": {"number_of_replicas": "1", "refresh_interval": None}},
+    )
+    actions = client.indices.update_aliases.call_args.kwargs["body"]["actions"]
+    assert actions == [
+        {"remove": {"index": new_index, "alias": f"{alias}-migration"}},
+        {"remove": {"index": f"{alias}-1", "alias": alias}},
+        {"add": {"index": new_index, "alias": alias, "is_write_index": True}},
+    ]
+    client.indices.delete.assert_not_called()
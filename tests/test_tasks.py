@@ -3,11 +3,36 @@
 
 """Tasks tests."""
 
+import time
+from types import SimpleNamespace
+
 from celery import current_app as current_celery_app
+from invenio_cache import current_cache
 from invenio_indexer.proxies import current_indexer_registry
-from invenio_search.engine import dsl
+from invenio_search.engine import dsl, search
+from kombu import Queue
 
-from invenio_records_resources.tasks import manage_indexer_queues
+from invenio_records_resources.indexer import (
+    QueueAutoscaler,
+    QueueConsumer,
+    RecordIndexer,
+    dead_letter,
+    queue_autoscaler,
+    running_consumers,
+)
+from invenio_records_resources.proxies import (
+    current_notifications_registry,
+    current_service_registry,
+)
+from invenio_records_resources.services.uow import ChangeNotificationOp, UnitOfWork
+from invenio_records_resources.tasks import (
+    manage_indexer_queues,
+    merge_records_info,
+    notify_changes,
+    process_change_notifications,
+    replay_dead_letter_index,
+    send_change_notifications,
+)
 
 
 def _search_query(uuid):
@@ -41,3 +66,215 @@ def test_manage_indexer_queues(app, service, identity_simple, input_data):
     # check the queue is empty
     _, num_messages, _ = queue.queue_declare()
     assert num_messages == 0
+
+
+def test_manage_indexer_queues_priority(base_app, db, mocker):
+    current_cache.clear()
+
+    def _indexer(name, num_messages):
+        queue = mocker.Mock()
+        queue.name = name
+        # the consumers are not registered in the broker
+        queue.queue_declare.return_value = (name, num_messages, 0)
+        return mocker.Mock(**{"mq_queue.bind.return_value": queue})
+
+    indexers = {
+        "a-bulk": _indexer("a-bulk", 10),
+        "b-bulk": _indexer("b-bulk", 10),
+        "a": _indexer("a", 1),
+        "b": _indexer("b", 0),
+    }
+    services = {
+        name: SimpleNamespace(config=SimpleNamespace(indexer_bulk_queue_name=name))
+        for name in ("a-bulk", "b-bulk")
+    }
+    mocker.patch("invenio_records_resources.tasks.current_celery_app")
+    mocker.patch.object(current_indexer_registry, "all", return_value=indexers)
+    mocker.patch.object(current_service_registry, "all", return_value=services)
+    delay = mocker.patch("invenio_records_resources.tasks.process_bulk_queue.delay")
+    overloaded = mocker.patch.object(
+        queue_autoscaler, "cluster_overloaded", return_value=False
+    )
+
+    manage_indexer_queues()
+    # the interactive queue first, and a single consumer for the bulk queues
+    assert delay.call_args_list == [
+        mocker.call(indexer_name="a"),
+        mocker.call(indexer_name="a-bulk"),
+    ]
+    assert queue_autoscaler.metrics["a-bulk"]["backlog"] == 10
+
+    # the running consumers are counted
+    delay.reset_mock()
+    indexer = RecordIndexer(queue=Queue("a-bulk"))
+    mocker.patch.object(RecordIndexer, "_consume_bulk_queue", side_effect=_consume)
+    indexer.process_bulk_queue()
+    assert running_consumers("a-bulk") == 0
+    # the running consumer of the bulk queues is not replaced
+    assert delay.call_args_list == [mocker.call(indexer_name="a")]
+
+    # no consumers are spawned while the cluster is overloaded
+    delay.reset_mock()
+    overloaded.return_value = True
+    manage_indexer_queues()
+    delay.assert_not_called()
+
+
+def _consume(*args):
+    """Run the queue manager while consuming a bulk queue."""
+    assert running_consumers("a-bulk") == 1
+    manage_indexer_queues()
+    return 0, 0
+
+
+def test_running_consumers_expire(base_app, mocker):
+    """The consumers of a killed worker are only counted until they expire."""
+    current_cache.clear()
+    mocker.patch.dict(
+        base_app.config,
+        {"INDEXER_MAX_BULK_CONSUMERS": 2, "RECORDS_RESOURCES_INDEXER_CONSUMER_TTL": 1},
+    )
+    consumers = [QueueConsumer("q") for _ in range(3)]
+    for consumer in consumers:
+        consumer.register()
+    # the consumers beyond the maximum are not counted
+    assert running_consumers("q") == 2
+    assert consumers[2].key is None
+
+    consumers[0].unregister()
+    assert running_consumers("q") == 1
+    consumers[2].register()
+    assert running_consumers("q") == 2
+
+    # killed without unregistering
+    time.sleep(1.5)
+    assert running_consumers("q") == 0
+
+
+def test_queue_autoscaler(base_app, db, mocker):
+    current_cache.clear()
+    autoscaler = QueueAutoscaler()
+    config = {
+        "INDEXER_MAX_BULK_CONSUMERS": 5,
+        "RECORDS_RESOURCES_INDEXER_ITEMS_PER_CONSUMER": 100,
+        "RECORDS_RESOURCES_INDEXER_TARGET_DRAIN_TIME": 10,
+    }
+    now = mocker.patch("invenio_records_resources.indexer.time.time")
+
+    # derived from the backlog, up to the maximum
+    now.return_value = 0
+    assert autoscaler.consumers("q", 250, 0, config) == 3
+    # a growing backlog
+    now.return_value = 10
+    assert autoscaler.consumers("q", 500, 1, config) == 4
+    # 1 consumer drains 10 messages/s, 4 are needed for 400 messages in 10s
+    now.return_value = 20
+    # the observations are shared by the workers
+    assert QueueAutoscaler().consumers("q", 400, 1, config) == 3
+    assert autoscaler.consumers("other", 0, 0, config) == 0
+
+    # new write rejections or a slow response of the cluster
+    client = mocker.Mock()
+    client.cat.thread_pool.return_value = [{"rejected": "1"}]
+    assert not autoscaler.cluster_overloaded(client, 1)
+    assert not autoscaler.cluster_overloaded(client, 1)
+    client.cat.thread_pool.return_value = [{"rejected": "2"}]
+    assert QueueAutoscaler().cluster_overloaded(client, 1)
+
+    # only rejections and timeouts count as overload, not the other errors
+    client.cat.thread_pool.side_effect = search.exceptions.AuthorizationException(
+        403, "security_exception"
+    )
+    assert not autoscaler.cluster_overloaded(client, 1)
+    client.cat.thread_pool.side_effect = search.exceptions.TransportError(
+        429, "es_rejected_execution_exception"
+    )
+    assert autoscaler.cluster_overloaded(client, 1)
+    client.cat.thread_pool.side_effect = search.exceptions.ConnectionTimeout(
+        "TIMEOUT", "timed out", None
+    )
+    assert autoscaler.cluster_overloaded(client, 1)
+
+
+def _record(pid_value, revision_id):
+    """Create a record like object."""
+    return SimpleNamespace(
+        pid=SimpleNamespace(pid_value=pid_value),
+        id=f"uuid-{pid_value}",
+        revision_id=revision_id,
+    )
+
+
+def test_merge_records_info():
+    assert merge_records_info(
+        [("1", "uuid-1", 2), ("2", "uuid-2", 1), ("1", "uuid-1", 3), ("1", "uuid-1", 1)]
+    ) == [("1", "uuid-1", 3), ("2", "uuid-2", 1)]
+
+
+def test_change_notifications_merged_per_uow(base_app, db, mocker):
+    delay = mocker.patch.object(send_change_notifications, "delay")
+    with UnitOfWork() as uow:
+        uow.register(ChangeNotificationOp("records", [_record("1", 1)]))
+        uow.register(ChangeNotificationOp("records", [_record("1", 2)]))
+        uow.register(ChangeNotificationOp("other", [_record("2", 1)]))
+        uow.commit()
+
+    assert delay.call_args_list == [
+        mocker.call("records", [("1", "uuid-1", 2)]),
+        mocker.call("other", [("2", "uuid-2", 1)]),
+    ]
+
+
+def test_change_notifications_coalesced(base_app, db, mocker):
+    base_app.config["RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WINDOW"] = 10
+    handler = mocker.Mock()
+    current_notifications_registry.register("coalesced", handler)
+    # queue the notifications without sending them
+    apply_async = mocker.patch.object(process_change_notifications, "apply_async")
+    try:
+        notify_changes("coalesced", [("1", "uuid-1", 1)])
+        notify_changes("coalesced", [("1", "uuid-1", 2), ("2", "uuid-2", 1)])
+        assert apply_async.call_count == 2
+        handler.assert_not_called()
+
+        process_change_notifications()
+        handler.assert_called_once()
+        _, record_type, records_info, _ = handler.call_args.args
+        assert record_type == "coalesced"
+        assert sorted(map(tuple, records_info)) == [
+            ("1", "uuid-1", 2),
+            ("2", "uuid-2", 1),
+        ]
+    finally:
+        base_app.config["RECORDS_RESOURCES_CHANGE_NOTIFICATIONS_WINDOW"] = None
+
+
+def test_send_change_notifications_parallel(base_app, db, mocker):
+    handlers = [mocker.Mock(), mocker.Mock()]
+    for handler in handlers:
+        current_notifications_registry.register("parallel", handler)
+
+    send_change_notifications("parallel", [("1", "uuid-1", 1)])
+    for handler in handlers:
+        _, record_type, records_info, _ = handler.call_args.args
+        assert (record_type, records_info) == ("parallel", [("1", "uuid-1", 1)])
+
+
+def test_replay_dead_letter_index(base_app, db, mocker):
+    indexer = mocker.Mock(mq_routing_key="records")
+    mocker.patch.object(
+        current_indexer_registry, "all", return_value={"records": indexer}
+    )
+    parallel_bulk_index = mocker.patch(
+        "invenio_records_resources.tasks.parallel_bulk_index"
+    )
+    dead_letter(indexer, ["1", "2"])
+    dead_letter(indexer, ["2", "3"])
+
+    replay_dead_letter_index()
+    parallel_bulk_index.assert_called_once()
+    assert list(parallel_bulk_index.call_args.args[1]) == ["1", "2", "3"]
+
+    # the replayed records are removed from the queue
+    replay_dead_letter_index()
+    parallel_bulk_index.assert_called_once()